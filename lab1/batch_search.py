@@ -0,0 +1,57 @@
+# MIT 6.034 Lab 1: Search
+
+# Answer many (startNode, goalNode) queries against the same graph in
+# parallel. For example, to run A* for a list of queries on every core:
+#     from batch_search import batch_search
+#     paths = batch_search(graph, [('S', 'G'), ('A', 'H')], generic_a_star)
+
+import os
+from multiprocessing import Pool
+
+from search import GraphSnapshot
+from lab1 import generic_search, generic_a_star
+
+# Each worker process rebuilds the graph from its snapshot once, when it
+# starts, and then answers every query it is sent against that copy.
+worker_graph = None
+worker_search = None
+
+def make_search_fn(search):
+    """Returns a search function called as search_fn(graph, startNode,
+    goalNode). search is either a list of arguments for generic_search
+    (such as generic_a_star), or a search function defined at the top level
+    of a module (such as bidirectional_branch_and_bound)."""
+    if callable(search):
+        return search
+    return generic_search(*search)
+
+def init_worker(snapshot, search):
+    global worker_graph, worker_search
+    worker_graph = snapshot.to_graph()
+    worker_search = make_search_fn(search)
+
+def run_query(query):
+    startNode, goalNode = query
+    return worker_search(worker_graph, startNode, goalNode)
+
+def batch_search(graph, queries, search=generic_a_star, processes=None, chunksize=None):
+    """Runs a search for each (startNode, goalNode) pair in queries and
+    returns the resulting paths (or None for each query with no path), in
+    the same order as queries.
+
+    The queries are split across a pool of processes (by default, one per
+    core). The graph is sent to each worker once, as a GraphSnapshot. search
+    must be picklable; see make_search_fn. With processes=1, the queries run
+    in this process, without a pool."""
+    queries = list(queries)
+    if processes == 1:
+        search_fn = make_search_fn(search)
+        return [search_fn(graph, startNode, goalNode) for (startNode, goalNode) in queries]
+
+    processes = processes or os.cpu_count() or 1
+    if chunksize is None:
+        # a few chunks per worker balances load without much messaging
+        chunksize = max(1, len(queries) // (4 * processes))
+    with Pool(processes, initializer=init_worker,
+              initargs=(GraphSnapshot.from_graph(graph), search)) as pool:
+        return pool.map(run_query, queries, chunksize)
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+
+# MIT 6.034 Lab 1: Search
+
+# Benchmarks for the search algorithms in lab1.py on large synthetic graphs.
+# Run this file from your lab1 directory:
+#     python3 benchmarks.py
+
+import random
+import time
+
+from search import Edge, UndirectedGraph, do_nothing_fn
+from lab1 import *
+from batch_search import batch_search
+import csr_graph
+
+
+def make_grid_graph(width, height, seed=0, max_edge_length=10, drop_fraction=0.1):
+    """Returns a road-network-like UndirectedGraph: a width x height grid of
+    nodes named 'x,y', with random integer edge lengths. A fraction of the
+    grid edges is dropped at random to make the graph less regular."""
+    rng = random.Random(seed)
+    nodes = [node_name(x, y) for y in range(height) for x in range(width)]
+    edges = []
+    for y in range(height):
+        for x in range(width):
+            for (nx, ny) in [(x + 1, y), (x, y + 1)]:
+                if nx < width and ny < height and rng.random() >= drop_fraction:
+                    edges.append(Edge(node_name(x, y), node_name(nx, ny),
+                                      rng.randint(1, max_edge_length)))
+    return UndirectedGraph(nodes, edges)
+
+def node_name(x, y):
+    return str(x) + "," + str(y)
+
+def node_position(node):
+    return tuple(int(i) for i in node.split(","))
+
+def set_manhattan_heuristic(graph, goalNode):
+    """Sets an admissible, consistent heuristic for goalNode on a graph made
+    by make_grid_graph: the grid (Manhattan) distance, since every edge has
+    length at least 1."""
+    gx, gy = node_position(goalNode)
+    graph.set_heuristic({goalNode: {node: abs(x - gx) + abs(y - gy)
+                                    for node in graph.nodes
+                                    for (x, y) in [node_position(node)]}})
+    return graph
+
+
+class CountingGraph(UndirectedGraph):
+    """An UndirectedGraph that counts node expansions, i.e. calls to
+    get_neighbors. Every search in lab1 asks for a node's neighbors exactly
+    once each time it extends a path ending at that node."""
+
+    def __init__(self, graph):
+        UndirectedGraph.__init__(self, graph.nodes, graph.edges, graph.heuristic_dict)
+        self.landmarks = graph.landmarks
+        self.expansions = 0
+
+    def get_neighbors(self, node):
+        self.expansions += 1
+        return UndirectedGraph.get_neighbors(self, node)
+
+
+def run_counted(search_fn, graph, startNode, goalNode):
+    """Runs search_fn(graph, startNode, goalNode) on a CountingGraph. Returns
+    (path, number of expansions, seconds)."""
+    counting_graph = CountingGraph(graph)
+    start_time = time.perf_counter()
+    path = search_fn(counting_graph, startNode, goalNode)
+    return (path, counting_graph.expansions, time.perf_counter() - start_time)
+
+def random_queries(graph, num_queries, seed=0):
+    rng = random.Random(seed)
+    return [tuple(rng.sample(graph.nodes, 2)) for i in range(num_queries)]
+
+def print_comparison(title, searches, graph, queries):
+    """For each named search in searches, prints the total number of node
+    expansions and the total time over all queries."""
+    print(title)
+    for name, search_fn in searches:
+        total_expansions, total_time = 0, 0
+        for (startNode, goalNode) in queries:
+            path, expansions, seconds = run_counted(search_fn, graph, startNode, goalNode)
+            total_expansions += expansions
+            total_time += seconds
+        print("  %-45s expansions: %9d   time: %7.3fs" % (name, total_expansions, total_time))
+    print()
+
+
+#### Bidirectional search ######################################################
+
+bfs_with_extended_set = [do_nothing_fn, False, do_nothing_fn, True]
+
+def benchmark_bidirectional(width=60, height=60, num_queries=20):
+    graph = make_grid_graph(width, height)
+    queries = random_queries(graph, num_queries)
+    print_comparison("Breadth-first search, %dx%d grid, %d queries:" % (width, height, num_queries),
+                     [("bfs with extended set", generic_search(*bfs_with_extended_set)),
+                      ("bidirectional_bfs", bidirectional_bfs)],
+                     graph, queries)
+    print_comparison("Uniform-cost search, %dx%d grid, %d queries:" % (width, height, num_queries),
+                     [("branch_and_bound_with_extended_set (heap)",
+                       generic_search(*generic_branch_and_bound_with_extended_set_heap)),
+                      ("bidirectional_branch_and_bound", bidirectional_branch_and_bound)],
+                     graph, queries)
+
+
+#### Memory-bounded search #####################################################
+
+def benchmark_memory_bounded(width=12, height=12, num_queries=5, memory_limits=[50, 200, 1000]):
+    """Compares A*, IDA* and SMA* (at several memory limits) by node
+    expansions, peak agenda size and time."""
+    graph = make_grid_graph(width, height, max_edge_length=3)
+    queries = random_queries(graph, num_queries)
+    a_star = generic_search(*generic_a_star_heap)
+
+    searches = [("a_star (heap)", lambda g, s, t, stats: a_star(g, s, t, stats=stats)),
+                ("ida_star", ida_star)]
+    for limit in memory_limits:
+        searches.append(("sma_star, max_nodes=%d" % limit,
+                         lambda g, s, t, stats, limit=limit: sma_star(g, s, t, limit, stats)))
+
+    print("Memory-bounded A*, %dx%d grid, %d queries:" % (width, height, num_queries))
+    for name, search_fn in searches:
+        stats = SearchStats()
+        found = 0
+        start_time = time.perf_counter()
+        for (startNode, goalNode) in queries:
+            set_manhattan_heuristic(graph, goalNode)
+            found += search_fn(graph, startNode, goalNode, stats=stats) is not None
+        print("  %-32s expansions: %9d   peak agenda: %6d   paths found: %d/%d   time: %7.3fs"
+              % (name, stats.nodes_expanded, stats.max_agenda_length, found,
+                 len(queries), time.perf_counter() - start_time))
+    print()
+
+
+#### Generic search configurations #############################################
+
+def benchmark_generic_search(width=10, height=10, num_queries=5):
+    """Prints the SearchStats of each generic_search configuration (in both
+    agenda modes, where there is a heap-based one) summed over the same
+    queries."""
+    graph = make_grid_graph(width, height, max_edge_length=3)
+    queries = random_queries(graph, num_queries)
+    configurations = ["generic_dfs", "generic_hill_climbing", "generic_best_first",
+                      "generic_branch_and_bound_with_extended_set",
+                      "generic_branch_and_bound_with_extended_set_heap",
+                      "generic_a_star", "generic_a_star_heap"]
+
+    print("generic_search configurations, %dx%d grid, %d queries:" % (width, height, num_queries))
+    print("  %-48s %9s %9s %9s %9s %8s %8s %8s %8s"
+          % ("", "expanded", "pushed", "pruned", "ext. hits", "max agd",
+             "ext. s", "sort s", "agenda s"))
+    for name in configurations:
+        search_fn = generic_search(*globals()[name])
+        stats = SearchStats()
+        for (startNode, goalNode) in queries:
+            set_manhattan_heuristic(graph, goalNode)
+            search_fn(graph, startNode, goalNode, stats=stats)
+        print("  %-48s %9d %9d %9d %9d %8d %8.3f %8.3f %8.3f"
+              % (name, stats.nodes_expanded, stats.paths_pushed, stats.paths_pruned,
+                 stats.extended_set_hits, stats.max_agenda_length, stats.extensions_time,
+                 stats.sort_new_paths_time, stats.sort_agenda_time))
+    print()
+
+
+#### Layered beam search #######################################################
+
+def benchmark_beam(width=200, height=200, num_queries=5, beam_widths=[10, 100]):
+    """Compares breadth-first search to the layered beam search at several
+    beam widths, by node expansions, peak agenda size and path length."""
+    graph = make_grid_graph(width, height)
+    queries = random_queries(graph, num_queries)
+    beam = generic_search(*generic_beam_heap)
+
+    searches = [("bfs with extended set",
+                 lambda g, s, t, stats: generic_search(*bfs_with_extended_set)(g, s, t, stats=stats))]
+    for beam_width in beam_widths:
+        searches.append(("beam (heap), beam_width=%d" % beam_width,
+                         lambda g, s, t, stats, beam_width=beam_width: beam(g, s, t, beam_width, stats)))
+
+    print("Beam search, %dx%d grid, %d queries:" % (width, height, num_queries))
+    for name, search_fn in searches:
+        stats = SearchStats()
+        found, total_edges = 0, 0
+        start_time = time.perf_counter()
+        for (startNode, goalNode) in queries:
+            set_manhattan_heuristic(graph, goalNode)
+            path = search_fn(graph, startNode, goalNode, stats)
+            if path is not None:
+                found += 1
+                total_edges += len(path) - 1
+        layers = len(stats.beam_layers)
+        print("  %-32s expansions: %8d   peak agenda: %6d   paths found: %d/%d   edges: %6d"
+              "   avg. pruned per layer: %6.1f   time: %7.3fs"
+              % (name, stats.nodes_expanded, stats.max_agenda_length, found, len(queries),
+                 total_edges, sum(pruned for size, pruned in stats.beam_layers) / max(layers, 1),
+                 time.perf_counter() - start_time))
+    print()
+
+
+#### Landmark heuristic ########################################################
+
+def benchmark_landmarks(width=100, height=100, num_queries=20, num_landmarks=16):
+    """Compares A* with no heuristic (i.e. uniform-cost search) to A* with a
+    landmark heuristic, on a graph that has no heuristic_dict."""
+    graph = make_grid_graph(width, height)
+    queries = random_queries(graph, num_queries)
+    start_time = time.perf_counter()
+    landmark_graph = graph.copy().set_landmark_heuristic(num_landmarks)
+    print("Landmark precomputation (%d landmarks): %.3fs"
+          % (num_landmarks, time.perf_counter() - start_time))
+    a_star = generic_search(*generic_a_star_heap)
+    print_comparison("A* with no heuristic, %dx%d grid, %d queries:" % (width, height, num_queries),
+                     [("a_star (heap)", a_star)], graph, queries)
+    print_comparison("A* with the landmark heuristic, %dx%d grid, %d queries:"
+                     % (width, height, num_queries),
+                     [("a_star (heap)", a_star)], landmark_graph, queries)
+
+
+#### CSR graph representation ##################################################
+
+def graph_multi_source_distances(graph, sourceNodes):
+    distances = {}
+    for sourceNode in sourceNodes:
+        for node, distance in shortest_path_lengths(graph, sourceNode).items():
+            distances[node] = min(distance, distances.get(node, distance))
+    return distances
+
+def graph_hop_distances(graph, sourceNodes):
+    distances = dict.fromkeys(sourceNodes, 0)
+    frontier = list(distances)
+    while frontier:
+        next_frontier = []
+        for node in frontier:
+            for neighbor in graph.get_neighbors(node):
+                if neighbor not in distances:
+                    distances[neighbor] = distances[node] + 1
+                    next_frontier.append(neighbor)
+        frontier = next_frontier
+    return distances
+
+def benchmark_csr(width=300, height=300, num_sources=4):
+    """Times whole-graph computations on an UndirectedGraph against the same
+    computations on its CSRGraph (vectorized if NumPy is installed)."""
+    graph = make_grid_graph(width, height)
+    goalNode = node_name(width - 1, height - 1)
+    set_manhattan_heuristic(graph, goalNode)
+    sourceNodes = random.Random(0).sample(graph.nodes, num_sources)
+
+    print("CSR graph, %dx%d grid (%s):" % (width, height,
+                                            "NumPy" if csr_graph.numpy is not None else "no NumPy"))
+    start_time = time.perf_counter()
+    csr = csr_graph.CSRGraph.from_graph(graph)
+    print("  %-40s time: %7.3fs" % ("CSRGraph.from_graph", time.perf_counter() - start_time))
+
+    comparisons = [("inconsistent_nodes",
+                    lambda: inconsistent_nodes(graph, goalNode),
+                    lambda: csr_graph.inconsistent_nodes(csr, graph.heuristic_dict, goalNode)),
+                   ("hop distances, %d sources" % num_sources,
+                    lambda: graph_hop_distances(graph, sourceNodes),
+                    lambda: csr_graph.hop_distances(csr, sourceNodes)),
+                   ("shortest distances, %d sources" % num_sources,
+                    lambda: graph_multi_source_distances(graph, sourceNodes),
+                    lambda: csr_graph.multi_source_distances(csr, sourceNodes))]
+    for name, graph_fn, csr_fn in comparisons:
+        start_time = time.perf_counter()
+        expected = graph_fn()
+        graph_time = time.perf_counter() - start_time
+        start_time = time.perf_counter()
+        result = csr_fn()
+        csr_time = time.perf_counter() - start_time
+        print("  %-40s graph: %7.3fs   csr: %7.3fs   same result: %s"
+              % (name, graph_time, csr_time, result == expected))
+    print()
+
+
+#### Parallel batch queries ####################################################
+
+def benchmark_batch_search(width=80, height=80, num_queries=200, process_counts=[1, 2, 4, 8]):
+    """Prints the throughput of batch_search (uniform-cost search with a heap
+    agenda and an extended set) for different numbers of worker processes."""
+    graph = make_grid_graph(width, height)
+    queries = random_queries(graph, num_queries)
+    print("batch_search, %dx%d grid, %d queries:" % (width, height, num_queries))
+    expected = None
+    for processes in process_counts:
+        start_time = time.perf_counter()
+        paths = batch_search(graph, queries, generic_branch_and_bound_with_extended_set_heap, processes)
+        seconds = time.perf_counter() - start_time
+        expected = expected or paths
+        print("  processes: %2d   time: %7.3fs   queries/second: %8.1f   same results: %s"
+              % (processes, seconds, num_queries / seconds, paths == expected))
+    print()
+
+
+if __name__ == '__main__':
+    benchmark_bidirectional()
+    benchmark_memory_bounded()
+    benchmark_generic_search()
+    benchmark_beam()
+    benchmark_landmarks()
+    benchmark_csr()
+    benchmark_batch_search()
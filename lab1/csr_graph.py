@@ -0,0 +1,219 @@
+# MIT 6.034 Lab 1: Search
+
+# A compressed-sparse-row (CSR) copy of an UndirectedGraph, for whole-graph
+# computations that touch every node or edge, such as checking a heuristic on
+# every edge or computing distances from many nodes. For example:
+#     from csr_graph import CSRGraph, inconsistent_nodes
+#     csr = CSRGraph.from_graph(graph)
+#     print(inconsistent_nodes(csr, graph.heuristic_dict, 'G'))
+#
+# The arrays are plain array.array objects, so CSRGraph works without NumPy.
+# If NumPy is installed, expand_frontier and heuristic_differences run on
+# NumPy views of them, with one vectorized operation per frontier or per
+# pass over the edges instead of one Python operation per Edge. Each function
+# with a NumPy version takes use_numpy=False to run the pure-Python version
+# instead.
+
+import heapq
+from array import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+class CSRGraph:
+    """Nodes are numbered 0..n-1 in the order of the graph's (distinct)
+    nodes list, followed by any edge endpoints missing from it. The
+    neighbors of node i, in sorted order, are
+        neighbors[offsets[i]:offsets[i+1]]
+    and the lengths of the edges to them are the same slice of weights (NaN
+    for an unweighted edge). Each undirected edge is stored twice, once from
+    each end.
+
+    names:      list of node names; names[i] is the name of node i
+    index:      dict mapping each node name to its number
+    offsets:    int array of n+1 positions into neighbors and weights
+    neighbors:  int array of neighbor node numbers
+    weights:    float array of edge lengths"""
+
+    def __init__(self, names, offsets, neighbors, weights):
+        self.names = names
+        self.index = {name: i for i, name in enumerate(names)}
+        self.offsets = offsets
+        self.neighbors = neighbors
+        self.weights = weights
+
+    @classmethod
+    def from_graph(cls, graph):
+        # as in GraphSnapshot.from_graph, edge endpoints missing from
+        # graph.nodes are numbered after the listed nodes
+        index = {}
+        for node in graph.nodes:
+            index.setdefault(node, len(index))
+        for e in graph.edges:
+            index.setdefault(e.startNode, len(index))
+            index.setdefault(e.endNode, len(index))
+        names = list(index)
+        offsets = array('q', [0])
+        neighbors = array('i')
+        weights = array('d')
+        for node in names:
+            for neighbor in graph.get_neighbors(node):
+                length = graph.get_edge(node, neighbor).length
+                neighbors.append(index[neighbor])
+                weights.append(float('nan') if length is None else length)
+            offsets.append(len(neighbors))
+        return cls(names, offsets, neighbors, weights)
+
+    def to_graph(self, heuristic_dict={}):
+        """Returns an equivalent UndirectedGraph. Each edge is stored from its
+        lower-numbered end, so edge directions may differ from the original
+        graph's."""
+        from search import Edge, UndirectedGraph
+        edges = []
+        for i, name in enumerate(self.names):
+            for k in range(self.offsets[i], self.offsets[i + 1]):
+                j = self.neighbors[k]
+                if i <= j:
+                    length = self.weights[k]
+                    edges.append(Edge(name, self.names[j], None if length != length else length))
+        return UndirectedGraph(self.names, edges, heuristic_dict)
+
+    def num_nodes(self):
+        return len(self.names)
+
+    def num_edges(self):
+        """Returns the number of (undirected) edges."""
+        return (len(self.neighbors) + self.num_self_loops()) // 2
+
+    def num_self_loops(self):
+        return sum(1 for i in range(len(self.names))
+                   for k in range(self.offsets[i], self.offsets[i + 1])
+                   if self.neighbors[k] == i)
+
+    def get_neighbors(self, node):
+        """Returns the numbers of node's neighbors, where node is a number."""
+        return self.neighbors[self.offsets[node]:self.offsets[node + 1]]
+
+    def edge_sources(self, use_numpy=True):
+        """Returns an int array giving, for each position k in neighbors, the
+        node the edge at k starts from."""
+        if use_numpy and numpy is not None:
+            return numpy.repeat(numpy.arange(len(self.names), dtype=numpy.int32),
+                                numpy.diff(self.as_numpy()[0]))
+        return array('i', [i for i in range(len(self.names))
+                           for k in range(self.offsets[i], self.offsets[i + 1])])
+
+    def as_numpy(self):
+        """Returns (offsets, neighbors, weights) as NumPy arrays that share
+        memory with the CSR arrays."""
+        return (numpy.frombuffer(self.offsets, dtype=numpy.int64),
+                numpy.frombuffer(self.neighbors, dtype=numpy.int32),
+                numpy.frombuffer(self.weights, dtype=numpy.float64))
+
+
+#### Frontier expansion ########################################################
+
+def expand_frontier(csr, frontier, visited, use_numpy=True):
+    """One breadth-first step. frontier is a sequence of node numbers, and
+    visited a bytearray with one flag per node.
+    Returns the sorted node numbers that are neighbors of the frontier and
+    not yet visited, and marks them visited."""
+    if use_numpy and numpy is not None:
+        offsets, neighbors, weights = csr.as_numpy()
+        frontier = numpy.asarray(frontier, dtype=numpy.int64)
+        starts, ends = offsets[frontier], offsets[frontier + 1]
+        sizes = ends - starts
+        # positions starts[f] .. ends[f]-1 for every frontier node f
+        positions = (numpy.arange(sizes.sum())
+                     - numpy.repeat(numpy.cumsum(sizes) - sizes, sizes)
+                     + numpy.repeat(starts, sizes))
+        reached = numpy.unique(neighbors[positions])
+        visited_flags = numpy.frombuffer(visited, dtype=numpy.uint8)
+        new_frontier = reached[visited_flags[reached] == 0]
+        visited_flags[new_frontier] = 1
+        return new_frontier
+
+    new_frontier = set()
+    for node in frontier:
+        for neighbor in csr.get_neighbors(node):
+            if not visited[neighbor]:
+                new_frontier.add(neighbor)
+    new_frontier = sorted(new_frontier)
+    for node in new_frontier:
+        visited[node] = 1
+    return new_frontier
+
+def hop_distances(csr, sourceNodes, use_numpy=True):
+    """Returns a dict mapping every node reachable from any of sourceNodes
+    (node names) to the fewest edges from the nearest of them."""
+    visited = bytearray(csr.num_nodes())
+    frontier = sorted(set(csr.index[node] for node in sourceNodes))
+    for node in frontier:
+        visited[node] = 1
+    distances = {}
+    depth = 0
+    while len(frontier):
+        for node in frontier:
+            distances[csr.names[node]] = depth
+        frontier = expand_frontier(csr, frontier, visited, use_numpy)
+        depth += 1
+    return distances
+
+
+#### Multi-source shortest paths ###############################################
+
+def multi_source_distances(csr, sourceNodes):
+    """Returns a dict mapping every node reachable from any of sourceNodes
+    (node names) to the length of a shortest path from the nearest of them,
+    by running Dijkstra's algorithm from all the sources together. Edge
+    lengths must be numeric and non-negative."""
+    offsets, neighbors, weights, names = csr.offsets, csr.neighbors, csr.weights, csr.names
+    distances = {}
+    agenda = [(0, csr.index[node]) for node in set(sourceNodes)]
+    while agenda:
+        distance, node = heapq.heappop(agenda)
+        if names[node] in distances:
+            continue
+        distances[names[node]] = distance
+        for k in range(offsets[node], offsets[node + 1]):
+            heapq.heappush(agenda, (distance + weights[k], neighbors[k]))
+    return distances
+
+
+#### Heuristic checks ##########################################################
+
+def heuristic_array(csr, heuristic_dict, goalNode):
+    """Returns the heuristic values for goalNode as a float array indexed by
+    node number (0 for nodes with no value, as in get_heuristic_value)."""
+    values = heuristic_dict.get(goalNode, {})
+    return array('d', [values.get(name, 0) for name in csr.names])
+
+def heuristic_differences(csr, heuristic, use_numpy=True):
+    """For each position k in neighbors, returns how much the heuristic
+    drops along the edge at k, minus that edge's length:
+        heuristic[start] - heuristic[end] - length
+    A positive value means the heuristic is inconsistent at the edge's start
+    node. heuristic is a float array indexed by node number."""
+    if use_numpy and numpy is not None:
+        offsets, neighbors, weights = csr.as_numpy()
+        h = numpy.frombuffer(heuristic, dtype=numpy.float64) \
+            if isinstance(heuristic, array) else numpy.asarray(heuristic, dtype=numpy.float64)
+        return h[csr.edge_sources()] - h[neighbors] - weights
+    return array('d', [heuristic[i] - heuristic[csr.neighbors[k]] - csr.weights[k]
+                       for i in range(csr.num_nodes())
+                       for k in range(csr.offsets[i], csr.offsets[i + 1])])
+
+def inconsistent_nodes(csr, heuristic_dict, goalNode, use_numpy=True):
+    """Returns an alphabetical list of the nodes v that have a neighbor N with
+    heuristic(v) > heuristic(N) + edge_weight(v, N), checking every edge in
+    one pass over the CSR arrays."""
+    differences = heuristic_differences(csr, heuristic_array(csr, heuristic_dict, goalNode),
+                                        use_numpy)
+    if use_numpy and numpy is not None:
+        offenders = csr.edge_sources()[differences > 0]
+    else:
+        starts = csr.edge_sources(use_numpy)
+        offenders = [starts[k] for k in range(len(differences)) if differences[k] > 0]
+    return sorted(set(csr.names[i] for i in offenders))
@@ -1,7 +1,11 @@
 # MIT 6.034 Lab 1: Search
 # Written by 6.034 staff
 
-from search import Edge, UndirectedGraph, do_nothing_fn, make_generic_search
+from search import (Edge, UndirectedGraph, Path, distinct, do_nothing_fn,
+                    make_generic_search, make_ida_star, make_sma_star,
+                    shortest_path_lengths)
+from collections import deque
+import heapq
 import read_graphs
 from functools import reduce
 
@@ -23,6 +27,9 @@ def path_length(graph, path):
     (That is, the list of nodes defines a path through the graph.)
     A path with fewer than 2 nodes should have length of 0.
     You can assume that all edges along the path have a valid numeric weight."""
+    if isinstance(path, Path) and path.cost is not None:
+        return path.cost
+
     path_length = 0
     if len(path) <=1:
         return 0
@@ -36,6 +43,8 @@ def path_length(graph, path):
 def has_loops(path):
     """Returns True if this path has a loop in it, i.e. if it
     visits a node more than once. Returns False otherwise."""
+    if isinstance(path, Path):
+        return path.has_loops()
     return len(set(path)) != len(path)
 
 def break_ties(paths):
@@ -47,6 +56,9 @@ def extensions(graph, path):
     by adding a neighbor node (of the final node in the path) to the path.
     Returned paths should not have loops, i.e. should not visit the same node
     twice. The returned paths should be sorted in lexicographic order."""
+    if isinstance(path, Path):
+        return path.extensions(graph)
+
     extensions = []
 
     neighbors = graph.get_neighbors(path[-1])
@@ -58,6 +70,13 @@ def extensions(graph, path):
 
     return break_ties(extensions)
 
+def path_heuristic(graph, goalNode, path):
+    """Returns the heuristic value from the last node of path to goalNode.
+    For Path objects, the value is cached on the path."""
+    if isinstance(path, Path):
+        return path.heuristic_value(graph, goalNode)
+    return graph.get_heuristic_value(path[-1], goalNode)
+
 def sort_by_heuristic(graph, goalNode, nodes):
     """Given a list of nodes, sorts them best-to-worst based on the heuristic
     from each node to the goal node. Here, and in general for this lab, we
@@ -80,23 +99,15 @@ def basic_dfs(graph, startNode, goalNode):
     exists, otherwise returning None.
     Uses backtracking, but does not use an extended set.
     """
-    paths = extensions(graph, [startNode])
+    # stack of Paths; the next path to extend is at the end
+    paths = extensions(graph, Path(startNode))[::-1]
 
     while len(paths) != 0:
-        current_path = paths.pop(0)
-        current_node = current_path[-1]
-        if current_node == goalNode:
-            return current_path
+        current_path = paths.pop()
+        if current_path[-1] == goalNode:
+            return current_path.to_list()
         else:
-            extended_paths = []
-            for ext_path in extensions(graph, [current_node]):
-                new_ext = current_path.copy()
-                child = ext_path[-1]
-                new_ext.append(child)
-                if not has_loops(new_ext):
-                    extended_paths.append(new_ext)
-            
-            paths = extended_paths + paths           
+            paths.extend(reversed(extensions(graph, current_path)))
 
     return None
 
@@ -107,21 +118,67 @@ def basic_bfs(graph, startNode, goalNode):
     node to a specified goal node, returning a path-to-goal if it
     exists, otherwise returning None.
     """
-    paths = extensions(graph, [startNode])
+    paths = deque(extensions(graph, Path(startNode)))
 
     while len(paths) != 0:
-        current_path = paths.pop(0)
-        current_node = current_path[-1]
-        if current_node == goalNode:
-            return current_path
+        current_path = paths.popleft()
+        if current_path[-1] == goalNode:
+            return current_path.to_list()
         else:
-            extended_paths = []
-            for ext_path in extensions(graph, [current_node]):
-                new_ext = current_path.copy()
-                child = ext_path[-1]
-                new_ext.append(child)
-                if not has_loops(new_ext):
-                    paths.append(new_ext)       
+            paths.extend(extensions(graph, current_path))
+
+    return None
+
+
+def join_bidirectional_paths(forward_parents, backward_parents, meetNode):
+    """Given the parent pointers of a forward and a backward search, returns
+    the path from the forward root through meetNode to the backward root."""
+    path = []
+    node = meetNode
+    while node is not None:
+        path.append(node)
+        node = forward_parents[node]
+    path.reverse()
+    node = backward_parents[meetNode]
+    while node is not None:
+        path.append(node)
+        node = backward_parents[node]
+    return path
+
+def bidirectional_bfs(graph, startNode, goalNode):
+    """
+    Performs a breadth-first search from startNode and goalNode at the same
+    time, expanding one whole layer of the smaller frontier at a time, and
+    stops when the frontiers meet. Returns a path with the fewest edges
+    from startNode to goalNode (ties may be broken differently than in
+    basic_bfs), or None if no such path exists.
+    """
+    if startNode == goalNode:
+        return [startNode]
+
+    parents = ({startNode: None}, {goalNode: None})
+    frontiers = ([startNode], [goalNode])
+
+    while frontiers[0] and frontiers[1]:
+        side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+        these_parents, other_parents = parents[side], parents[1 - side]
+        next_frontier = []
+        meetNode = None
+        for node in frontiers[side]:
+            for neighbor in graph.get_neighbors(node):
+                if neighbor in these_parents:
+                    continue
+                these_parents[neighbor] = node
+                if neighbor in other_parents and meetNode is None:
+                    meetNode = neighbor
+                next_frontier.append(neighbor)
+        if meetNode is not None:
+            # all nodes in next_frontier are equally far from this side's
+            # root, and every node seen by the other side is at most one
+            # layer away from its frontier, so the first meeting is optimal
+            return join_bidirectional_paths(parents[0], parents[1], meetNode)
+        frontiers = ((next_frontier, frontiers[1]) if side == 0
+                     else (frontiers[0], next_frontier))
 
     return None
 
@@ -142,14 +199,27 @@ def basic_bfs(graph, startNode, goalNode):
 #     # YOUR CODE HERE
 #     return sorted_paths
 
+# Path costs and heuristic values are cached on each Path (see search.Path),
+# so re-sorting the agenda costs only the comparisons, with no graph walks.
+
 def heuristic_sorting(graph, goalNode, paths):
-    return sorted(paths, key=lambda path: graph.get_heuristic_value(path[-1], goalNode))
+    return sorted(paths, key=lambda path: path_heuristic(graph, goalNode, path))
 
 def path_len_sorting(graph, goalNode, paths):
     return sorted(paths, key=lambda path: path_length(graph, path))
 
 def heuristic_path_len_sorting(graph, goalNode, paths):
-    return sorted(paths, key=lambda path: path_length(graph, path) + graph.get_heuristic_value(path[-1], goalNode))
+    return sorted(paths, key=lambda path: path_length(graph, path) + path_heuristic(graph, goalNode, path))
+
+# Priority functions for generic_search's optional fifth argument,
+# agenda_priority_fn. Each one maps a single path to the key it is ordered by
+# on a heap-based agenda, replacing a full re-sort of the agenda per step.
+
+def path_len_priority(graph, goalNode, path):
+    return path_length(graph, path)
+
+def heuristic_path_len_priority(graph, goalNode, path):
+    return path_length(graph, path) + path_heuristic(graph, goalNode, path)
 
 generic_dfs = [do_nothing_fn, True, do_nothing_fn, False]
 
@@ -167,6 +237,107 @@ generic_branch_and_bound_with_extended_set = [do_nothing_fn, False, path_len_sor
 
 generic_a_star = [do_nothing_fn, False, heuristic_path_len_sorting, True]
 
+# The same branch-and-bound and A* searches, using a heap-based agenda. Each
+# returns the same path as the list-based configuration above it.
+
+generic_branch_and_bound_heap = [do_nothing_fn, False, do_nothing_fn, False, path_len_priority]
+
+generic_branch_and_bound_with_heuristic_heap = [path_len_sorting, False, do_nothing_fn, False, heuristic_path_len_priority]
+
+generic_branch_and_bound_with_extended_set_heap = [do_nothing_fn, False, do_nothing_fn, True, path_len_priority]
+
+generic_a_star_heap = [do_nothing_fn, False, do_nothing_fn, True, heuristic_path_len_priority]
+
+
+# Bidirectional variant of generic_branch_and_bound_with_extended_set
+# (uniform-cost search). It is not built from generic_search, so it is called
+# directly: bidirectional_branch_and_bound(graph, startNode, goalNode).
+
+def bidirectional_branch_and_bound(graph, startNode, goalNode):
+    """Performs uniform-cost search with an extended set from startNode and
+    goalNode at the same time. Stops once the cheapest unexpanded paths on
+    the two sides together cost at least as much as the best complete path
+    found so far, which is then a shortest path. Returns that path, or None
+    if goalNode cannot be reached. Ties may be broken differently than in
+    generic_branch_and_bound_with_extended_set."""
+    if startNode == goalNode:
+        return [startNode]
+
+    parents = ({startNode: None}, {goalNode: None})
+    costs = ({startNode: 0}, {goalNode: 0})
+    agendas = ([(0, startNode)], [(0, goalNode)])
+    extended_sets = (set(), set())
+    best_cost, meetNode = float('inf'), None
+
+    while agendas[0] and agendas[1]:
+        if agendas[0][0][0] + agendas[1][0][0] >= best_cost:
+            break
+        side = 0 if agendas[0][0][0] <= agendas[1][0][0] else 1
+        cost, node = heapq.heappop(agendas[side])
+        if node in extended_sets[side]:
+            continue
+        extended_sets[side].add(node)
+
+        these_costs, other_costs = costs[side], costs[1 - side]
+        for neighbor in graph.get_neighbors(node):
+            if neighbor in extended_sets[side]:
+                continue
+            new_cost = cost + graph.get_edge(node, neighbor).length
+            if new_cost < these_costs.get(neighbor, float('inf')):
+                these_costs[neighbor] = new_cost
+                parents[side][neighbor] = node
+                heapq.heappush(agendas[side], (new_cost, neighbor))
+            if neighbor in other_costs:
+                total = these_costs[neighbor] + other_costs[neighbor]
+                if total < best_cost:
+                    best_cost, meetNode = total, neighbor
+
+    if meetNode is None:
+        return None
+    return join_bidirectional_paths(parents[0], parents[1], meetNode)
+
+
+# Memory-bounded variants of A*, for graphs where A*'s agenda does not fit in
+# memory. Both return the same kind of path as generic_search(*generic_a_star)
+# and take an optional SearchStats to report node expansions and peak agenda
+# size:
+#     stats = SearchStats()
+#     ida_star(graph, startNode, goalNode, stats=stats)
+#     sma_star(graph, startNode, goalNode, max_nodes=100, stats=stats)
+
+ida_star = make_ida_star(extensions, has_loops, path_length)
+
+sma_star = make_sma_star(extensions, has_loops, path_length)
+
+
+# Many (startNode, goalNode) queries against one graph, split across a pool of
+# processes; see batch_search.py. Returns one path (or None) per query:
+#     batch_search(GRAPH_2, [('S', 'G'), ('A', 'F')], generic_a_star)
+
+def batch_search(graph, queries, search=generic_a_star, processes=None):
+    from batch_search import batch_search
+    return batch_search(graph, queries, search, processes)
+
+
+# Whole-graph computations on a compressed-sparse-row copy of a graph; see
+# csr_graph.py. csr_function(name) returns a function that calls
+# csr_graph.<name> on a CSR copy of its graph argument:
+#     csr_function('multi_source_distances')(GRAPH_2, ['S', 'G'])
+#     csr_function('hop_distances')(GRAPH_2, ['S'], False)  # without NumPy
+
+def csr_function(name):
+    import csr_graph
+    def csr_fn(graph, *args):
+        return getattr(csr_graph, name)(csr_graph.CSRGraph.from_graph(graph), *args)
+    return csr_fn
+
+
+# Reading a graphs file through the binary graph cache; see read_graphs.py:
+#     get_graphs('graphs.txt', use_cache=True)
+
+def get_graphs(file_name="graphs.txt", verbose=False, use_cache=False):
+    return read_graphs.get_graphs(file_name, verbose, use_cache)
+
 
 # Here is an example of how to call generic_search (uncomment to run):
 # my_dfs_fn = generic_search(*generic_dfs)
@@ -181,14 +352,39 @@ generic_a_star = [do_nothing_fn, False, heuristic_path_len_sorting, True]
 ### OPTIONAL: Generic Beam Search
 
 # If you want to run local tests for generic_beam, change TEST_GENERIC_BEAM to True:
-TEST_GENERIC_BEAM = False
+TEST_GENERIC_BEAM = True
 
 # The sort_agenda_fn for beam search takes fourth argument, beam_width:
 # def my_beam_sorting_fn(graph, goalNode, paths, beam_width):
 #     # YOUR CODE HERE
 #     return sorted_beam_agenda
 
-generic_beam = [None, None, None, None]
+def beam_sorting(graph, goalNode, paths, beam_width):
+    """Keeps, among the paths of each length, the beam_width paths with the
+    lowest heuristic values. Returns them ordered by length, then by
+    heuristic value."""
+    layers = {}
+    for path in paths:
+        layers.setdefault(len(path), []).append(path)
+    return [path for length in sorted(layers)
+            for path in heuristic_sorting(graph, goalNode, layers[length])[:beam_width]]
+
+def heuristic_priority(graph, goalNode, path):
+    return path_heuristic(graph, goalNode, path)
+
+generic_beam = [do_nothing_fn, False, beam_sorting, False]
+
+# The same beam search, expanding one layer at a time with a bounded heap
+# instead of sorting the whole agenda. It returns the same path as
+# generic_beam, and holds at most 2 * beam_width paths at once, so it can be
+# used on graphs far too large for breadth-first search. Pass a SearchStats
+# to see the size of each layer and how many paths it pruned:
+#     stats = SearchStats()
+#     generic_search(*generic_beam_heap)(GRAPH_2, 'S', 'G', beam_width=2, stats=stats)
+#     print(stats.beam_layers)
+# (Called without a beam_width, it is a heap-based greedy best-first search.)
+
+generic_beam_heap = [do_nothing_fn, False, do_nothing_fn, False, heuristic_priority]
 
 
 # Uncomment this to test your generic_beam search:
@@ -201,11 +397,7 @@ def is_admissible(graph, goalNode):
     """Returns True if this graph's heuristic is admissible; else False.
     A heuristic is admissible if it is either always exactly correct or overly
     optimistic; it never over-estimates the cost to the goal."""
-    for node in graph.nodes:
-        shortest_path = path_length(graph, generic_search(*generic_branch_and_bound)(graph, node, goalNode))
-        if graph.get_heuristic_value(node, goalNode) > shortest_path:
-            return False
-    return True
+    return len(inadmissible_nodes(graph, goalNode)) == 0
 
 def is_consistent(graph, goalNode):
     """Returns True if this graph's heuristic is consistent; else False.
@@ -216,11 +408,42 @@ def is_consistent(graph, goalNode):
     In other words, moving from one node to a neighboring node never unfairly
     decreases the heuristic.
     This is equivalent to the heuristic satisfying the triangle inequality."""
+    return len(inconsistent_nodes(graph, goalNode)) == 0
+
+def inadmissible_nodes(graph, goalNode, distances=None):
+    """Returns an alphabetical list of the nodes whose heuristic value
+    over-estimates their shortest distance to goalNode. All the exact
+    distances come from a single Dijkstra pass outward from goalNode (or
+    from distances, if given). Nodes that cannot reach goalNode are never
+    over-estimated."""
+    if distances is None:
+        distances = shortest_path_lengths(graph, goalNode)
+    return sorted(node for node in distinct(graph.nodes)
+                  if node in distances
+                  and graph.get_heuristic_value(node, goalNode) > distances[node])
+
+def inconsistent_nodes(graph, goalNode):
+    """Returns an alphabetical list of the nodes v that have a neighbor N with
+    heuristic(v) > heuristic(N) + edge_weight(v, N)."""
+    offenders = set()
     for edge in graph.edges:
-        heuristic_diff = graph.get_heuristic_value(edge.startNode, goalNode) - graph.get_heuristic_value(edge.endNode, goalNode)
-        if edge.length < abs(heuristic_diff):
-            return False
-    return True
+        h_start = graph.get_heuristic_value(edge.startNode, goalNode)
+        h_end = graph.get_heuristic_value(edge.endNode, goalNode)
+        if edge.length < h_start - h_end:
+            offenders.add(edge.startNode)
+        elif edge.length < h_end - h_start:
+            offenders.add(edge.endNode)
+    return sorted(offenders)
+
+def validate_heuristics(graph):
+    """Checks the heuristic for every goal node in graph.heuristic_dict.
+    Returns a dict mapping each goal node to a dict with the keys
+    'inadmissible' and 'inconsistent', whose values are the (alphabetical)
+    lists of offending nodes for that goal. Empty lists mean the heuristic
+    is admissible and consistent for that goal."""
+    return {goalNode: {'inadmissible': inadmissible_nodes(graph, goalNode),
+                       'inconsistent': inconsistent_nodes(graph, goalNode)}
+            for goalNode in graph.heuristic_dict}
 
 ### OPTIONAL: Picking Heuristics
 
@@ -1,31 +1,100 @@
 # MIT 6.034 Lab 1: Search
 
-from search import UndirectedGraph
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from search import Edge, GraphSnapshot, UndirectedGraph
+
+def get_graphs(file_name="graphs.txt", verbose=False, use_cache=False):
+    """Reads the graphs in file_name. Returns a dict mapping graph names to
+    UndirectedGraph objects.
+
+    If use_cache is True, the parsed graphs are also stored in a binary cache
+    file next to file_name (see CACHE_SUFFIX), and later calls load them from
+    there instead of re-parsing, for as long as file_name is unchanged."""
+    if use_cache:
+        graphs = load_graph_cache(file_name)
+        if graphs is not None:
+            return graphs
 
-def get_graphs(file_name="graphs.txt", verbose=False):
     with open(file_name, 'r') as f:
-        line_strings = [line.strip('\n').strip('\r') for line in f.readlines()
-                        if (line != '\n' and line[0] != '#')]
-    lines = []
-    for line_str in line_strings:
-        if '#' not in line_str:
-            lines.append(line_str.split(' '))
-        else:
-            i = line_str.find('#')
-            lines.append(line_str[:i].split(' '))
+        graphs = parse_graphs(f, verbose)
 
-    graphs = {}
+    if use_cache:
+        save_graph_cache(graphs, file_name)
+    return graphs
+
+def split_lines(lines):
+    """Yields each non-blank, non-comment line as a list of space-separated
+    tokens, with any trailing '#' comment removed."""
+    for line in lines:
+        if line == '\n' or line[0] == '#':
+            continue
+        line_str = line.strip('\n').strip('\r')
+        i = line_str.find('#')
+        if i != -1:
+            line_str = line_str[:i]
+        yield line_str.split(' ')
+
+class GraphBuilder:
+    """Accumulates the nodes, edges and heuristic of one graph while it is
+    being parsed, so that the UndirectedGraph (and its adjacency index) is
+    built once at the end instead of one join at a time."""
+
+    def __init__(self):
+        self.nodes = []
+        self.node_set = set()
+        self.edges = []
+        self.joined = set()
+        self.heuristic_dict = None
+
+    def add_nodes(self, nodes):
+        if self.nodes != []:
+            raise Exception("graph already has nodes list: \n" + str(self.build()))
+        self.nodes = nodes
+        self.node_set = set(nodes)
+
+    def join(self, startNode, endNode, edgeLength=None, verbose=False):
+        # same behavior as UndirectedGraph.join, without the O(E) scans
+        if (startNode, endNode) in self.joined:
+            print("UndirectedGraph.join: Error adding edge to graph")
+            return
+        self.joined.add((startNode, endNode))
+        self.joined.add((endNode, startNode))
+        self.edges.append(Edge(startNode, endNode, edgeLength))
+        for node in [startNode, endNode]:
+            if node not in self.node_set:
+                if verbose:
+                    print("UndirectedGraph.join: Adding", node, "to list of nodes")
+                self.nodes.append(node)
+                self.node_set.add(node)
+
+    def build(self):
+        graph = UndirectedGraph(self.nodes, self.edges)
+        if self.heuristic_dict is not None:
+            graph.set_heuristic(self.heuristic_dict)
+        return graph
+
+def parse_graphs(lines, verbose=False):
+    """Parses graphs from an iterable of lines (such as an open file) in a
+    single streaming pass. Returns a dict mapping graph names to
+    UndirectedGraph objects."""
+    builders = {}
     g = None
     heuristicDict = None
     recordingHeuristic = False
 
-    for line in lines:
+    for line in split_lines(lines):
         label = line[0]
         if label == '' or label == 'edges':
             continue
         if recordingHeuristic:
             if label == 'heuristic-end':
-                g.set_heuristic(heuristicDict)
+                g.heuristic_dict = heuristicDict
                 heuristicDict = None
                 recordingHeuristic = False
             else: #add entry to heuristicDict
@@ -37,29 +106,131 @@ def get_graphs(file_name="graphs.txt", verbose=False):
         elif label == 'graph':
             if len(line) != 2:
                 raise Exception("invalid graph line. Expected syntax: 'graph graphName'")
-            g = UndirectedGraph()
-            graphs[line[1]] = g
+            g = GraphBuilder()
+            builders[line[1]] = g
         elif label == 'nodes':
-            if g.nodes != []:
-                raise Exception("graph already has nodes list: \n" + str(g))
-            g.nodes = line[1:]
+            g.add_nodes(line[1:])
         elif label == 'heuristic-start':
             recordingHeuristic = True
             heuristicDict = {}
         else: #assume edge
             try:
                 if len(line) == 2: #unweighted edge
-                    g.join(line[0], line[1])
+                    g.join(line[0], line[1], verbose=verbose)
                 elif len(line) == 3: #weighted edge
-                    g.join(line[0], line[1], float(line[2]))
+                    g.join(line[0], line[1], float(line[2]), verbose)
             except:
                 raise Exception("invalid edge. Expected syntax: 'startNode endNode' "
                                 + "OR 'startNode endNode edgeLength'")
         if verbose:
             print(line)
 
+    graphs = {name: builder.build() for name, builder in builders.items()}
+
     if verbose:
         for graphName in sorted(graphs.keys()):
             print(graphName, ":", graphs[graphName])
 
-    return graphs
\ No newline at end of file
+    return graphs
+
+
+#### Binary graph cache ########################################################
+
+# Layout of a cache file (native byte order, recorded in the metadata):
+#   header:    CACHE_HEADER (magic, version, source mtime_ns, source size,
+#              metadata length)
+#   metadata:  JSON, padded to a multiple of 8 bytes. For each graph: its
+#              name, its GraphSnapshot's node names and nodes list, its edge
+#              count and its heuristic.
+#   endpoints: int32 array, two node indexes per edge, padded to 8 bytes
+#   lengths:   float64 array, one per edge (NaN for an unweighted edge)
+# Edges of all graphs are stored back to back, in file order.
+
+CACHE_SUFFIX = ".graphcache"
+CACHE_MAGIC = b"6034GRPH"
+CACHE_VERSION = 1
+CACHE_HEADER = struct.Struct("=8sIqqI")
+
+def get_cache_file_name(file_name):
+    return file_name + CACHE_SUFFIX
+
+def source_key(file_name):
+    stat = os.stat(file_name)
+    return (stat.st_mtime_ns, stat.st_size)
+
+def pad8(n):
+    return (-n) % 8
+
+def save_graph_cache(graphs, file_name):
+    """Writes graphs to the binary cache for file_name. Returns True on
+    success, or False if the cache could not be written."""
+    metadata = {'byteorder': sys.byteorder, 'graphs': []}
+    endpoints = array('i')
+    lengths = array('d')
+    for name, graph in graphs.items():
+        snapshot = GraphSnapshot.from_graph(graph)
+        endpoints.extend(snapshot.endpoints)
+        lengths.extend(snapshot.lengths)
+        metadata['graphs'].append({'name': name,
+                                   'names': snapshot.names,
+                                   'nodes': snapshot.nodes.tolist(),
+                                   'num_edges': snapshot.num_edges(),
+                                   'heuristic': snapshot.heuristic_dict})
+    meta_bytes = json.dumps(metadata).encode('utf-8')
+    mtime_ns, size = source_key(file_name)
+
+    cache_file_name = get_cache_file_name(file_name)
+    temp_file_name = cache_file_name + ".tmp"
+    try:
+        with open(temp_file_name, 'wb') as f:
+            f.write(CACHE_HEADER.pack(CACHE_MAGIC, CACHE_VERSION, mtime_ns, size, len(meta_bytes)))
+            f.write(meta_bytes + b'\0' * pad8(CACHE_HEADER.size + len(meta_bytes)))
+            endpoints.tofile(f)
+            f.write(b'\0' * pad8(endpoints.itemsize * len(endpoints)))
+            lengths.tofile(f)
+        os.replace(temp_file_name, cache_file_name)
+    except OSError:
+        return False
+    return True
+
+def load_graph_cache(file_name):
+    """Returns the graphs stored in the binary cache for file_name, or None
+    if there is no cache or it is out of date with respect to file_name."""
+    cache_file_name = get_cache_file_name(file_name)
+    try:
+        if os.path.getsize(cache_file_name) < CACHE_HEADER.size:
+            return None
+        with open(cache_file_name, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return read_graph_cache(mm, source_key(file_name))
+    except (OSError, ValueError):
+        return None
+
+def read_graph_cache(buffer, expected_key):
+    magic, version, mtime_ns, size, meta_length = CACHE_HEADER.unpack_from(buffer, 0)
+    if magic != CACHE_MAGIC or version != CACHE_VERSION or (mtime_ns, size) != expected_key:
+        return None
+    offset = CACHE_HEADER.size
+    metadata = json.loads(bytes(buffer[offset:offset + meta_length]).decode('utf-8'))
+    if metadata['byteorder'] != sys.byteorder:
+        return None
+    offset += meta_length + pad8(offset + meta_length)
+
+    num_edges = sum(g['num_edges'] for g in metadata['graphs'])
+    endpoints_end = offset + 4 * 2 * num_edges
+    lengths_start = endpoints_end + pad8(endpoints_end)
+    if len(buffer) < lengths_start + 8 * num_edges:
+        return None  # truncated
+    with memoryview(buffer) as view:
+        endpoints = array('i', view[offset:endpoints_end].cast('i'))
+        lengths = array('d', view[lengths_start:lengths_start + 8 * num_edges].cast('d'))
+
+    graphs = {}
+    e = 0
+    for g in metadata['graphs']:
+        n = g['num_edges']
+        snapshot = GraphSnapshot(g['names'], array('i', g['nodes']),
+                                 endpoints[2*e:2*(e + n)], lengths[e:e + n], g['heuristic'])
+        graphs[g['name']] = snapshot.to_graph()
+        e += n
+    return graphs
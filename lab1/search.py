@@ -1,5 +1,10 @@
 # MIT 6.034 Lab 1: Search
 
+import heapq
+from array import array
+from itertools import count
+from time import perf_counter
+
 def distinct(seq):
     seen = set()
     seen_add = seen.add
@@ -33,6 +38,42 @@ class UndirectedGraph:
         self.nodes = nodes[:]
         self.edges = edges[:]
         self.heuristic_dict = heuristic_dict.copy()
+        self.landmarks = None
+        self.__build_adjacency__()
+
+    # ADJACENCY INDEX
+    # self.adjacency maps each node to a dict {neighbor: Edge}, holding the
+    # first edge in self.edges that joins the two nodes (in whichever
+    # direction it was stored).  It is kept up to date by join; if self.edges
+    # is replaced or appended to directly, the index is rebuilt on next use.
+
+    def __build_adjacency__(self):
+        adjacency = {}
+        parallel = False
+        for e in self.edges:
+            start_nbrs = adjacency.setdefault(e.startNode, {})
+            if e.endNode in start_nbrs:
+                parallel = True
+                continue
+            start_nbrs[e.endNode] = e
+            adjacency.setdefault(e.endNode, {})[e.startNode] = e
+        self.adjacency = adjacency
+        self.__has_parallel_edges = parallel
+        self.__indexed_edges = (id(self.edges), len(self.edges))
+
+    def __get_adjacency__(self):
+        if self.__indexed_edges != (id(self.edges), len(self.edges)):
+            self.__build_adjacency__()
+        return self.adjacency
+
+    def __add_to_adjacency__(self, edge):
+        "Index an edge that has just been appended to self.edges."
+        if self.__indexed_edges != (id(self.edges), len(self.edges) - 1):
+            self.__build_adjacency__()
+            return
+        self.adjacency.setdefault(edge.startNode, {}).setdefault(edge.endNode, edge)
+        self.adjacency.setdefault(edge.endNode, {}).setdefault(edge.startNode, edge)
+        self.__indexed_edges = (id(self.edges), len(self.edges))
 
     def is_valid_path(self, path) :
         # all nodes are nodes in the path, and consecutive nodes are neighbors
@@ -42,6 +83,25 @@ class UndirectedGraph:
         """ Return a list of all the edges in the graph.  If start or end are
         provided, restricts to edges that start/end at particular nodes. """
 
+        if startNode is None and endNode is None:
+            return [e for e in self.edges]
+
+        adjacency = self.__get_adjacency__()
+        if self.__has_parallel_edges:
+            return self.__scan_edges__(startNode, endNode)
+
+        if endNode is None:
+            return [e if e.startNode == startNode else e.reverse()
+                    for e in adjacency.get(startNode, {}).values()]
+        if startNode is None:
+            return [e if e.endNode == endNode else e.reverse()
+                    for e in adjacency.get(endNode, {}).values()]
+
+        edge = self.get_edge(startNode, endNode)
+        return [] if edge is None else [edge]
+
+    def __scan_edges__(self, startNode=None, endNode=None):
+        "Linear scan over self.edges, used when the graph has parallel edges."
         pred1 =  lambda node: (startNode is None) or (node == startNode)
         pred2 =  lambda node: (endNode is None)   or (node == endNode)
 
@@ -53,7 +113,7 @@ class UndirectedGraph:
 
     def get_neighbors(self, node):
         "Returns an alphabetical list of neighboring nodes. Each node appears at most once."
-        return sorted(distinct([e.endNode for e in self.get_edges(node)]))
+        return sorted(self.__get_adjacency__().get(node, {}))
 
     def get_neighboring_edges(self, startNode):
         "Returns a list of neighboring edges."
@@ -62,15 +122,17 @@ class UndirectedGraph:
     def get_edge(self, startNode, endNode):
         """ Returns the edge that directly connects startNode to endNode
         (or None if there is no such edge) """
-        edges = self.get_edges(startNode, endNode)
-        if len(edges) == 0:
+        edge = self.__get_adjacency__().get(startNode, {}).get(endNode)
+        if edge is None:
             return None
+        elif edge.startNode == startNode:
+            return edge
         else:
-            return edges[0]
+            return edge.reverse()
 
     def is_neighbor(self, startNode, endNode):
         "Returns True if there is an edge connecting startNode to endNode, else False"
-        return any([endNode == e.endNode for e in self.get_edges(startNode)])
+        return endNode in self.__get_adjacency__().get(startNode, {})
 
     # CREATE AND MODIFY THE GRAPH
 
@@ -79,7 +141,9 @@ class UndirectedGraph:
         if self.is_neighbor(startNode, endNode):
             print("UndirectedGraph.join: Error adding edge to graph")
             return self
-        self.edges.append(Edge(startNode, endNode, edgeLength))
+        edge = Edge(startNode, endNode, edgeLength)
+        self.edges.append(edge)
+        self.__add_to_adjacency__(edge)
         for node in [startNode, endNode]:
             if node not in self.nodes:
                 print("UndirectedGraph.join: Adding", node, "to list of nodes")
@@ -87,16 +151,29 @@ class UndirectedGraph:
         return self
 
     # HEURISTIC
+    # Goals in heuristic_dict use its values. For any other goal, the
+    # heuristic is 0, or the landmark heuristic if one has been precomputed
+    # with set_landmark_heuristic.
     def get_heuristic_value(self, startNode, goalNode) :
+       if self.landmarks is not None and goalNode not in self.heuristic_dict:
+           return self.landmarks.get_heuristic_value(startNode, goalNode)
        return self.heuristic_dict.get(goalNode, {}).get(startNode, 0)
     def set_heuristic(self, heuristicDict) :
         self.heuristic_dict = heuristicDict
         return self
+    def set_landmark_heuristic(self, num_landmarks=8, landmarks=None):
+        """Precomputes a LandmarkHeuristic for this graph (see below). Call it
+        again after changing the graph's edges, as the distances are not
+        updated."""
+        self.landmarks = LandmarkHeuristic(self, num_landmarks, landmarks)
+        return self
 
     def copy(self):
-        return UndirectedGraph(self.nodes[:],
-                               [e.copy() for e in self.edges],
-                               self.heuristic_dict.copy())
+        graph = UndirectedGraph(self.nodes[:],
+                                [e.copy() for e in self.edges],
+                                self.heuristic_dict.copy())
+        graph.landmarks = self.landmarks
+        return graph
 
     def __str__(self):
         return "\n\t".join(["Graph<",
@@ -105,6 +182,200 @@ class UndirectedGraph:
                             "heuristic: " + str(self.heuristic_dict)]) + "\n>"
     __repr__ = __str__
 
+class GraphSnapshot:
+    """A compact, read-only copy of an UndirectedGraph that pickles quickly:
+    node names are stored once, and the edges as flat arrays of node indexes
+    and lengths instead of one Edge object each. Use it to send a graph to
+    other processes, or to store it on disk; to_graph() rebuilds the graph.
+
+    names:      list of the distinct node names used by the graph
+    nodes:      int array, the graph's nodes list as indexes into names
+    endpoints:  int array, two node indexes per edge
+    lengths:    float array, one length per edge (NaN for an unweighted edge)
+    landmarks:  int array of the graph's landmark nodes, as indexes into
+                names, or None if it has no LandmarkHeuristic
+    landmark_distances: one float array per landmark, its distance to each
+                node in names (inf where a node is unreachable)"""
+
+    def __init__(self, names, nodes, endpoints, lengths, heuristic_dict={},
+                 landmarks=None, landmark_distances=None):
+        self.names = names
+        self.nodes = nodes
+        self.endpoints = endpoints
+        self.lengths = lengths
+        self.heuristic_dict = heuristic_dict
+        self.landmarks = landmarks
+        self.landmark_distances = landmark_distances
+
+    @classmethod
+    def from_graph(cls, graph):
+        index = {}
+        for node in graph.nodes:
+            index.setdefault(node, len(index))
+        endpoints = array('i')
+        lengths = array('d')
+        for e in graph.edges:
+            endpoints.append(index.setdefault(e.startNode, len(index)))
+            endpoints.append(index.setdefault(e.endNode, len(index)))
+            lengths.append(float('nan') if e.length is None else e.length)
+        landmarks = landmark_distances = None
+        if graph.landmarks is not None:
+            heuristic = graph.landmarks
+            landmarks = array('i', [index.setdefault(landmark, len(index))
+                                    for landmark in heuristic.landmarks])
+            # reindex each distance table by snapshot node index
+            INF = float('inf')
+            positions = [heuristic.index.get(name) for name in index]
+            landmark_distances = [array('d', [INF if i is None else table[i] for i in positions])
+                                  for table in heuristic.distances]
+        return cls(list(index), array('i', [index[node] for node in graph.nodes]),
+                   endpoints, lengths, graph.heuristic_dict, landmarks, landmark_distances)
+
+    def num_edges(self):
+        return len(self.lengths)
+
+    def to_graph(self):
+        names = self.names
+        edges = [Edge(names[start], names[end], None if length != length else length)
+                 for start, end, length in zip(self.endpoints[0::2].tolist(),
+                                               self.endpoints[1::2].tolist(),
+                                               self.lengths.tolist())]
+        graph = UndirectedGraph([names[i] for i in self.nodes], edges, self.heuristic_dict)
+        if self.landmarks is not None:
+            graph.landmarks = LandmarkHeuristic.from_distances(
+                names, [names[i] for i in self.landmarks], self.landmark_distances)
+        return graph
+
+
+class Path:
+    """A path through a graph, stored as a pointer to the path it extends.
+
+    Sibling paths share their common prefix instead of each holding a copy of
+    it, so extending a path costs O(1) time and memory.  Each Path caches its
+    last node, its cost (the sum of edge lengths, or None if an edge along it
+    is unweighted) and, once it has been extended, the set of nodes on it.
+
+    A Path behaves like a read-only list of nodes (len, indexing, iteration,
+    comparison), so path-sorting functions written for lists keep working.
+    Use to_list() to turn it into a plain list."""
+
+    __slots__ = ('parent', 'node', 'cost', 'depth', '_members', '_has_loops', '_heuristic')
+
+    def __init__(self, node, parent=None, edge_length=0):
+        self.parent = parent
+        self.node = node
+        if parent is None:
+            self.depth = 1
+            self.cost = 0
+        else:
+            self.depth = parent.depth + 1
+            self.cost = (None if parent.cost is None or edge_length is None
+                         else parent.cost + edge_length)
+        self._members = None
+        self._has_loops = None
+        self._heuristic = None
+
+    @classmethod
+    def from_list(cls, graph, nodes):
+        path = None
+        for node in nodes:
+            if path is None:
+                path = cls(node)
+            else:
+                path = path.extend(graph, node)
+        return path
+
+    def extend(self, graph, node):
+        "Returns a new Path that adds node to the end of this one."
+        edge = graph.get_edge(self.node, node)
+        return Path(node, self, None if edge is None else edge.length)
+
+    def extensions(self, graph):
+        """Returns the loop-free one-node extensions of this path, in
+        alphabetical order of the added node."""
+        members = self.members
+        return [self.extend(graph, node) for node in graph.get_neighbors(self.node)
+                if node not in members]
+
+    def heuristic_value(self, graph, goalNode):
+        """Returns graph's heuristic value from this path's last node to
+        goalNode. The value is looked up once and then cached on the path, so
+        re-sorting an agenda does not repeat the lookup."""
+        cached = self._heuristic
+        if cached is None or cached[0] is not graph or cached[1] != goalNode:
+            cached = (graph, goalNode, graph.get_heuristic_value(self.node, goalNode))
+            self._heuristic = cached
+        return cached[2]
+
+    @property
+    def members(self):
+        "The set of nodes on this path. Computed once and shared by all extensions."
+        if self._members is None:
+            pending = []
+            path = self
+            while path is not None and path._members is None:
+                pending.append(path)
+                path = path.parent
+            members = frozenset() if path is None else path._members
+            for path in reversed(pending):
+                members = members.union((path.node,))
+                path._members = members
+        return self._members
+
+    def has_loops(self):
+        "Returns True if this path visits a node more than once."
+        if self._has_loops is None:
+            pending = []
+            path = self
+            while path is not None and path._has_loops is None:
+                pending.append(path)
+                path = path.parent
+            loops = False if path is None else path._has_loops
+            for path in reversed(pending):
+                loops = loops or (path.parent is not None
+                                  and path.node in path.parent.members)
+                path._has_loops = loops
+        return self._has_loops
+
+    def to_list(self):
+        nodes = []
+        path = self
+        while path is not None:
+            nodes.append(path.node)
+            path = path.parent
+        nodes.reverse()
+        return nodes
+
+    def __len__(self):
+        return self.depth
+
+    def __iter__(self):
+        return iter(self.to_list())
+
+    def __getitem__(self, index):
+        if index == -1 or index == self.depth - 1:
+            return self.node
+        return self.to_list()[index]
+
+    def __eq__(self, other):
+        if isinstance(other, Path):
+            return self is other or self.to_list() == other.to_list()
+        return isinstance(other, (list, tuple)) and self.to_list() == list(other)
+
+    def __lt__(self, other):
+        if isinstance(other, Path) and self.parent is other.parent:
+            # siblings: the shared prefix is equal, so compare last nodes
+            return self.node < other.node
+        return self.to_list() < list(other)
+
+    __hash__ = None
+
+    def __str__(self):
+        return "Path<" + ",".join(map(str, self.to_list())) + ">"
+
+    __repr__ = __str__
+
+
 # Change to True for an example of graph creation:
 if False:
     g = UndirectedGraph()
@@ -113,6 +384,142 @@ if False:
     print(g.get_neighboring_edges("B"))
 
 
+def shortest_path_lengths(graph, sourceNode):
+    """Runs Dijkstra's algorithm from sourceNode. Returns a dict mapping every
+    node reachable from sourceNode to the length of a shortest path between
+    them. Unreachable nodes are left out. Edge lengths must be numeric and
+    non-negative."""
+    distances = {}
+    agenda = [(0, sourceNode)]
+    while agenda:
+        distance, node = heapq.heappop(agenda)
+        if node in distances:
+            continue
+        distances[node] = distance
+        for edge in graph.get_neighboring_edges(node):
+            if edge.endNode not in distances:
+                heapq.heappush(agenda, (distance + edge.length, edge.endNode))
+    return distances
+
+
+class LandmarkHeuristic:
+    """An admissible, consistent heuristic for every goal node at once (the
+    "ALT" heuristic), built from exact shortest-path distances to a few
+    landmark nodes. By the triangle inequality, for any landmark L,
+        dist(node, goal) >= |dist(L, goal) - dist(L, node)|
+    and the heuristic value is the largest such bound over all landmarks.
+
+    Landmarks are chosen greedily, each as far as possible from those already
+    chosen, unless given explicitly. Distances are stored as one float array
+    per landmark, indexed by node number (inf where a node is unreachable).
+    Edge lengths must be numeric and non-negative."""
+
+    def __init__(self, graph, num_landmarks=8, landmarks=None):
+        self.nodes = distinct(graph.nodes)
+        self.index = {node: i for i, node in enumerate(self.nodes)}
+        self.landmarks = []
+        self.distances = []
+        if landmarks is not None:
+            for landmark in landmarks:
+                self.__add_landmark__(graph, landmark)
+        elif self.nodes:
+            self.__choose_landmarks__(graph, num_landmarks)
+
+    @classmethod
+    def from_distances(cls, nodes, landmarks, distances):
+        """Makes a LandmarkHeuristic from precomputed distance tables, one
+        per landmark, each indexed like nodes."""
+        heuristic = cls.__new__(cls)
+        heuristic.nodes = nodes
+        heuristic.index = {node: i for i, node in enumerate(nodes)}
+        heuristic.landmarks = landmarks
+        heuristic.distances = distances
+        return heuristic
+
+    def __add_landmark__(self, graph, landmark):
+        self.landmarks.append(landmark)
+        self.distances.append(self.__distance_table__(graph, landmark))
+
+    def __distance_table__(self, graph, sourceNode):
+        table = array('d', [float('inf')]) * len(self.nodes)
+        for node, distance in shortest_path_lengths(graph, sourceNode).items():
+            table[self.index[node]] = distance
+        return table
+
+    def __choose_landmarks__(self, graph, num_landmarks):
+        # the node farthest from an arbitrary start is the first landmark;
+        # each next one is the node farthest from all the landmarks so far,
+        # so unreachable nodes (in other components) are picked first
+        INF = float('inf')
+        start = self.__distance_table__(graph, self.nodes[0])
+        closest = array('d', [INF]) * len(self.nodes)
+        candidate = max(range(len(self.nodes)),
+                        key=lambda i: (start[i] if start[i] != INF else -1, -i))
+        while len(self.landmarks) < num_landmarks:
+            self.__add_landmark__(graph, self.nodes[candidate])
+            closest = array('d', map(min, closest, self.distances[-1]))
+            remaining = [i for i in range(len(self.nodes))
+                         if self.nodes[i] not in self.landmarks]
+            if not remaining:
+                break
+            candidate = max(remaining, key=lambda i: (closest[i], -i))
+
+    def get_heuristic_value(self, startNode, goalNode):
+        i = self.index.get(startNode)
+        j = self.index.get(goalNode)
+        if i is None or j is None:
+            return 0
+        INF = float('inf')
+        best = 0
+        for table in self.distances:
+            d_start, d_goal = table[i], table[j]
+            # if only one of them is reachable from this landmark, they are in
+            # different components, and 0 is a safe (if useless) bound
+            if d_start != INF and d_goal != INF:
+                best = max(best, abs(d_goal - d_start))
+        return best
+
+
+class SearchStats:
+    """Counters filled in by a search algorithm that is given one through its
+    stats argument. A single SearchStats may be passed to several searches to
+    accumulate totals across them.
+
+    nodes_expanded:       paths extended (calls to extensions_fn)
+    paths_pushed:         paths added to the agenda
+    paths_pruned:         paths thrown away: extensions rejected by has_loops_fn,
+                          plus any paths dropped from the agenda by sort_agenda_fn
+    extended_set_hits:    paths skipped because their last node was already extended
+    max_agenda_length:    largest number of paths on the agenda at once
+    extensions_time, sort_new_paths_time, sort_agenda_time:
+                          seconds spent in extensions_fn (and has_loops_fn),
+                          sort_new_paths_fn and sort_agenda_fn
+    beam_layers:          for a layered beam search, one (frontier size, paths
+                          pruned) pair per layer built: how many paths the
+                          layer kept, and how many extensions it dropped"""
+
+    def __init__(self):
+        self.nodes_expanded = 0
+        self.paths_pushed = 0
+        self.paths_pruned = 0
+        self.extended_set_hits = 0
+        self.max_agenda_length = 0
+        self.extensions_time = 0.0
+        self.sort_new_paths_time = 0.0
+        self.sort_agenda_time = 0.0
+        self.beam_layers = []
+
+    def record_agenda_length(self, length):
+        if length > self.max_agenda_length:
+            self.max_agenda_length = length
+
+    def __str__(self):
+        return "\n\t".join(["SearchStats<"] +
+                            [name + ": " + str(value) for name, value in vars(self).items()]) + "\n>"
+
+    __repr__ = __str__
+
+
 def do_nothing_fn(graph, goalNode, paths):
     return paths
 
@@ -121,7 +528,8 @@ def make_generic_search(extensions_fn, has_loops_fn): #hack to avoid circular im
     def generic_search(sort_new_paths_fn = do_nothing_fn,
                        add_paths_to_front_of_agenda = True,
                        sort_agenda_fn = do_nothing_fn,
-                       use_extended_set = False):
+                       use_extended_set = False,
+                       agenda_priority_fn = None):
 
         # To prevent tester from throwing unexpected errors
         args = [sort_new_paths_fn, add_paths_to_front_of_agenda,
@@ -132,8 +540,10 @@ def make_generic_search(extensions_fn, has_loops_fn): #hack to avoid circular im
             raise TypeError("'None' is not a valid argument for generic_search")
 
         # Make search algorithm with arguments specified above
-        def search_algorithm(graph, start, goal, beam_width=None):
-            agenda = [[start]]
+        def search_algorithm(graph, start, goal, beam_width=None, stats=None):
+            # stats is an optional SearchStats to fill in. When it is None,
+            # the only cost is the "if stats" checks below.
+            agenda = [Path(start)]
             extended_set = set()
 
             while(agenda):
@@ -141,27 +551,340 @@ def make_generic_search(extensions_fn, has_loops_fn): #hack to avoid circular im
                 lastNode = path[-1]
 
                 if(lastNode == goal):
-                    return path
+                    return list(path)
                 elif use_extended_set and lastNode in extended_set:
+                    if stats:
+                        stats.extended_set_hits += 1
                     continue
                 else:
                     extended_set.add(lastNode)
-                    new_paths_unsorted = [path for path in extensions_fn(graph, path)
+                    if stats:
+                        time_0 = perf_counter()
+                    extended_paths = extensions_fn(graph, path)
+                    new_paths_unsorted = [path for path in extended_paths
                                           if not has_loops_fn(path)]
+                    if stats:
+                        time_1 = perf_counter()
                     new_paths = sort_new_paths_fn(graph, goal, new_paths_unsorted)
+                    if stats:
+                        time_2 = perf_counter()
                     if add_paths_to_front_of_agenda:
                         agenda = new_paths + agenda
                     else:
                         agenda = agenda + new_paths
 
+                    agenda_length = len(agenda)
                     if beam_width == None:
                         agenda = sort_agenda_fn(graph, goal, agenda)
                     else:
                         agenda = sort_agenda_fn(graph, goal, agenda, beam_width)
 
+                    if stats:
+                        stats.sort_agenda_time += perf_counter() - time_2
+                        stats.sort_new_paths_time += time_2 - time_1
+                        stats.extensions_time += time_1 - time_0
+                        stats.nodes_expanded += 1
+                        stats.paths_pushed += len(new_paths)
+                        stats.paths_pruned += (len(extended_paths) - len(new_paths_unsorted)
+                                               + agenda_length - len(agenda))
+                        stats.record_agenda_length(agenda_length)
+
+            # no path found
+            return None
+
+        # Priority-queue agenda: instead of re-sorting the whole agenda after
+        # every expansion, each new path is pushed onto a heap keyed by
+        # agenda_priority_fn(graph, goal, path).  Ties are broken by insertion
+        # order (new paths are pushed in the order given by sort_new_paths_fn),
+        # which is exactly the order a stable sort of the list agenda keeps.
+        def priority_search_algorithm(graph, start, goal, beam_width=None, stats=None):
+            if beam_width is not None:
+                return beam_search_algorithm(graph, start, goal, beam_width, stats)
+            tie_breaker = count()
+            agenda = [(agenda_priority_fn(graph, goal, Path(start)), next(tie_breaker), Path(start))]
+            extended_set = set()
+
+            while(agenda):
+                path = heapq.heappop(agenda)[2]
+                lastNode = path[-1]
+
+                if(lastNode == goal):
+                    return list(path)
+                elif use_extended_set and lastNode in extended_set:
+                    if stats:
+                        stats.extended_set_hits += 1
+                    continue
+                else:
+                    extended_set.add(lastNode)
+                    if stats:
+                        time_0 = perf_counter()
+                    extended_paths = extensions_fn(graph, path)
+                    new_paths_unsorted = [path for path in extended_paths
+                                          if not has_loops_fn(path)]
+                    if stats:
+                        time_1 = perf_counter()
+                    new_paths = sort_new_paths_fn(graph, goal, new_paths_unsorted)
+                    if stats:
+                        time_2 = perf_counter()
+                    for new_path in new_paths:
+                        heapq.heappush(agenda, (agenda_priority_fn(graph, goal, new_path),
+                                                next(tie_breaker), new_path))
+
+                    if stats:
+                        # pushing onto the heap takes the place of sort_agenda_fn
+                        stats.sort_agenda_time += perf_counter() - time_2
+                        stats.sort_new_paths_time += time_2 - time_1
+                        stats.extensions_time += time_1 - time_0
+                        stats.nodes_expanded += 1
+                        stats.paths_pushed += len(new_paths)
+                        stats.paths_pruned += len(extended_paths) - len(new_paths_unsorted)
+                        stats.record_agenda_length(len(agenda))
+
             # no path found
             return None
 
+        # Layered beam search, used when a beam_width is given along with
+        # agenda_priority_fn.  The agenda is a single depth layer of at most
+        # beam_width paths, expanded in priority order.  Their extensions are
+        # collected in a heap bounded to beam_width entries, with the worst
+        # kept path on top, so the full next layer is never built.  Returns
+        # the same path as a list agenda that keeps, among the paths of each
+        # length, only the beam_width with the lowest priority (with ties
+        # broken by insertion order).
+        def beam_search_algorithm(graph, start, goal, beam_width, stats=None):
+            tie_breaker = count()
+            layer = [Path(start)]
+            extended_set = set()
+
+            while(layer):
+                beam = []  # entries are (-priority, -insertion order, path)
+                num_candidates = 0
+                for path in layer:
+                    lastNode = path[-1]
+
+                    if(lastNode == goal):
+                        return list(path)
+                    elif use_extended_set and lastNode in extended_set:
+                        if stats:
+                            stats.extended_set_hits += 1
+                        continue
+                    extended_set.add(lastNode)
+                    if stats:
+                        time_0 = perf_counter()
+                    extended_paths = extensions_fn(graph, path)
+                    new_paths_unsorted = [path for path in extended_paths
+                                          if not has_loops_fn(path)]
+                    if stats:
+                        time_1 = perf_counter()
+                    new_paths = sort_new_paths_fn(graph, goal, new_paths_unsorted)
+                    if stats:
+                        time_2 = perf_counter()
+                    for new_path in new_paths:
+                        entry = (-agenda_priority_fn(graph, goal, new_path),
+                                 -next(tie_breaker), new_path)
+                        if len(beam) < beam_width:
+                            heapq.heappush(beam, entry)
+                        elif entry[:2] > beam[0][:2]:
+                            heapq.heapreplace(beam, entry)
+                    num_candidates += len(new_paths)
+
+                    if stats:
+                        stats.sort_agenda_time += perf_counter() - time_2
+                        stats.sort_new_paths_time += time_2 - time_1
+                        stats.extensions_time += time_1 - time_0
+                        stats.nodes_expanded += 1
+                        stats.paths_pushed += len(new_paths)
+                        stats.paths_pruned += len(extended_paths) - len(new_paths_unsorted)
+                        stats.record_agenda_length(len(layer) + len(beam))
+
+                # (-priority, -order) is unique, so paths are never compared
+                layer = [entry[2] for entry in sorted(beam, reverse=True)]
+                if stats:
+                    stats.paths_pruned += num_candidates - len(layer)
+                    stats.beam_layers.append((len(layer), num_candidates - len(layer)))
+
+            # no path found
+            return None
+
+        if agenda_priority_fn is not None:
+            return priority_search_algorithm
         return search_algorithm
 
     return generic_search
+
+
+#### Memory-bounded search #####################################################
+
+# The searches below are built from the same extensions and has_loops
+# functions as generic_search, plus a path-length function for g-costs. Each
+# returns a search function called as search(graph, start, goal, ...) that
+# returns a path (a list of nodes) or None, and fills in an optional
+# SearchStats with node expansions and the peak agenda (frontier) size.
+
+def make_ida_star(extensions_fn, has_loops_fn, path_length_fn):
+
+    def ida_star(graph, start, goal, stats=None):
+        """Iterative-deepening A*: repeated depth-first searches, each cut off
+        at paths whose f = g + h exceeds a bound. The first bound is h(start);
+        each later bound is the smallest f that exceeded the previous one.
+        Memory use is linear in the length of the longest path explored."""
+        stats = stats or SearchStats()
+        f = lambda path: (path_length_fn(graph, path)
+                          + graph.get_heuristic_value(path[-1], goal))
+        bound = f(Path(start))
+
+        while bound != float('inf'):
+            next_bound = float('inf')
+            agenda = [Path(start)]
+            while agenda:
+                path = agenda.pop()
+                path_f = f(path)
+                if path_f > bound:
+                    next_bound = min(next_bound, path_f)
+                    continue
+                if path[-1] == goal:
+                    return list(path)
+                stats.nodes_expanded += 1
+                new_paths = [p for p in extensions_fn(graph, path) if not has_loops_fn(p)]
+                stats.paths_pushed += len(new_paths)
+                agenda.extend(reversed(new_paths))
+                stats.record_agenda_length(len(agenda))
+            bound = next_bound
+
+        # no path found
+        return None
+
+    return ida_star
+
+
+class SMANode:
+    "A node in the partial search tree kept by simplified memory-bounded A*."
+
+    def __init__(self, path, f, parent=None):
+        self.path = path
+        self.f = f
+        self.parent = parent
+        self.depth = 1 if parent is None else parent.depth + 1
+        self.children = {}      # last node -> live child SMANode
+        self.forgotten = {}     # last node -> backed-up f of a pruned child
+        self.unexplored = None  # successor paths not generated yet
+        self.open_entry = None  # tie-breaker of this node's current agenda entry
+
+def make_sma_star(extensions_fn, has_loops_fn, path_length_fn):
+
+    def sma_star(graph, start, goal, max_nodes=1000, stats=None):
+        """Simplified memory-bounded A* (SMA*). Runs A*, generating one
+        successor at a time, while keeping at most max_nodes paths in its
+        partial search tree. When the tree is full, the leaf with the highest
+        f (the shallowest, among ties) is dropped and its f is remembered by
+        its parent, which regenerates it if it becomes promising again.
+        Returns an optimal path if one fits within max_nodes nodes."""
+        stats = stats or SearchStats()
+        infinity = float('inf')
+        h = lambda path: graph.get_heuristic_value(path[-1], goal)
+        tie_breaker = count()
+        best_heap, worst_heap = [], []
+        open_nodes = set()
+
+        def put_in_agenda(node):
+            node.open_entry = next(tie_breaker)
+            open_nodes.add(node)
+            heapq.heappush(best_heap, (node.f, -node.depth, node.open_entry, node))
+            heapq.heappush(worst_heap, (-node.f, node.depth, -node.open_entry, node))
+            stats.record_agenda_length(len(open_nodes))
+
+        def remove_from_agenda(node):
+            open_nodes.discard(node)
+            node.open_entry = None
+
+        def pop_best():
+            while best_heap:
+                f, depth, entry, node = heapq.heappop(best_heap)
+                if node.open_entry == entry:
+                    heapq.heappush(best_heap, (f, depth, entry, node))
+                    return node
+            return None
+
+        def pop_worst_leaf(protected):
+            # entries of inner nodes are dropped; a node is pushed again by
+            # put_in_agenda when it loses its last child
+            while worst_heap:
+                item = heapq.heappop(worst_heap)
+                node = item[3]
+                if node.open_entry == -item[2] and not node.children and node.parent is not None:
+                    if node is protected:
+                        leaf = pop_worst_leaf(None)
+                        heapq.heappush(worst_heap, item)
+                        return leaf
+                    return node
+            return None
+
+        def back_up(node):
+            # once all of a node's successors have been generated, its f is
+            # the smallest f among them (live or forgotten)
+            while node is not None and node.unexplored == []:
+                values = [c.f for c in node.children.values()] + list(node.forgotten.values())
+                new_f = min(values) if values else infinity
+                if new_f == node.f:
+                    return
+                node.f = new_f
+                if node in open_nodes:
+                    put_in_agenda(node)
+                node = node.parent
+
+        root = SMANode(Path(start), h(Path(start)))
+        put_in_agenda(root)
+        num_nodes = 1
+
+        while True:
+            node = pop_best()
+            if node is None or node.f == infinity:
+                # no path found
+                return None
+            if node.path[-1] == goal:
+                return list(node.path)
+
+            if node.unexplored is None:
+                stats.nodes_expanded += 1
+                node.unexplored = [p for p in extensions_fn(graph, node.path)
+                                   if not has_loops_fn(p)]
+                if not node.unexplored:
+                    back_up(node)
+                    continue
+
+            if node.unexplored:
+                child_path = node.unexplored.pop(0)
+                child_f = max(node.f, path_length_fn(graph, child_path) + h(child_path))
+            else:
+                # regenerate the most promising forgotten successor
+                last = min(node.forgotten, key=lambda n: (node.forgotten[n], n))
+                child_f = node.forgotten.pop(last)
+                stats.nodes_expanded += 1
+                child_path = [p for p in extensions_fn(graph, node.path) if p[-1] == last][0]
+            if child_path[-1] != goal and child_path.depth >= max_nodes:
+                child_f = infinity  # too deep to ever fit in memory
+
+            child = SMANode(child_path, child_f, node)
+            node.children[child_path[-1]] = child
+            num_nodes += 1
+            stats.paths_pushed += 1
+            put_in_agenda(child)
+            if not node.unexplored and not node.forgotten:
+                remove_from_agenda(node)
+            back_up(node)
+
+            while num_nodes > max_nodes:
+                leaf = pop_worst_leaf(protected=child if child.f < infinity else None)
+                if leaf is None:
+                    break
+                parent = leaf.parent
+                remove_from_agenda(leaf)
+                stats.paths_pruned += 1
+                del parent.children[leaf.path[-1]]
+                if leaf.f < infinity:
+                    parent.forgotten[leaf.path[-1]] = leaf.f
+                num_nodes -= 1
+                if parent not in open_nodes or not parent.children:
+                    put_in_agenda(parent)
+
+    return sma_star
@@ -447,3 +447,480 @@ if TEST_HEURISTICS:
                             test_heuristic(val, True, False, True)),
               expected_val = 'Correct numerical values for heuristic to fit specifications',
               name = 'heuristic_4')
+
+
+#### HEAP-BASED AGENDA ###################################################
+
+from lab1 import (generic_branch_and_bound_heap,
+                  generic_branch_and_bound_with_heuristic_heap,
+                  generic_branch_and_bound_with_extended_set_heap,
+                  generic_a_star_heap)
+
+heap_search_args = {"branch_and_bound": generic_branch_and_bound_heap,
+                    "branch_and_bound_with_heuristic": generic_branch_and_bound_with_heuristic_heap,
+                    "branch_and_bound_with_extended_set": generic_branch_and_bound_with_extended_set_heap,
+                    "a_star": generic_a_star_heap}
+
+# Heap-based agendas must return the same paths as the list-based ones
+for arg_list in search_tests:
+    if arg_list[0] in heap_search_args:
+        (lambda method, graph, startNode, endNode, answer_string :
+         make_test(type = 'NESTED_FUNCTION',
+                   getargs = [heap_search_args[method], [graph, startNode, endNode]],
+                   testanswer = (lambda val, original_val=None:
+                                 val == list(answer_string)),
+                   expected_val = "({} heap search result) {}".format(method, list(answer_string)),
+                   name = 'generic_search')
+         )(*arg_list[:5])
+
+
+#### PARENT-POINTER PATHS ################################################
+
+from search import Path
+
+make_test(type = 'FUNCTION',
+          getargs = [Path.from_list(GRAPH_2, list('SACDA'))],
+          testanswer = lambda val, original_val=None: val == True,
+          expected_val = True,
+          name = 'has_loops')
+
+make_test(type = 'FUNCTION',
+          getargs = [GRAPH_2, Path.from_list(GRAPH_2, list('DCAS'))],
+          testanswer = lambda val, original_val=None: val == 26,
+          expected_val = 26,
+          name = 'path_length')
+
+path_extensions_answer = [list('SACB'), list('SACD'), list('SACE'), list('SACY')]
+make_test(type = 'FUNCTION',
+          getargs = [GRAPH_2, Path.from_list(GRAPH_2, list('SAC'))],
+          testanswer = lambda val, original_val=None: val == path_extensions_answer,
+          expected_val = path_extensions_answer,
+          name = 'extensions')
+
+
+#### BIDIRECTIONAL SEARCH ################################################
+
+# Shortest paths are unique on these graphs, so the bidirectional searches
+# must match their one-directional counterparts exactly.
+bidirectional_tests = [['bidirectional_bfs', GRAPH_1, 'a', 'd', 'abd'],
+                       ['bidirectional_bfs', GRAPH_2, 'H', 'Y', 'HDCY'],
+                       ['bidirectional_bfs', GRAPH_0, 'n1', 'n1', ['n1']],
+                       ['bidirectional_branch_and_bound', GRAPH_1, 'a', 'd', 'acd'],
+                       ['bidirectional_branch_and_bound', GRAPH_2, 'S', 'G', 'SBCEG'],
+                       ['bidirectional_branch_and_bound', GRAPH_3, 's', 'g', 'sxwg']]
+
+for arg_list in bidirectional_tests:
+    (lambda method, graph, startNode, endNode, answer_string :
+     make_test(type = 'FUNCTION',
+               getargs = [graph, startNode, endNode],
+               testanswer = (lambda val, original_val=None:
+                             val == list(answer_string)),
+               expected_val = list(answer_string),
+               name = method)
+     )(*arg_list)
+
+for method in ['bidirectional_bfs', 'bidirectional_branch_and_bound']:
+    make_test(type = 'FUNCTION',
+              getargs = [GRAPH_1, 'a', 'z'],
+              testanswer = lambda val, original_val=None: val == None,
+              expected_val = None,
+              name = method)
+
+
+#### BATCHED HEURISTIC VALIDATION ########################################
+
+make_test(type = 'FUNCTION',
+          getargs = [GRAPH_3, 'g'],
+          testanswer = lambda val, original_val=None: val == ['x'],
+          expected_val = ['x'],
+          name = 'inadmissible_nodes')
+
+make_test(type = 'FUNCTION',
+          getargs = [test_admissible_graph, 'G'],
+          testanswer = lambda val, original_val=None: val == ['A'],
+          expected_val = ['A'],
+          name = 'inadmissible_nodes')
+
+make_test(type = 'FUNCTION',
+          getargs = [GRAPH_2, 'G'],
+          testanswer = lambda val, original_val=None: val == ['B', 'C', 'F'],
+          expected_val = ['B', 'C', 'F'],
+          name = 'inconsistent_nodes')
+
+validate_heuristics_answer = {'g': {'inadmissible': ['x'], 'inconsistent': ['x', 'z']}}
+make_test(type = 'FUNCTION',
+          getargs = [GRAPH_3],
+          testanswer = lambda val, original_val=None: val == validate_heuristics_answer,
+          expected_val = validate_heuristics_answer,
+          name = 'validate_heuristics')
+
+
+#### MEMORY-BOUNDED SEARCH ###############################################
+
+# A* results on these graphs; GRAPH_3's heuristic is not admissible, so
+# IDA* and SMA* are only checked on the others
+memory_bounded_tests = [['ida_star', GRAPH_1, 'a', 'd', 'acd'],
+                        ['ida_star', GRAPH_2, 'S', 'G', 'SBCEG'],
+                        ['sma_star', GRAPH_1, 'a', 'd', 'acd'],
+                        ['sma_star', GRAPH_2, 'S', 'G', 'SBCEG']]
+
+for arg_list in memory_bounded_tests:
+    (lambda method, graph, startNode, endNode, answer_string :
+     make_test(type = 'FUNCTION',
+               getargs = [graph, startNode, endNode],
+               testanswer = (lambda val, original_val=None:
+                             val == list(answer_string)),
+               expected_val = list(answer_string),
+               name = method)
+     )(*arg_list)
+
+# With room for only 5 paths, SMA* still finds the optimal 5-node path
+make_test(type = 'FUNCTION',
+          getargs = [GRAPH_2, 'S', 'G', 5],
+          testanswer = lambda val, original_val=None: val == list('SBCEG'),
+          expected_val = list('SBCEG'),
+          name = 'sma_star')
+
+for method in ['ida_star', 'sma_star']:
+    make_test(type = 'FUNCTION',
+              getargs = [GRAPH_1, 'a', 'z'],
+              testanswer = lambda val, original_val=None: val == None,
+              expected_val = None,
+              name = method)
+
+
+#### LANDMARK HEURISTIC ##################################################
+
+# GRAPH_2 without its heuristic, using 3 landmarks instead
+GRAPH_2_LANDMARKS = UndirectedGraph(GRAPH_2.nodes, GRAPH_2.edges).set_landmark_heuristic(3)
+
+for goalNode in GRAPH_2_LANDMARKS.nodes:
+    for method in ['is_admissible', 'is_consistent']:
+        make_test(type = 'FUNCTION',
+                  getargs = [GRAPH_2_LANDMARKS, goalNode],
+                  testanswer = lambda val, original_val=None: val == True,
+                  expected_val = True,
+                  name = method)
+
+make_test(type = 'NESTED_FUNCTION',
+          getargs = [generic_a_star_heap, [GRAPH_2_LANDMARKS, 'S', 'G']],
+          testanswer = lambda val, original_val=None: val == list('SBCEG'),
+          expected_val = "(a_star heap search result) " + str(list('SBCEG')),
+          name = 'generic_search')
+
+
+#### LAYERED BEAM SEARCH #################################################
+
+from lab1 import generic_beam_heap
+from search import SearchStats
+
+# The bounded-heap beam search must return the same paths as generic_beam
+for arg_list in beam_search_tests + [['beam', GRAPH_2, 'C', 'G', 1, None]]:
+    (lambda method, graph, startNode, endNode, beam_width, answer_string :
+     make_test(type = 'NESTED_FUNCTION',
+               getargs = [generic_beam_heap,
+                          [graph, startNode, endNode, beam_width]],
+               testanswer = (lambda val, original_val=None:
+                             val == (answer_string and list(answer_string))),
+               expected_val = "(beam heap search result) {}".format(answer_string and list(answer_string)),
+               name = 'generic_search')
+     )(*arg_list[:6])
+
+# Each layer keeps at most beam_width paths, and reports what it pruned
+beam_stats = SearchStats()
+make_test(type = 'NESTED_FUNCTION',
+          getargs = [generic_beam_heap, [GRAPH_2, 'S', 'G', 2, beam_stats]],
+          testanswer = (lambda val, original_val=None:
+                        val == list('SBYCEG')
+                        and beam_stats.beam_layers == [(2, 0), (2, 3), (1, 0), (2, 1), (2, 4)]
+                        and beam_stats.max_agenda_length <= 4),
+          expected_val = "SBYCEG, with layers of at most 2 paths",
+          name = 'generic_search')
+
+
+#### SEARCH STATISTICS ###################################################
+
+from lab1 import generic_search
+
+def stats_counts(stats):
+    return (stats.nodes_expanded, stats.paths_pushed, stats.paths_pruned,
+            stats.extended_set_hits, stats.max_agenda_length)
+
+# (nodes expanded, paths pushed, paths pruned, extended set hits, max agenda
+# length) for each search, and its timers filled in
+search_stats_tests = [[generic_bfs, GRAPH_1, 'a', 'd', 'abd', (4, 7, 0, 0, 4)],
+                      [generic_dfs, GRAPH_2, 'S', 'G', 'SACDEFG', (9, 16, 0, 0, 8)],
+                      [generic_branch_and_bound_with_extended_set, GRAPH_2, 'S', 'G', 'SBCEG', (9, 19, 0, 4, 10)]]
+
+for arg_list in search_stats_tests:
+    (lambda search_args, graph, startNode, endNode, answer_string, counts, stats :
+     make_test(type = 'NESTED_FUNCTION',
+               getargs = [search_args, [graph, startNode, endNode, None, stats]],
+               testanswer = (lambda val, original_val=None:
+                             val == list(answer_string) and stats_counts(stats) == counts
+                             and stats.extensions_time > 0),
+               expected_val = "{}, with stats {}".format(list(answer_string), counts),
+               name = 'generic_search')
+     )(*arg_list, SearchStats())
+
+# One SearchStats passed to two searches adds up both
+bfs_twice_stats = SearchStats()
+def bfs_twice_getargs():
+    generic_search(*generic_bfs)(GRAPH_1, 'a', 'd', stats=bfs_twice_stats)
+    return [generic_bfs, [GRAPH_1, 'a', 'd', None, bfs_twice_stats]]
+
+make_test(type = 'NESTED_FUNCTION',
+          getargs = bfs_twice_getargs,
+          testanswer = (lambda val, original_val=None:
+                        val == list('abd') and stats_counts(bfs_twice_stats) == (8, 14, 0, 0, 4)),
+          expected_val = "['a', 'b', 'd'], with stats (8, 14, 0, 0, 4)",
+          name = 'generic_search')
+
+
+#### CACHED PATH COSTS AND HEURISTIC VALUES ##############################
+
+from lab1 import path_heuristic
+
+class CountingGraph(UndirectedGraph):
+    "An UndirectedGraph that counts its heuristic and edge lookups."
+    heuristic_lookups = 0
+    edge_lookups = 0
+
+    def get_heuristic_value(self, startNode, goalNode):
+        self.heuristic_lookups += 1
+        return UndirectedGraph.get_heuristic_value(self, startNode, goalNode)
+
+    def get_edge(self, startNode, endNode):
+        self.edge_lookups += 1
+        return UndirectedGraph.get_edge(self, startNode, endNode)
+
+counting_graphs = {}
+def counting_graph(name):
+    counting_graphs[name] = CountingGraph(GRAPH_2.nodes, GRAPH_2.edges, GRAPH_2.heuristic_dict)
+    return counting_graphs[name]
+
+# A Path looks up its heuristic value once; asking again uses the cached value
+def path_heuristic_getargs():
+    graph = counting_graph('path_heuristic')
+    path = Path.from_list(graph, list('SBC'))
+    path_heuristic(graph, 'G', path)
+    return [graph, 'G', path]
+
+make_test(type = 'FUNCTION',
+          getargs = path_heuristic_getargs,
+          testanswer = (lambda val, original_val=None:
+                        val == 14 and counting_graphs['path_heuristic'].heuristic_lookups == 1),
+          expected_val = "14, with one heuristic lookup for two calls",
+          name = 'path_heuristic')
+
+# A Path's length is its cached cost, with no edge lookups
+def path_length_getargs():
+    graph = counting_graph('path_length')
+    path = Path.from_list(graph, list('SBCEG'))
+    graph.edge_lookups = 0
+    return [graph, path]
+
+make_test(type = 'FUNCTION',
+          getargs = path_length_getargs,
+          testanswer = (lambda val, original_val=None:
+                        val == 26 and counting_graphs['path_length'].edge_lookups == 0),
+          expected_val = "26, with no edge lookups",
+          name = 'path_length')
+
+# A* re-sorts its whole agenda at every step, but looks up the heuristic only
+# once for each of the 13 paths it pushes
+make_test(type = 'NESTED_FUNCTION',
+          getargs = lambda: [generic_a_star, [counting_graph('a_star'), 'S', 'G']],
+          testanswer = (lambda val, original_val=None:
+                        val == list('SBCEG') and counting_graphs['a_star'].heuristic_lookups == 13),
+          expected_val = "['S', 'B', 'C', 'E', 'G'], with 13 heuristic lookups",
+          name = 'generic_search')
+
+
+#### BATCH QUERIES #######################################################
+
+from lab1 import bidirectional_branch_and_bound
+
+# Every ordered pair of GRAPH_2's nodes, and the path generic_search finds
+# for each, one query at a time
+batch_queries = [(startNode, goalNode) for startNode in sorted(GRAPH_2.nodes)
+                 for goalNode in sorted(GRAPH_2.nodes)]
+batch_answers = [generic_search(*generic_a_star)(GRAPH_2, startNode, goalNode)
+                 for (startNode, goalNode) in batch_queries]
+
+# In this process, and on a pool of 2 processes; a search may also be a
+# function, such as bidirectional_branch_and_bound
+for search, processes in [(generic_a_star, 1), (generic_a_star, 2),
+                          (bidirectional_branch_and_bound, 2)]:
+    make_test(type = 'FUNCTION',
+              getargs = [GRAPH_2, batch_queries, search, processes],
+              testanswer = lambda val, original_val=None: val == batch_answers,
+              expected_val = "the generic_a_star path for each of {} queries".format(len(batch_queries)),
+              name = 'batch_search')
+
+# No path between GRAPH_1's two components
+make_test(type = 'FUNCTION',
+          getargs = [GRAPH_1, [('a', 'd'), ('a', 'z')], generic_bfs, 2],
+          testanswer = lambda val, original_val=None: val == [list('abd'), None],
+          expected_val = [list('abd'), None],
+          name = 'batch_search')
+
+
+# GRAPH_2_LANDMARKS reaches the workers as a GraphSnapshot, which keeps its
+# landmark distances: A* finds the same paths, and the workers see the same
+# heuristic values as this process
+landmark_queries = [('S', goalNode) for goalNode in sorted(GRAPH_2.nodes)]
+make_test(type = 'FUNCTION',
+          getargs = [GRAPH_2_LANDMARKS, landmark_queries, generic_a_star_heap, 2],
+          testanswer = (lambda val, original_val=None:
+                        val == [generic_search(*generic_a_star)(GRAPH_2, startNode, goalNode)
+                                for (startNode, goalNode) in landmark_queries]),
+          expected_val = "the generic_a_star path for each query",
+          name = 'batch_search')
+
+def landmark_heuristic_value(graph, startNode, goalNode):
+    "A batch_search search function that returns the heuristic value instead of a path."
+    return graph.get_heuristic_value(startNode, goalNode)
+
+landmark_values = [GRAPH_2_LANDMARKS.get_heuristic_value(startNode, goalNode)
+                   for (startNode, goalNode) in landmark_queries]
+make_test(type = 'FUNCTION',
+          getargs = [GRAPH_2_LANDMARKS, landmark_queries, landmark_heuristic_value, 2],
+          testanswer = (lambda val, original_val=None:
+                        val == landmark_values and max(val) > 0),
+          expected_val = landmark_values,
+          name = 'batch_search')
+
+
+#### BINARY GRAPH CACHE ##################################################
+
+import os, shutil, tempfile
+import read_graphs
+
+def same_graphs(graphs, expected):
+    return (isinstance(graphs, dict) and sorted(graphs) == sorted(expected)
+            and all(graphs[name].nodes == expected[name].nodes
+                    and graphs[name].edges == expected[name].edges
+                    and graphs[name].heuristic_dict == expected[name].heuristic_dict
+                    for name in expected))
+
+def cached_graphs_file(change=None):
+    """Copies graphs.txt into a new directory and caches the copy with
+    get_graphs. Then calls change (if given) on the copy's path, and
+    returns the path."""
+    file_name = os.path.join(tempfile.mkdtemp(), 'graphs.txt')
+    shutil.copyfile(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'graphs.txt'), file_name)
+    get_graphs(file_name, use_cache=True)
+    if change is not None:
+        change(file_name)
+    return file_name
+
+def add_graph(file_name):
+    with open(file_name, 'a') as f:
+        f.write("\ngraph GRAPH_NEW\nnodes x y\nedges\nx y 1\n")
+
+def truncate_cache(file_name):
+    cache_file_name = read_graphs.get_cache_file_name(file_name)
+    with open(cache_file_name, 'r+b') as f:
+        f.truncate(os.path.getsize(cache_file_name) * 3 // 4)
+
+# The cache holds the same graphs as graphs.txt
+cache_file_names = {}
+def graph_cache_getargs(name, change=None):
+    def getargs():
+        cache_file_names[name] = cached_graphs_file(change)
+        return [cache_file_names[name], False, True]
+    return getargs
+
+make_test(type = 'FUNCTION',
+          getargs = graph_cache_getargs('round trip'),
+          testanswer = (lambda val, original_val=None:
+                        same_graphs(val, all_graphs)
+                        and same_graphs(read_graphs.load_graph_cache(cache_file_names['round trip']),
+                                        all_graphs)),
+          expected_val = "the graphs in graphs.txt, also loaded from the cache",
+          name = 'get_graphs')
+
+# A cache older than its graphs file is ignored and rewritten
+graphs_with_new_graph = dict(all_graphs,
+                             GRAPH_NEW=UndirectedGraph(['x', 'y'], [Edge('x', 'y', 1.0)]))
+make_test(type = 'FUNCTION',
+          getargs = graph_cache_getargs('stale', add_graph),
+          testanswer = (lambda val, original_val=None:
+                        same_graphs(val, graphs_with_new_graph)
+                        and same_graphs(read_graphs.load_graph_cache(cache_file_names['stale']),
+                                        graphs_with_new_graph)),
+          expected_val = "the graphs in graphs.txt and GRAPH_NEW",
+          name = 'get_graphs')
+
+# A truncated cache is ignored and rewritten
+make_test(type = 'FUNCTION',
+          getargs = graph_cache_getargs('truncated', truncate_cache),
+          testanswer = (lambda val, original_val=None:
+                        same_graphs(val, all_graphs)
+                        and same_graphs(read_graphs.load_graph_cache(cache_file_names['truncated']),
+                                        all_graphs)),
+          expected_val = "the graphs in graphs.txt",
+          name = 'get_graphs')
+
+
+#### CSR GRAPHS ##########################################################
+
+from lab1 import inconsistent_nodes, shortest_path_lengths
+
+def hop_counts(graph, sourceNodes):
+    "Breadth-first hop counts from the nearest of sourceNodes, on the UndirectedGraph."
+    counts = {node: 0 for node in sourceNodes}
+    frontier = list(sourceNodes)
+    while frontier:
+        new_frontier = []
+        for node in frontier:
+            for neighbor in graph.get_neighbors(node):
+                if neighbor not in counts:
+                    counts[neighbor] = counts[node] + 1
+                    new_frontier.append(neighbor)
+        frontier = new_frontier
+    return counts
+
+def nearest_source_distances(graph, sourceNodes):
+    "Shortest distances from the nearest of sourceNodes, on the UndirectedGraph."
+    distances = {}
+    for sourceNode in sourceNodes:
+        for node, distance in shortest_path_lengths(graph, sourceNode).items():
+            distances[node] = min(distance, distances.get(node, distance))
+    return distances
+
+# Edges b-c and d-e reach nodes that are not in the nodes list
+GRAPH_MISSING_NODES = UndirectedGraph(['a', 'b'],
+                                      [Edge('a', 'b', 1), Edge('b', 'c', 2), Edge('d', 'e', 1)],
+                                      {'a': {'a': 0, 'b': 5, 'c': 9}})
+
+# Each CSR computation gives the same answer as its UndirectedGraph version,
+# with NumPy (if it is installed) and, for the functions that have a NumPy
+# version, with use_numpy=False
+csr_tests = [['inconsistent_nodes', [GRAPH_2, GRAPH_2.heuristic_dict, 'G'],
+              inconsistent_nodes(GRAPH_2, 'G')],
+             ['inconsistent_nodes', [GRAPH_3, GRAPH_3.heuristic_dict, 'g'],
+              inconsistent_nodes(GRAPH_3, 'g')],
+             ['inconsistent_nodes', [GRAPH_MISSING_NODES, GRAPH_MISSING_NODES.heuristic_dict, 'a'],
+              inconsistent_nodes(GRAPH_MISSING_NODES, 'a')],
+             ['multi_source_distances', [GRAPH_2, ['S', 'G']],
+              nearest_source_distances(GRAPH_2, ['S', 'G'])],
+             ['multi_source_distances', [GRAPH_MISSING_NODES, ['a', 'e']],
+              nearest_source_distances(GRAPH_MISSING_NODES, ['a', 'e'])],
+             ['hop_distances', [GRAPH_2, ['S']], hop_counts(GRAPH_2, ['S'])],
+             ['hop_distances', [GRAPH_3, ['s', 'g']], hop_counts(GRAPH_3, ['s', 'g'])],
+             ['hop_distances', [GRAPH_MISSING_NODES, ['a', 'd']],
+              hop_counts(GRAPH_MISSING_NODES, ['a', 'd'])]]
+
+csr_tests += [[name, args + [False], answer] for [name, args, answer] in csr_tests
+              if name != 'multi_source_distances']
+
+for arg_list in csr_tests:
+    (lambda name, args, answer :
+     make_test(type = 'NESTED_FUNCTION',
+               getargs = [[name], args],
+               testanswer = lambda val, original_val=None: val == answer,
+               expected_val = answer,
+               name = 'csr_function')
+     )(*arg_list)
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+
+# MIT 6.034 Lab 2: Games
+
+# Benchmarks for the game search algorithms in lab2.py.
+# Run this file from your lab2 directory:
+#     python3 benchmarks.py
+
+import json
+import os
+import random
+import time
+
+from game_api import *
+from boards import *
+from lab2 import *
+from parallel_search import minimax_search_alphabeta_parallel
+from toytree import make_random_toy_tree, toytree_game, toytree_heuristic_fn
+
+
+def make_state(board):
+    return AbstractGameState(board, is_game_over_connectfour, next_boards_connectfour_lazy,
+                             endgame_score_connectfour_faster)
+
+def random_midgame_state(num_moves, seed=0):
+    """Returns an AbstractGameState for a Connect Four game after num_moves
+    random moves (by both players) that did not end the game."""
+    rng = random.Random(seed)
+    while True:
+        board = ConnectFourBoard()
+        for move in range(num_moves):
+            board = board.add_piece(rng.choice([col for col in range(board.num_cols)
+                                                if not board.is_column_full(col)]))
+            if is_game_over_connectfour(board):
+                break
+        else:
+            return make_state(board)
+
+def midgame_states(num_boards, num_moves=10):
+    return [make_state(BOARD_UHOH)] + [random_midgame_state(num_moves, seed)
+                                       for seed in range(num_boards - 1)]
+
+
+def benchmark_parallel(depth_limit=6, num_boards=3, process_counts=[1, 2, 4, 8]):
+    """Prints the time taken by minimax_search_alphabeta_parallel on mid-game
+    Connect Four boards for different numbers of worker processes, and its
+    speedup over minimax_search_alphabeta. Each run gets new states, since
+    states keep the children a search generates."""
+    print("minimax_search_alphabeta_parallel, depth %d, %d mid-game boards, %s cores:"
+          % (depth_limit, num_boards, os.cpu_count()))
+    states = midgame_states(num_boards)
+    start_time = time.perf_counter()
+    expected = [minimax_search_alphabeta(state, -INF, INF, heuristic_connectfour, depth_limit)
+                for state in states]
+    sequential_seconds = time.perf_counter() - start_time
+    print("  sequential:     time: %7.3fs   evaluations: %8d"
+          % (sequential_seconds, sum(tup[2] for tup in expected)))
+    for processes in process_counts:
+        states = midgame_states(num_boards)
+        start_time = time.perf_counter()
+        results = [minimax_search_alphabeta_parallel(state, -INF, INF, heuristic_connectfour,
+                                                     depth_limit, True, processes)
+                   for state in states]
+        seconds = time.perf_counter() - start_time
+        print("  processes: %2d   time: %7.3fs   evaluations: %8d   speedup: %5.2f   same scores: %s"
+              % (processes, seconds, sum(tup[2] for tup in results), sequential_seconds / seconds,
+                 [tup[1] for tup in results] == [tup[1] for tup in expected]))
+    print()
+
+
+def benchmark_pvs(depth_limit=5, aspiration_windows=[10, 50]):
+    """Prints the evaluations taken by minimax_search_pvs and by
+    minimax_search_alphabeta, with and without move ordering, and by
+    progressive_deepening with and without aspiration windows, on
+    BOARD_UHOH and the starting board."""
+    print("principal variation search, depth %d:" % depth_limit)
+    for name, board in [('BOARD_UHOH', BOARD_UHOH), ('starting board', ConnectFourBoard())]:
+        state = make_state(board)
+        for ordering in [None, 'centre, killers, history']:
+            results = [(search_fn.__name__, search_fn(state, -INF, INF, heuristic_connectfour, depth_limit, True,
+                                                      ordering and connectfour_move_ordering()))
+                       for search_fn in [minimax_search_alphabeta, minimax_search_pvs]]
+            print("  %-15s ordering: %-25s %s"
+                  % (name, ordering, "   ".join("%s: %d (score %d)" % (search_name, result[2], result[1])
+                                              for search_name, result in results)))
+        for aspiration_window in [None] + aspiration_windows:
+            results = [(search_fn.__name__, progressive_deepening(
+                           state, heuristic_connectfour, depth_limit, True, None, aspiration_window, search_fn))
+                       for search_fn in [minimax_search_alphabeta, minimax_search_pvs]]
+            print("  %-15s progressive_deepening, aspiration window %-5s %s"
+                  % (name, aspiration_window, "   ".join("%s: %d" % (search_name, anytime_value.total_evaluations)
+                                                     for search_name, anytime_value in results)))
+    print()
+
+
+#### Synthetic game trees #######################################################
+
+# (name, arguments for make_random_toy_tree). Every tree has heuristic scores
+# at inner nodes, for the depth-limited searches.
+TOYTREE_CONFIGS = [
+    ('wide b=8 d=4',           dict(branching=8, depth=4)),
+    ('deep b=2 d=12',          dict(branching=2, depth=12)),
+    ('random b=4 d=7',         dict(branching=4, depth=7)),
+    ('best first b=4 d=7',     dict(branching=4, depth=7, ordering='best_first')),
+    ('worst first b=4 d=7',    dict(branching=4, depth=7, ordering='worst_first')),
+    ('gaussian b=4 d=7',       dict(branching=4, depth=7, distribution='gaussian')),
+    ('extremes b=4 d=7',       dict(branching=4, depth=7, distribution='extremes')),
+    ('b=1..6 d=7',             dict(branching=(1, 6), depth=7)),
+]
+
+# dfs_maximizing tries every path, so it is only run on the smaller trees
+DFS_MAX_LEAVES = 5000
+
+def toytree_searches(depth):
+    """Returns (name, function of an AbstractGameState) for each search to
+    benchmark on a tree of the given depth."""
+    return [('dfs_maximizing', dfs_maximizing),
+            ('minimax_endgame_search', lambda game: minimax_endgame_search(game, True)),
+            ('minimax_search_alphabeta', lambda game: minimax_search_alphabeta(
+                game, -INF, INF, toytree_heuristic_fn, INF, True)),
+            ('minimax_search_pvs', lambda game: minimax_search_pvs(
+                game, -INF, INF, toytree_heuristic_fn, INF, True)),
+            ('progressive_deepening', lambda game: progressive_deepening(
+                game, toytree_heuristic_fn, depth, True))]
+
+def run_toytree_benchmarks(configs=TOYTREE_CONFIGS, repeat=3, heuristic_noise=10):
+    """Runs each search on each tree in configs, and returns a list of rows,
+    dicts with the tree and search names, the score, the number of static
+    evaluations (for progressive_deepening, the total over all levels) and
+    the fastest time of repeat runs, in seconds."""
+    rows = []
+    for tree_name, tree_args in configs:
+        tree = make_random_toy_tree(heuristic_noise=heuristic_noise, **tree_args)
+        num_leaves = len(toytree_leaves(tree))
+        for search_name, search in toytree_searches(tree_args['depth']):
+            if search_name == 'dfs_maximizing' and num_leaves > DFS_MAX_LEAVES:
+                continue
+            seconds = INF
+            for i in range(repeat):
+                game = toytree_game(tree)
+                start_time = time.perf_counter()
+                result = search(game)
+                seconds = min(seconds, time.perf_counter() - start_time)
+            if isinstance(result, AnytimeValue):
+                score, evaluations = result.get_value()[1], result.total_evaluations
+            else:
+                score, evaluations = result[1], result[2]
+            rows.append({'tree': tree_name, 'search': search_name, 'leaves': num_leaves,
+                         'score': score, 'evaluations': evaluations, 'seconds': seconds})
+    return rows
+
+def toytree_leaves(tree):
+    if tree.is_leaf():
+        return [tree]
+    return [leaf for child in tree.children for leaf in toytree_leaves(child)]
+
+def save_toytree_baseline(path, rows=None):
+    "Saves benchmark rows (by default, a new run) as a JSON baseline file."
+    with open(path, 'w') as baseline_file:
+        json.dump(rows or run_toytree_benchmarks(), baseline_file, indent=1)
+
+def benchmark_toytrees(baseline_path=None, time_tolerance=None):
+    """Prints the score, evaluations and time of each search on each
+    synthetic tree. If baseline_path names a file saved by
+    save_toytree_baseline, also flags each regression: a different score or
+    evaluation count. Times depend on the machine the baseline was saved
+    on, so they are only checked if time_tolerance is given: then a search
+    more than time_tolerance times slower than in the baseline (0.5 for
+    50% slower) is also a regression. Returns the number of regressions."""
+    rows = run_toytree_benchmarks()
+    baseline = {}
+    if baseline_path is not None and os.path.exists(baseline_path):
+        with open(baseline_path) as baseline_file:
+            baseline = dict(((row['tree'], row['search']), row) for row in json.load(baseline_file))
+    print("Searches on synthetic ToyTrees:")
+    print("  %-22s %-26s %7s %6s %12s %10s" % ("tree", "search", "leaves", "score", "evaluations", "ms"))
+    regressions = 0
+    for row in rows:
+        notes = []
+        old = baseline.get((row['tree'], row['search']))
+        if old is not None:
+            if (old['score'], old['evaluations']) != (row['score'], row['evaluations']):
+                notes.append("REGRESSION: was score %s, %s evaluations" % (old['score'], old['evaluations']))
+            if time_tolerance is not None and row['seconds'] > old['seconds'] * (1 + time_tolerance):
+                notes.append("REGRESSION: was %.2f ms" % (1000 * old['seconds']))
+        regressions += len(notes)
+        print("  %-22s %-26s %7d %6s %12d %10.2f   %s"
+              % (row['tree'], row['search'], row['leaves'], row['score'], row['evaluations'],
+                 1000 * row['seconds'], "; ".join(notes)))
+    print()
+    return regressions
+
+
+if __name__ == '__main__':
+    benchmark_parallel()
+    benchmark_pvs()
+    benchmark_toytrees(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'toytree_baseline.json'))
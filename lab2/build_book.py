@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+
+# MIT 6.034 Lab 2: Games
+
+# Builds the Connect Four PositionBook used by play_game.py: an opening book
+# of the positions in the first few moves, each searched deeply with
+# heuristic_connectfour, and an endgame table of positions with few empty
+# cells, solved exactly. Run this file from your lab2 directory:
+#     python3 build_book.py
+# To search with the book:
+#     book = PositionBook(BOOK_FILE)
+#     minimax_search_alphabeta(state, -INF, INF, heuristic_connectfour, 6, book=book)
+
+import os
+import random
+import time
+
+from game_api import *
+from lab2 import *
+
+BOOK_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'connectfour_book.dat')
+
+
+def make_state(board):
+    return AbstractGameState(board, is_game_over_connectfour, next_boards_connectfour,
+                             endgame_score_connectfour_faster)
+
+def move_column(board, next_board):
+    "Returns the column of the move from board to next_board."
+    for col in range(board.num_cols):
+        if next_board.get_column_height(col) != board.get_column_height(col):
+            return col
+    return None
+
+
+#### Opening book ##############################################################
+
+def opening_positions(max_moves):
+    """Returns the distinct boards (as BitboardConnectFourBoards) reachable
+    from the empty board in at most max_moves moves, leaving out boards
+    where the game is over."""
+    boards = {}
+    layer = [BitboardConnectFourBoard()]
+    for move in range(max_moves + 1):
+        next_layer = []
+        for board in layer:
+            key = board.position_key()
+            if key in boards or is_game_over_connectfour(board):
+                continue
+            boards[key] = board
+            next_layer.extend(next_boards_connectfour(board))
+        layer = next_layer
+    return list(boards.values())
+
+def build_opening_book(max_moves=2, depth_limit=6, heuristic_fn=heuristic_connectfour):
+    """Returns PositionBook records for every position in the first
+    max_moves moves, searched to depth_limit, once for each player to move.
+    The searches use no move ordering, so that of several equally good
+    moves, the book has the one minimax_search_alphabeta would choose."""
+    records = {}
+    for board in opening_positions(max_moves):
+        scores, best_moves = [], []
+        for maximize in [True, False]:
+            path, score, evals = minimax_search_alphabeta(
+                make_state(board), -INF, INF, heuristic_fn, depth_limit, maximize)
+            scores.append(score)
+            best_moves.append(move_column(board, path[1].get_snapshot()))
+        records[board.position_key()] = tuple(scores + best_moves) + (depth_limit,)
+    return records
+
+
+#### Endgame table #############################################################
+
+def solve_endgame(board, maximize, records):
+    """Returns the exact minimax score of board (with endgame_score_connectfour_faster),
+    searching every move to the end of the game, and adds an exact record for
+    it and every position below it to records. records maps position keys to
+    [score if maximizer to move, score if minimizer to move, best column for
+    the maximizer, best column for the minimizer]."""
+    key = board.position_key()
+    record = records.setdefault(key, [None, None, None, None])
+    side = 0 if maximize else 1
+    if record[side] is not None:
+        return record[side]
+
+    if is_game_over_connectfour(board):
+        record[side] = endgame_score_connectfour_faster(board, maximize)
+        return record[side]
+
+    best_score, best_move = None, None
+    for next_board in next_boards_connectfour(board):
+        score = solve_endgame(next_board, not maximize, records)
+        if best_score is None or (score > best_score if maximize else score < best_score):
+            best_score, best_move = score, move_column(board, next_board)
+    record[side] = best_score
+    record[2 + side] = best_move
+    return best_score
+
+def random_endgame_boards(num_boards, max_empty_cells, seed=0):
+    """Returns num_boards boards from random games, each stopped when
+    max_empty_cells cells are left, and where the game is not yet over."""
+    rng = random.Random(seed)
+    boards = []
+    while len(boards) < num_boards:
+        board = BitboardConnectFourBoard()
+        while board.count_pieces() < board.num_rows * board.num_cols - max_empty_cells:
+            board = board.add_piece(rng.choice([col for col in range(board.num_cols)
+                                                if not board.is_column_full(col)]))
+            if is_game_over_connectfour(board):
+                break
+        else:
+            boards.append(board)
+    return boards
+
+def build_endgame_table(boards):
+    """Returns PositionBook records, with exact scores, for the given boards
+    and every position reachable from them."""
+    records = {}
+    for board in boards:
+        for maximize in [True, False]:
+            solve_endgame(board, maximize, records)
+    return {key: tuple(record) + (PositionBook.SOLVED,)
+            for key, record in records.items()
+            # positions reached only with one player to move are left out
+            if record[0] is not None and record[1] is not None}
+
+
+def build_book(path=BOOK_FILE, max_moves=2, depth_limit=6, num_endgames=50, max_empty_cells=10):
+    """Writes the opening book and endgame table to path, and returns the
+    PositionBook."""
+    start_time = time.perf_counter()
+    records = build_opening_book(max_moves, depth_limit)
+    print("opening book: %d positions (%.1fs)" % (len(records), time.perf_counter() - start_time))
+    start_time = time.perf_counter()
+    endgames = build_endgame_table(random_endgame_boards(num_endgames, max_empty_cells))
+    print("endgame table: %d positions (%.1fs)" % (len(endgames), time.perf_counter() - start_time))
+    records.update(endgames)
+    PositionBook.write(path, records, heuristic_connectfour.__name__,
+                       endgame_score_connectfour_faster.__name__)
+    return PositionBook(path)
+
+
+if __name__ == '__main__':
+    print(build_book())
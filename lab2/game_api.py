@@ -1,12 +1,36 @@
 # MIT 6.034 Lab 2: Games
 
+from collections import OrderedDict
 from copy import deepcopy
-from functools import reduce
+from functools import reduce, wraps
+import mmap
+import struct
+import threading
+import time
 
 def always_zero(state, maximize=True):
     return 0
 
 class AbstractGameState :
+    """A game position. Its children, whether the game is over, and its
+    endgame scores are each computed the first time they are asked for and
+    then kept, so a search that reaches a state more than once (for example,
+    checking is_game_over() and then calling generate_next_states()) only
+    expands it once. The cache holds the whole tree searched from a state,
+    so every search in lab2.py empties it with forget_next_states() before
+    returning (see top_level_search). Copies and pickles of a state leave
+    this cache out.
+
+    generate_next_states_fn may return a list or an iterator. With an
+    iterator, children are only made as they are needed: is_game_over() makes
+    at most one, and only if is_game_over_fn says the game is not over."""
+
+    # cached by generate_next_states, is_game_over and get_endgame_score:
+    # next_states holds the children made so far, and more_next_states the
+    # iterator for the rest (None once it is used up)
+    next_states = None
+    more_next_states = None
+    game_over = None
 
     def __init__(self,
                  snapshot,
@@ -19,6 +43,7 @@ class AbstractGameState :
         self.is_game_over_fn = is_game_over_fn
         self.generate_next_states_fn = generate_next_states_fn
         self.endgame_score_fn = endgame_score_fn
+        self.endgame_scores = {}
 
     def __str__(self) :
         return "\n<AbstractGameState representing:\n" + self.snapshot.__str__() + "\n>"
@@ -35,32 +60,128 @@ class AbstractGameState :
         return self.snapshot
 
     def is_game_over(self) :
-        return len(self.generate_next_states()) == 0 or self.is_game_over_fn(self.snapshot)
+        if self.game_over is None :
+            self.game_over = self.is_game_over_fn(self.snapshot) or not self.has_next_state()
+        return self.game_over
+
+    def has_next_state(self) :
+        "Returns True if there is at least one move, making at most one child."
+        if self.next_states is None :
+            self.next_states = []
+            self.more_next_states = iter(self.generate_next_states_fn(self.snapshot))
+        if not self.next_states and self.more_next_states is not None :
+            for snapshot in self.more_next_states :
+                self.next_states.append(self.wrap(snapshot))
+                break
+            else :
+                self.more_next_states = None
+        return len(self.next_states) > 0
 
     def generate_next_states(self) :
-        return list(map(self.wrap, self.generate_next_states_fn(self.snapshot)))
+        self.has_next_state()
+        if self.more_next_states is not None :
+            self.next_states.extend(map(self.wrap, self.more_next_states))
+            self.more_next_states = None
+        return self.next_states[:]
 
     def describe_previous_move(self) :
         return self.snapshot.describe_previous_move()
 
+    def get_hash_key(self) :
+        """Returns a key identifying this state's position, for use with a
+        TranspositionTable. Snapshots that define hash_key() (such as
+        ConnectFourBoard) are keyed by position, so the same position reached
+        by different move orders has the same key; other snapshots are keyed
+        by identity."""
+        if hasattr(self.snapshot, 'hash_key') :
+            return self.snapshot.hash_key()
+        return id(self.snapshot)
+
     def get_endgame_score(self, is_current_player_maximizer=True) :
         # only for leaf nodes
         if not self.is_game_over() :
             raise ValueError("Only endgame states have endgame score defined.")
-        return self.endgame_score_fn(self.snapshot, is_current_player_maximizer)
+        if is_current_player_maximizer not in self.endgame_scores :
+            self.endgame_scores[is_current_player_maximizer] = self.endgame_score_fn(
+                self.snapshot, is_current_player_maximizer)
+        return self.endgame_scores[is_current_player_maximizer]
+
+    def forget_next_states(self) :
+        """Empties the cache of this state and of every state below it, so
+        that they can be freed or expanded again. States below it that are
+        still referenced elsewhere, such as those in a returned path, keep
+        their snapshots but lose their caches."""
+        states = [self]
+        while states :
+            state = states.pop()
+            if state.next_states :
+                states.extend(state.next_states)
+            state.next_states = None
+            state.more_next_states = None
+            state.game_over = None
+            state.endgame_scores = {}
 
     def restart(self) :
         self.snapshot = self.starting_state
+        self.forget_next_states()
         return self
 
     def copy(self):
         return deepcopy(self)
 
+    def __getstate__(self) :
+        state = self.__dict__.copy()
+        for name in ['next_states', 'more_next_states', 'game_over'] :
+            state.pop(name, None)
+        state['endgame_scores'] = {}
+        return state
+
+# whether a top_level_search is running, in this thread
+searching = threading.local()
+
+def top_level_search(search_fn) :
+    """Decorator for a search whose first argument is an AbstractGameState.
+    When the outermost decorated call returns (or raises), the state's cache
+    is emptied with forget_next_states(), so the searched tree can be freed;
+    the states in the returned path keep their snapshots. Decorated calls
+    made while it runs in the same thread, such as a search's recursive
+    calls or the levels of progressive_deepening, share the cache and leave
+    it alone."""
+    @wraps(search_fn)
+    def search(state, *args, **kwargs) :
+        if getattr(searching, 'active', False) :
+            return search_fn(state, *args, **kwargs)
+        searching.active = True
+        try :
+            return search_fn(state, *args, **kwargs)
+        finally :
+            searching.active = False
+            state.forget_next_states()
+    return search
+
+
+def four_cell_windows(num_cols, num_rows) :
+    """Returns every line of four cells on a board of the given size, as lists
+    of (col, row): the places where a chain of four could be made."""
+    windows = []
+    for dx, dy in [(1, 0), (0, 1), (1, 1), (1, -1)] :
+        for col in range(num_cols) :
+            for row in range(num_rows) :
+                cells = [(col + i*dx, row + i*dy) for i in range(4)]
+                if all(0 <= c < num_cols and 0 <= r < num_rows for c, r in cells) :
+                    windows.append(cells)
+    return windows
 
 class ConnectFourBoard :
     num_rows = 6  # board height
     num_cols = 7  # board width
 
+    # The 69 four-cell windows (24 horizontal, 21 vertical, 24 diagonal), and
+    # what a window is worth to a player, by the number of that player's
+    # pieces in it, while the other player has no pieces there.
+    windows = four_cell_windows(num_cols, num_rows)
+    window_weights = [0, 1, 10, 100, 1000]
+
     def __init__(self, board_array=None, players=['Player One','Player Two'],
                  whose_turn=None) :
         """A board array is a list of rows. The pieces are either 0 (no player), 1, or 2."""
@@ -74,6 +195,8 @@ class ConnectFourBoard :
         self.whose_turn = whose_turn if whose_turn in players else players[0]
         if self.whose_turn != self.players[0] :
             self.players.reverse()
+        # moves made with make_move, most recent last, for unmake_move
+        self.move_stack = []
 
     def get_current_player_name(self) :
         """Return the current player. By default, 'Player One' or 'Player Two'."""
@@ -141,6 +264,43 @@ class ConnectFourBoard :
         new_board.set_current_player_name(new_board.players[1])
         return new_board
 
+    def make_move(self, col_number, player=None) :
+        """Adds a piece belonging to the player to the given column, like
+        add_piece, but changes this board instead of copying it. The move is
+        pushed onto the move stack, to be taken back with unmake_move.
+        Returns this board."""
+        if self.is_column_full(col_number) :
+            raise IndexError("Can't add piece to full column "+str(col_number)+".")
+
+        player = player or self.whose_turn
+        height = 1 + self.get_column_height(col_number)
+        self.board_array[-height][col_number] = self.__piece_type__(player)
+        self.__push_move__(col_number, player)
+        return self
+
+    def unmake_move(self) :
+        """Takes back the last move made with make_move, restoring the board
+        (including whose turn it is) to how it was before. Returns the
+        column of that move."""
+        col_number = self.__pop_move__()
+        height = self.get_column_height(col_number)
+        self.board_array[-height][col_number] = None
+        return col_number
+
+    def __push_move__(self, col_number, player) :
+        self.move_stack.append((col_number, self.prev_move_string, self.whose_turn, self.players))
+        self.prev_move_string = ("Put " + str(player)
+                                 + "'s piece in col " + str(col_number))
+        # adding a piece causes the current player to swap
+        self.whose_turn = self.players[1]
+        self.players = [self.players[1], self.players[0]]
+
+    def __pop_move__(self) :
+        if not self.move_stack :
+            raise IndexError("No move to unmake.")
+        col_number, self.prev_move_string, self.whose_turn, self.players = self.move_stack.pop()
+        return col_number
+
     def describe_previous_move(self) :
         "Returns a string describing the most recent move leading to current state"
         return self.prev_move_string
@@ -148,6 +308,49 @@ class ConnectFourBoard :
     def copy(self) :
         return deepcopy(self)
 
+    def hash_key(self) :
+        """Returns a hashable key that is the same for two boards exactly when
+        they have the same pieces in the same places and the same players,
+        with the same player to move."""
+        return (tuple(map(tuple, self.board_array)), tuple(self.players))
+
+    def position_key(self) :
+        """Returns an integer that is the same for two boards exactly when
+        they have the same pieces in the same places, for use with a
+        PositionBook. Unlike hash_key, it ignores the players' names. It is
+        the bits of the first player's pieces (laid out as in
+        BitboardConnectFourBoard), plus the bits of all pieces, plus one bit
+        at the bottom of each column."""
+        first_pieces, all_pieces, bottom = 0, 0, 0
+        for col in range(self.num_cols) :
+            bit = col * (self.num_rows + 1)
+            bottom |= 1 << bit
+            for row in range(self.num_rows - 1, -1, -1) :
+                piece = self.board_array[row][col]
+                if not piece :
+                    break
+                all_pieces |= 1 << bit
+                if piece == 1 :
+                    first_pieces |= 1 << bit
+                bit += 1
+        return first_pieces + all_pieces + bottom
+
+    def has_winning_chain(self) :
+        "Return True if either player has a chain of four or more pieces."
+        return any(len(chain) >= 4 for chain in self.get_all_chains())
+
+    def get_window_score(self, current_player=True) :
+        """Return the total of window_weights over the windows that hold pieces
+        of the current player (or, if current_player is False, of the other
+        player) and none of their opponent's."""
+        piece_type = self.__piece_type__(self.get_current_player_name() if current_player else self.get_other_player_name())
+        score = 0
+        for window in self.windows :
+            pieces = [self.get_piece(col, row) for (col, row) in window]
+            if all(piece in (None, piece_type) for piece in pieces) :
+                score += self.window_weights[pieces.count(piece_type)]
+        return score
+
     def __get_line__(self, col, row, dx, dy) :
         """Return the list of pieces you get starting at (col, row) and
         incrementing by dx,dy until you run out of board."""
@@ -320,6 +523,201 @@ class ConnectFourBoard :
             ret += "\n"
         return ret
 
+class BitboardConnectFourBoard(ConnectFourBoard) :
+    """A ConnectFourBoard that stores its pieces as bits of two integers, one
+    per piece type, plus the height of each column. Column c uses bits
+    7*c .. 7*c+5, from the bottom row up; the seventh bit of each column is
+    always empty, so that shifting never carries pieces between columns.
+    Adding a piece, counting pieces and looking for four in a row take a
+    few integer operations each, instead of scanning the board.
+
+    The public API is the same as ConnectFourBoard's (board_array is
+    computed on demand, and should not be modified), so the two can be used
+    interchangeably. To convert a board, use from_board."""
+
+    BITS_PER_COL = ConnectFourBoard.num_rows + 1
+    # one shift per direction: vertical, horizontal, and the two diagonals
+    DIRECTIONS = [1, BITS_PER_COL, BITS_PER_COL - 1, BITS_PER_COL + 1]
+    # one bit at the bottom of each column
+    BOTTOM = int("0000001" * ConnectFourBoard.num_cols, 2)
+    # for each bit, the indexes of the windows containing that cell
+    cell_windows = [[index for index, window in enumerate(ConnectFourBoard.windows)
+                     if (bit // (ConnectFourBoard.num_rows + 1),
+                         ConnectFourBoard.num_rows - 1 - bit % (ConnectFourBoard.num_rows + 1)) in window]
+                    for bit in range(BITS_PER_COL * ConnectFourBoard.num_cols)]
+
+    def __init__(self, board_array=None, players=['Player One','Player Two'],
+                 whose_turn=None) :
+        if (not isinstance(players, (list, tuple))) or len(players) != 2:
+            raise TypeError("Expected list of two players, got "+str(players))
+        self.pieces = [0, 0, 0]  # bits for piece types 1 and 2 (index 0 unused)
+        self.heights = [0] * ConnectFourBoard.num_cols
+        # per piece type, the number of its pieces in each window, and the
+        # resulting window score (see get_window_score)
+        self.window_counts = [None, [0] * len(self.windows), [0] * len(self.windows)]
+        self.window_scores = [0, 0, 0]
+        for row_index, row in enumerate(board_array or []) :
+            height = ConnectFourBoard.num_rows - 1 - row_index
+            for col, piece in enumerate(row) :
+                if piece :
+                    self.pieces[piece] |= 1 << (col * self.BITS_PER_COL + height)
+                    self.heights[col] = max(self.heights[col], height + 1)
+                    self.__add_to_windows__(piece, col * self.BITS_PER_COL + height)
+        self.prev_move_string = 'none'
+        self.players = players[:]
+        self.whose_turn = whose_turn if whose_turn in players else players[0]
+        if self.whose_turn != self.players[0] :
+            self.players.reverse()
+        self.move_stack = []
+
+    @classmethod
+    def from_board(cls, board) :
+        "Return a BitboardConnectFourBoard equal to the given ConnectFourBoard."
+        new_board = cls(board.board_array, board.players, board.whose_turn)
+        new_board.prev_move_string = board.prev_move_string
+        return new_board
+
+    @property
+    def board_array(self) :
+        return [[self.get_piece(col, row) for col in range(self.num_cols)]
+                for row in range(self.num_rows)]
+
+    def get_piece(self, col, row) :
+        # negative indexes count from the end, as for board_array
+        if col < 0 :
+            col += self.num_cols
+        if row < 0 :
+            row += self.num_rows
+        bit = 1 << (col * self.BITS_PER_COL + self.num_rows - 1 - row)
+        if self.pieces[1] & bit :
+            return 1
+        if self.pieces[2] & bit :
+            return 2
+        return None
+
+    def count_pieces(self, current_player=None) :
+        """Return the total number of pieces on the board. If player is
+        supplied, returns only the number of those belonging to that player."""
+        if current_player not in [True, False, None]:
+            raise TypeError("Expected boolean value for current_player, got "
+                            + str(current_player))
+        if current_player is None :
+            return sum(self.heights)
+        piece_type = self.__piece_type__(self.get_current_player_name() if current_player else self.get_other_player_name())
+        return bin(self.pieces[piece_type]).count('1')
+
+    def get_column_height(self, col_number) :
+        """Return the number of pieces in the column; e.g., 0 if the column is empty."""
+        return self.heights[col_number]
+
+    def add_piece(self, col_number, player=None) :
+        """Adds a piece belonging to the player to the given column.
+        Returns new board without modifying original."""
+        if self.heights[col_number] == self.num_rows :
+            raise IndexError("Can't add piece to full column "+str(col_number)+".")
+
+        player = player or self.whose_turn
+        piece_type = self.__piece_type__(player)
+        bit_index = col_number * self.BITS_PER_COL + self.heights[col_number]
+        new_board = self.copy()
+        new_board.pieces[piece_type] |= 1 << bit_index
+        new_board.heights[col_number] += 1
+        new_board.__add_to_windows__(piece_type, bit_index)
+        new_board.prev_move_string = ("Put " + str(player)
+                                      + "'s piece in col " + str(col_number))
+        # adding a piece causes the current player to swap
+        new_board.whose_turn = self.players[1]
+        new_board.players = [self.players[1], self.players[0]]
+        return new_board
+
+    def copy(self) :
+        new_board = object.__new__(self.__class__)
+        new_board.pieces = self.pieces[:]
+        new_board.heights = self.heights[:]
+        new_board.window_counts = [None, self.window_counts[1][:], self.window_counts[2][:]]
+        new_board.window_scores = self.window_scores[:]
+        new_board.prev_move_string = self.prev_move_string
+        new_board.players = self.players[:]
+        new_board.whose_turn = self.whose_turn
+        new_board.move_stack = self.move_stack[:]
+        return new_board
+
+    def make_move(self, col_number, player=None) :
+        if self.heights[col_number] == self.num_rows :
+            raise IndexError("Can't add piece to full column "+str(col_number)+".")
+
+        player = player or self.whose_turn
+        piece_type = self.__piece_type__(player)
+        bit_index = col_number * self.BITS_PER_COL + self.heights[col_number]
+        # each move pushes two entries: this one, then __push_move__'s. The
+        # window scores are saved rather than recomputed on unmake_move.
+        self.move_stack.append((piece_type, bit_index, self.window_scores[:]))
+        self.pieces[piece_type] |= 1 << bit_index
+        self.heights[col_number] += 1
+        self.__add_to_windows__(piece_type, bit_index)
+        self.__push_move__(col_number, player)
+        return self
+
+    def unmake_move(self) :
+        col_number = self.__pop_move__()
+        piece_type, bit_index, self.window_scores = self.move_stack.pop()
+        self.pieces[piece_type] &= ~(1 << bit_index)
+        self.heights[col_number] -= 1
+        own_counts = self.window_counts[piece_type]
+        for window_index in self.cell_windows[bit_index] :
+            own_counts[window_index] -= 1
+        return col_number
+
+    def hash_key(self) :
+        return (self.pieces[1], self.pieces[2], tuple(self.players))
+
+    def position_key(self) :
+        return self.pieces[1] + (self.pieces[1] | self.pieces[2]) + self.BOTTOM
+
+    def has_winning_chain(self) :
+        "Return True if either player has a chain of four or more pieces."
+        for bits in self.pieces[1:] :
+            for shift in self.DIRECTIONS :
+                pairs = bits & (bits >> shift)
+                if pairs & (pairs >> (2 * shift)) :
+                    return True
+        return False
+
+    def get_window_score(self, current_player=True) :
+        """Return the total of window_weights over the windows that hold pieces
+        of the current player (or, if current_player is False, of the other
+        player) and none of their opponent's. This is kept up to date as
+        pieces are added, so it takes constant time."""
+        piece_type = self.__piece_type__(self.get_current_player_name() if current_player else self.get_other_player_name())
+        return self.window_scores[piece_type]
+
+    def __add_to_windows__(self, piece_type, bit_index) :
+        """Update the window counts and scores for a new piece of piece_type
+        at bit_index. Only the (at most 16) windows through that cell change."""
+        own_counts = self.window_counts[piece_type]
+        other_counts = self.window_counts[3 - piece_type]
+        weights = self.window_weights
+        for window_index in self.cell_windows[bit_index] :
+            own, other = own_counts[window_index], other_counts[window_index]
+            if other == 0 :
+                self.window_scores[piece_type] += weights[own + 1] - weights[own]
+            elif own == 0 :
+                # the window is now blocked for the other player
+                self.window_scores[3 - piece_type] -= weights[other]
+            own_counts[window_index] = own + 1
+
+    def __piece_type__(self, player=None) :
+        player = player or self.whose_turn
+        return [1,2][((player != self.whose_turn) + sum(self.heights)) % 2]
+
+    def __eq__(self, other):
+        if isinstance(other, BitboardConnectFourBoard) :
+            return (self.pieces == other.pieces
+                    and self.prev_move_string == other.prev_move_string
+                    and self.players == other.players
+                    and self.whose_turn == other.whose_turn)
+        return ConnectFourBoard.__eq__(self, other)
+
 class AnytimeValue :
     def __init__(self, val=None) :
         self.value = val
@@ -350,8 +748,309 @@ class AnytimeValue :
     def copy(self):
         return deepcopy(self)
 
+class SearchTimeout(Exception) :
+    "Raised by a Deadline to abort a search that has run out of time."
+    pass
+
+class Deadline :
+    """A wall-clock time limit for a search, time_limit_ms milliseconds from
+    when the Deadline is made. wrap(heuristic_fn) returns a heuristic that
+    raises SearchTimeout once the deadline has passed, so any search that
+    calls it can be stopped between two static evaluations without changing
+    the search itself."""
+
+    def __init__(self, time_limit_ms) :
+        self.time_limit_ms = time_limit_ms
+        self.end_time = time.monotonic() + time_limit_ms / 1000.0
+        self.evaluations = 0
+
+    def time_left_ms(self) :
+        return max(0.0, (self.end_time - time.monotonic()) * 1000.0)
+
+    def expired(self) :
+        return time.monotonic() >= self.end_time
+
+    def check(self) :
+        if self.expired() :
+            raise SearchTimeout("search ran past its %s ms deadline" % self.time_limit_ms)
+
+    def wrap(self, heuristic_fn, check=True) :
+        """Returns heuristic_fn, checking the deadline before each call (if
+        check) and counting the calls in self.evaluations. The result keeps
+        heuristic_fn's name, so that a PositionBook recognizes it."""
+        @wraps(heuristic_fn)
+        def timed_heuristic_fn(snapshot, is_current_player_maximizer) :
+            if check :
+                self.check()
+            self.evaluations += 1
+            return heuristic_fn(snapshot, is_current_player_maximizer)
+        return timed_heuristic_fn
+
+class TTEntry :
+    """One transposition table entry: the result of searching a position to
+    a given depth. bound says whether score is the exact minimax value
+    (EXACT), or only a lower (LOWER_BOUND) or upper (UPPER_BOUND) bound on it
+    because the search was cut off. best_move is the index of the best child
+    in generate_next_states() order (None at a leaf), path is the best path
+    found from the position, and evaluations the number of static
+    evaluations the search took."""
+    __slots__ = ('key', 'depth', 'score', 'bound', 'best_move', 'path', 'evaluations')
+
+    def __init__(self, key, depth, score, bound, best_move, path, evaluations) :
+        self.key = key
+        self.depth = depth
+        self.score = score
+        self.bound = bound
+        self.best_move = best_move
+        self.path = path
+        self.evaluations = evaluations
+
+class TranspositionTable :
+    """A bounded cache of search results, keyed by position (see
+    AbstractGameState.get_hash_key). A table should only be shared between
+    searches that use the same heuristic function.
+
+    replacement chooses what happens when the table is full:
+        'depth': the table has max_entries slots, chosen by hash; a new entry
+                 replaces the one in its slot only if it was searched at
+                 least as deeply (or is for the same position).
+        'lru':   the least recently used entry is evicted.
+
+    The table also counts its lookups. evaluations_saved is the total number
+    of static evaluations that the entries returned by lookups had cost."""
+    EXACT = 'exact'
+    LOWER_BOUND = 'lower'
+    UPPER_BOUND = 'upper'
+
+    def __init__(self, max_entries=100000, replacement='depth') :
+        if replacement not in ['depth', 'lru'] :
+            raise ValueError("Expected replacement 'depth' or 'lru', got " + str(replacement))
+        self.max_entries = max_entries
+        self.replacement = replacement
+        self.slots = [None] * max_entries if replacement == 'depth' else None
+        self.entries = OrderedDict() if replacement == 'lru' else None
+        self.hits = 0
+        self.misses = 0
+        self.evaluations_saved = 0
+
+    def get(self, key) :
+        """Returns the entry for key, or None. Does not count as a lookup."""
+        if self.replacement == 'depth' :
+            entry = self.slots[hash(key) % self.max_entries]
+            return entry if entry is not None and entry.key == key else None
+        entry = self.entries.get(key)
+        if entry is not None :
+            self.entries.move_to_end(key)
+        return entry
+
+    def lookup(self, key, depth, alpha, beta) :
+        """Returns an entry for key that was searched to at least depth and
+        whose score can be used as-is with the window (alpha, beta): an exact
+        score, a lower bound >= beta or an upper bound <= alpha. Otherwise
+        returns None."""
+        entry = self.get(key)
+        if (entry is not None and entry.depth >= depth
+            and (entry.bound == self.EXACT
+                 or (entry.bound == self.LOWER_BOUND and entry.score >= beta)
+                 or (entry.bound == self.UPPER_BOUND and entry.score <= alpha))) :
+            self.hits += 1
+            self.evaluations_saved += entry.evaluations
+            return entry
+        self.misses += 1
+        return None
+
+    def store(self, key, depth, score, bound, best_move=None, path=None, evaluations=0) :
+        entry = TTEntry(key, depth, score, bound, best_move, path, evaluations)
+        if self.replacement == 'depth' :
+            index = hash(key) % self.max_entries
+            old = self.slots[index]
+            if old is None or old.key == key or depth >= old.depth :
+                self.slots[index] = entry
+            return
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_entries :
+            self.entries.popitem(last=False)
+
+    def __len__(self) :
+        if self.replacement == 'depth' :
+            return sum(1 for entry in self.slots if entry is not None)
+        return len(self.entries)
+
+    def __str__(self) :
+        return ("<TranspositionTable (%s) with %i entries: %i hits, %i misses, %i evaluations saved>"
+                % (self.replacement, len(self), self.hits, self.misses, self.evaluations_saved))
+    __repr__ = __str__
+
+class BookEntry :
+    """One PositionBook entry for a position, from the point of view of one
+    player. score is the minimax score if that player is to move, best_move
+    the column to play (None if the game is over), and depth how far ahead
+    the score was searched (PositionBook.SOLVED if the score is exact)."""
+    __slots__ = ('score', 'best_move', 'depth')
+
+    def __init__(self, score, best_move, depth) :
+        self.score = score
+        self.best_move = best_move
+        self.depth = depth
+
+    def __repr__(self) :
+        return "BookEntry(score=%r, best_move=%r, depth=%r)" % (self.score, self.best_move, self.depth)
+
+class PositionBook :
+    """A read-only table of precomputed Connect Four positions, such as an
+    opening book or an endgame table, kept in a file and memory-mapped, so
+    that opening a large book is instant and only the pages that are looked
+    at are read from disk.
+
+    The file is a header (MAGIC, the number of records, and the names of the
+    heuristic and endgame score functions the scores were found with)
+    followed by fixed-size records sorted by position key (see
+    ConnectFourBoard.position_key), found by binary search. Each record has
+    the scores and best columns (-1 for none) when the maximizer and when
+    the minimizer is to move, and the search depth (SOLVED for
+    exact scores). Use PositionBook.write to make a book file."""
+    MAGIC = b'C4BOOK02'
+    HEADER = struct.Struct('<8sQ64s64s')
+    RECORD = struct.Struct('<QhhbbB')
+    SOLVED = 255
+
+    def __init__(self, path) :
+        with open(path, 'rb') as book_file :
+            self.data = mmap.mmap(book_file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.data) < self.HEADER.size or self.data[:len(self.MAGIC)] != self.MAGIC :
+            self.data.close()
+            raise ValueError(str(path) + " is not a PositionBook file")
+        magic, self.num_records, heuristic_name, endgame_score_name = self.HEADER.unpack_from(self.data, 0)
+        self.heuristic_name = heuristic_name.rstrip(b'\0').decode()
+        self.endgame_score_name = endgame_score_name.rstrip(b'\0').decode()
+
+    @classmethod
+    def write(cls, path, records, heuristic_name, endgame_score_name) :
+        """Writes a book file. records is a dict mapping position keys to
+        tuples (score if the maximizer is to move, score if the minimizer is to
+        move, best column for the maximizer, best column for the minimizer,
+        depth), where a best column may be None. heuristic_name and
+        endgame_score_name are the __name__s of the functions the scores were
+        found with."""
+        with open(path, 'wb') as book_file :
+            book_file.write(cls.HEADER.pack(cls.MAGIC, len(records), heuristic_name.encode(),
+                                            endgame_score_name.encode()))
+            for key in sorted(records) :
+                max_score, min_score, max_move, min_move, depth = records[key]
+                book_file.write(cls.RECORD.pack(key, max_score, min_score,
+                                                -1 if max_move is None else max_move,
+                                                -1 if min_move is None else min_move,
+                                                min(depth, cls.SOLVED)))
+
+    def find(self, key) :
+        """Returns the record (key, max score, min score, max best column,
+        min best column, depth) for the position key, or None."""
+        low, high = 0, self.num_records
+        while low < high :
+            middle = (low + high) // 2
+            record = self.RECORD.unpack_from(self.data, self.HEADER.size + middle * self.RECORD.size)
+            if record[0] < key :
+                low = middle + 1
+            elif record[0] > key :
+                high = middle
+            else :
+                return record
+        return None
+
+    def lookup(self, board, maximize=True, heuristic_fn=None, endgame_score_fn=None) :
+        """Returns the BookEntry for the board, with the maximizer to move if
+        maximize is True and the minimizer otherwise, or None if the board is
+        not in the book. If endgame_score_fn is given and is not the function
+        the book was built with, returns None; likewise for heuristic_fn,
+        unless the entry is solved, since an exact score does not depend on
+        the heuristic."""
+        if endgame_score_fn is not None and endgame_score_fn.__name__ != self.endgame_score_name :
+            return None
+        record = self.find(board.position_key())
+        if record is None :
+            return None
+        key, max_score, min_score, max_move, min_move, depth = record
+        if (heuristic_fn is not None and depth != self.SOLVED
+                and heuristic_fn.__name__ != self.heuristic_name) :
+            return None
+        best_move = max_move if maximize else min_move
+        return BookEntry(max_score if maximize else min_score,
+                         None if best_move < 0 else best_move,
+                         float('inf') if depth == self.SOLVED else depth)
+
+    def close(self) :
+        self.data.close()
+
+    def __len__(self) :
+        return self.num_records
+
+    def __str__(self) :
+        return "<PositionBook with %i positions, from %s and %s>" % (
+            self.num_records, self.heuristic_name, self.endgame_score_name)
+    __repr__ = __str__
+
+class MoveOrdering :
+    """Chooses the order in which alpha-beta search tries the children of a
+    state, so that moves likely to cause a cutoff are searched first. Moves
+    are compared by, in order:
+     1. the principal variation: the move on the best path of a previous
+        search from the same position (see set_principal_variation),
+     2. killer moves: the last num_killers moves that caused a cutoff at the
+        same ply (distance from the root of the search),
+     3. the history table: how often (weighted by remaining depth squared) a
+        move has caused a cutoff anywhere in the tree, if use_history,
+     4. static_key_fn(state, child), if given (lower comes first),
+    and otherwise keep their generate_next_states() order. A move is
+    identified by its child's describe_previous_move() string.
+
+    Use one MoveOrdering per game: its killers and history carry over from
+    one search to the next. Killers are kept by ply, not by remaining
+    depth, so that under progressive deepening each level's killers are
+    tried at the same plies in the next level."""
+
+    def __init__(self, static_key_fn=None, num_killers=2, use_history=True) :
+        self.static_key_fn = static_key_fn
+        self.num_killers = num_killers
+        self.use_history = use_history
+        self.killers = {}  # ply -> list of moves, most recent first
+        self.history = {}  # move -> score
+        self.principal_variation = {}  # position key -> best move
+
+    def order(self, state, children, depth, ply) :
+        """Returns children, sorted into the order they should be searched
+        from state, which is ply plies below the root, with depth plies left
+        to search."""
+        pv_move = self.principal_variation.get(state.get_hash_key())
+        killers = self.killers.get(ply, [])
+        def sort_key(child) :
+            move = child.describe_previous_move()
+            return (move != pv_move,
+                    killers.index(move) if move in killers else len(killers),
+                    -self.history.get(move, 0) if self.use_history else 0,
+                    self.static_key_fn(state, child) if self.static_key_fn else 0)
+        return sorted(children, key=sort_key)
+
+    def record_cutoff(self, child, depth, ply) :
+        """Records that the move to child caused a cutoff ply plies below the
+        root, with depth plies left."""
+        move = child.describe_previous_move()
+        if self.num_killers :
+            killers = [move] + [m for m in self.killers.get(ply, []) if m != move]
+            self.killers[ply] = killers[:self.num_killers]
+        if self.use_history :
+            self.history[move] = self.history.get(move, 0) + depth * depth
+
+    def set_principal_variation(self, path) :
+        """Remembers the best move from each position on path (a list of
+        AbstractGameStates, as returned by a search), to be tried first."""
+        for state, child in zip(path, path[1:]) :
+            self.principal_variation[state.get_hash_key()] = child.describe_previous_move()
+
 def is_class_instance(obj, class_name):
-    return hasattr(obj, '__class__') and obj.__class__.__name__ == class_name
+    # compares by name, and accepts subclasses (such as BitboardConnectFourBoard)
+    return (hasattr(obj, '__class__')
+            and any(cls.__name__ == class_name for cls in obj.__class__.__mro__))
 
 def is_AbstractGameState_instance(obj):
     return is_class_instance(obj, 'AbstractGameState')
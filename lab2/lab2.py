@@ -17,9 +17,8 @@ def is_game_over_connectfour(board):
     return is_winning_chain(board) or board.count_pieces() == 42
 
 def is_winning_chain(board):
-    for chain in board.get_all_chains():
-        if len(chain) >= 4:
-            return True
+    # BitboardConnectFourBoard checks this with a few bit operations
+    return board.has_winning_chain()
 
 def next_boards_connectfour(board):
     """Returns a list of ConnectFourBoard objects that could result from the
@@ -29,6 +28,16 @@ def next_boards_connectfour(board):
 
     return [board.add_piece(col) for col in range(7) if not board.is_column_full(col) ]
 
+def next_boards_connectfour_lazy(board):
+    """Like next_boards_connectfour, but yields the boards one at a time, so
+    that an AbstractGameState only makes the ones that are searched."""
+    if is_game_over_connectfour(board):
+        return
+
+    for col in range(7):
+        if not board.is_column_full(col):
+            yield board.add_piece(col)
+
 def endgame_score_connectfour(board, is_current_player_maximizer):
     """Given an endgame board, returns 1000 if the maximizer has won,
     # -1000 if the minimizer has won, or 0 in case of a tie."""
@@ -70,6 +79,17 @@ def get_heuristic_score(board, is_current_player_maximizer):
     
     return score
 
+def heuristic_connectfour_windows(board, is_current_player_maximizer):
+    """Given a non-endgame board, returns a heuristic score with
+    abs(score) < 1000, where higher numbers indicate that the board is better
+    for the maximizer. Scores each player by the four-cell windows they could
+    still complete (see ConnectFourBoard.get_window_score). This takes
+    constant time on a BitboardConnectFourBoard, which updates its window
+    counts as pieces are added."""
+    maximizer = board.get_window_score(is_current_player_maximizer)
+    minimizer = board.get_window_score(not is_current_player_maximizer)
+    return max(-999, min(999, maximizer - minimizer))
+
 # Now we can create AbstractGameState objects for Connect Four, using some of
 # the functions you implemented above.  You can use the following examples to
 # test your dfs and minimax implementations in Part 2.
@@ -97,6 +117,7 @@ state_UHOH = AbstractGameState(snapshot = BOARD_UHOH,
 
 # Note: Functions in Part 2 use the AbstractGameState API, not ConnectFourBoard.
 
+@top_level_search
 def dfs_maximizing(state) :
     """Performs depth-first search to find path with highest endgame score.
     Returns a tuple containing:
@@ -143,6 +164,7 @@ def get_paths(path):
 pretty_print_dfs_type(dfs_maximizing(GAME1))
 
 
+@top_level_search
 def minimax_endgame_search(state, maximize=True) :
     """Performs minimax search, searching all leaf nodes and statically
     evaluating all endgame scores.  Same return type as dfs_maximizing."""
@@ -175,6 +197,7 @@ def minimax_endgame_search(state, maximize=True) :
 # pretty_print_dfs_type(minimax_endgame_search(state_NEARLY_OVER))
 
 
+@top_level_search
 def minimax_search(state, heuristic_fn=always_zero, depth_limit=INF, maximize=True) :
     """Performs standard minimax search. Same return type as dfs_maximizing."""
     best_path = [state]
@@ -210,14 +233,50 @@ def minimax_search(state, heuristic_fn=always_zero, depth_limit=INF, maximize=Tr
 # pretty_print_dfs_type(minimax_search(state_UHOH, heuristic_fn=heuristic_connectfour, depth_limit=1))
 
 
+def book_path(state, column):
+    """Returns the path [state, next state] for playing a book move in the
+    given column, or [state] if column is None."""
+    if column is None:
+        return [state]
+    for child in state.generate_next_states():
+        if child.get_snapshot().get_column_height(column) != state.get_snapshot().get_column_height(column):
+            return [state, child]
+    raise ValueError("No move in column " + str(column))
+
+def book_result(state, book, heuristic_fn, depth_limit, maximize):
+    """Returns (path, score, evals) for state from the PositionBook, or None
+    if the book does not have it. The score and move are those that
+    searching state to depth_limit with minimax_search_alphabeta would give,
+    but the path is only [state, the book move], and evals is 0. A book
+    score can stand in for a search only if it was found with the same
+    heuristic_fn and endgame score function, and to exactly depth_limit, or
+    if it is solved (an exact score)."""
+    entry = book.lookup(state.get_snapshot(), maximize, heuristic_fn, state.endgame_score_fn)
+    if entry is None or entry.depth not in (depth_limit, INF):
+        return None
+    return (book_path(state, entry.best_move), entry.score, 0)
+
+@top_level_search
 def minimax_search_alphabeta(state, alpha=-INF, beta=INF, heuristic_fn=always_zero,
-                             depth_limit=INF, maximize=True) :
+                             depth_limit=INF, maximize=True, move_ordering=None, book=None,
+                             ply=0) :
     """"Performs minimax with alpha-beta pruning. Same return type 
-    as dfs_maximizing."""
+    as dfs_maximizing. If a MoveOrdering is given, children are searched in
+    the order it chooses, and it is told about every cutoff; ply is how far
+    state is below the root of the search, for its killer moves. If a
+    PositionBook is given and has state (see book_result), state is not
+    searched: whatever depth_limit is, the path is just state and the book
+    move, and the result costs no evaluations. Only state itself is looked
+    up; positions below it are always searched."""
     best_path = [state]
     leaf_score = 0
     num_static_evals = 0
     
+    if book is not None:
+        book_tup = book_result(state, book, heuristic_fn, depth_limit, maximize)
+        if book_tup is not None:
+            return book_tup
+
     if state.is_game_over():
         return (best_path, state.get_endgame_score(maximize), 1)
 
@@ -229,9 +288,13 @@ def minimax_search_alphabeta(state, alpha=-INF, beta=INF, heuristic_fn=always_ze
     all_tups = []
     best_tup = None
 
+    children = state.generate_next_states()
+    if move_ordering is not None:
+        children = move_ordering.order(state, children, depth_limit, ply)
+
     if maximize:    
-        for child in state.generate_next_states():
-            tup = minimax_search_alphabeta(child, best_alpha, beta, heuristic_fn, depth_limit - 1, not maximize)
+        for child in children:
+            tup = minimax_search_alphabeta(child, best_alpha, beta, heuristic_fn, depth_limit - 1, not maximize, move_ordering, ply=ply + 1)
             all_tups.append(tup)
             current_alpha = best_alpha
             best_alpha = max(best_alpha, tup[1])
@@ -239,13 +302,15 @@ def minimax_search_alphabeta(state, alpha=-INF, beta=INF, heuristic_fn=always_ze
             if best_alpha != current_alpha:
                 best_tup = tup
             if best_alpha >= beta:
+                if move_ordering is not None:
+                    move_ordering.record_cutoff(child, depth_limit, ply)
                 break
         
         best_tup = max(all_tups, key = lambda tup: tup[1])
     
     if not maximize:
-        for child in state.generate_next_states():
-            tup = minimax_search_alphabeta(child, alpha, best_beta, heuristic_fn, depth_limit - 1, not maximize)
+        for child in children:
+            tup = minimax_search_alphabeta(child, alpha, best_beta, heuristic_fn, depth_limit - 1, not maximize, move_ordering, ply=ply + 1)
             all_tups.append(tup)
             current_beta = best_beta
             best_beta = min(best_beta, tup[1])
@@ -253,6 +318,8 @@ def minimax_search_alphabeta(state, alpha=-INF, beta=INF, heuristic_fn=always_ze
             if best_beta != current_beta:
                 best_tup = tup
             if best_beta <= alpha:
+                if move_ordering is not None:
+                    move_ordering.record_cutoff(child, depth_limit, ply)
                 break
             
         best_tup = min(all_tups, key = lambda tup: tup[1])
@@ -271,18 +338,339 @@ def minimax_search_alphabeta(state, alpha=-INF, beta=INF, heuristic_fn=always_ze
 # pretty_print_dfs_type(minimax_search_alphabeta(state_UHOH, heuristic_fn=heuristic_connectfour, depth_limit=4))
 
 
+# Move ordering for Connect Four: moves nearer the centre column take part in
+# more four-cell windows, so they are tried first, after killer moves and the
+# history table (see MoveOrdering in game_api.py).
+
+def center_first_connectfour(state, child):
+    """Static move-ordering key: how far the column of the move from state
+    to child is from the centre column."""
+    parent_board, child_board = state.get_snapshot(), child.get_snapshot()
+    for col in range(parent_board.num_cols):
+        if child_board.get_column_height(col) != parent_board.get_column_height(col):
+            return abs(col - parent_board.num_cols // 2)
+    return 0
+
+def connectfour_move_ordering():
+    return MoveOrdering(center_first_connectfour)
+
+# Uncomment the line below to compare the number of evaluations with and
+# without move ordering:
+
+# pretty_print_dfs_type(minimax_search_alphabeta(state_UHOH, heuristic_fn=heuristic_connectfour, depth_limit=4, move_ordering=connectfour_move_ordering()))
+
+
+@top_level_search
+def minimax_search_alphabeta_tt(state, alpha=-INF, beta=INF, heuristic_fn=always_zero,
+                                depth_limit=INF, maximize=True, table=None, book=None,
+                                deadline=None) :
+    """Performs minimax with alpha-beta pruning, storing the result for each
+    position in a TranspositionTable (a new one if table is None), so that a
+    position reached again through a different order of moves is not
+    searched again. Same return type as dfs_maximizing. The evaluation count
+    leaves out the evaluations saved by the table (see
+    table.evaluations_saved). The best move found for a position is tried
+    first when it is searched again, so ties may be broken differently than
+    in minimax_search_alphabeta. A PositionBook is used as in
+    minimax_search_alphabeta, for state only. If a Deadline is given, it is
+    checked as each node is entered, and SearchTimeout is raised once it
+    has passed."""
+    if deadline is not None:
+        deadline.check()
+    if table is None:
+        table = TranspositionTable()
+    key = (state.get_hash_key(), maximize)
+    entry = table.lookup(key, depth_limit, alpha, beta)
+    if entry is not None:
+        return ([state] + entry.path[1:], entry.score, 0)
+
+    if book is not None:
+        book_tup = book_result(state, book, heuristic_fn, depth_limit, maximize)
+        if book_tup is not None:
+            return book_tup
+
+    if state.is_game_over():
+        score = state.get_endgame_score(maximize)
+        table.store(key, INF, score, table.EXACT, None, [state], 1)
+        return ([state], score, 1)
+
+    if depth_limit == 0:
+        score = heuristic_fn(state.get_snapshot(), maximize)
+        table.store(key, 0, score, table.EXACT, None, [state], 1)
+        return ([state], score, 1)
+
+    children = state.generate_next_states()
+
+    order = list(range(len(children)))
+    previous = table.get(key)
+    if previous is not None and previous.best_move in order:
+        order.remove(previous.best_move)
+        order.insert(0, previous.best_move)
+
+    best_tup, best_move = None, None
+    num_static_evals = 0
+    best_alpha, best_beta = alpha, beta
+    for index in order:
+        tup = minimax_search_alphabeta_tt(children[index], best_alpha, best_beta, heuristic_fn,
+                                          depth_limit - 1, not maximize, table, None, deadline)
+        num_static_evals += tup[2]
+        if best_tup is None or (tup[1] > best_tup[1] if maximize else tup[1] < best_tup[1]):
+            best_tup, best_move = tup, index
+        if maximize:
+            best_alpha = max(best_alpha, tup[1])
+        else:
+            best_beta = min(best_beta, tup[1])
+        if best_alpha >= best_beta:
+            break
+
+    # a score outside (alpha, beta) means the search was cut off, so it is
+    # only a bound on the true minimax value
+    leaf_score = best_tup[1]
+    if leaf_score <= alpha:
+        bound = table.UPPER_BOUND
+    elif leaf_score >= beta:
+        bound = table.LOWER_BOUND
+    else:
+        bound = table.EXACT
+    best_path = [state] + best_tup[0]
+    table.store(key, depth_limit, leaf_score, bound, best_move, best_path, num_static_evals)
+    return (best_path, leaf_score, num_static_evals)
+
+# Uncomment the lines below to see how many evaluations the transposition
+# table saves on "BOARD_UHOH" with depth_limit=4:
+
+# table = TranspositionTable()
+# pretty_print_dfs_type(minimax_search_alphabeta_tt(state_UHOH, heuristic_fn=heuristic_connectfour, depth_limit=4, table=table))
+# print(table)
+
+
+@top_level_search
+def minimax_search_alphabeta_parallel(state, alpha=-INF, beta=INF, heuristic_fn=always_zero,
+                                      depth_limit=INF, maximize=True, processes=None,
+                                      sibling_order=None) :
+    """Performs minimax with alpha-beta pruning, searching the children of
+    state on a pool of processes. Same return type as dfs_maximizing. See
+    parallel_search.py."""
+    from parallel_search import minimax_search_alphabeta_parallel
+    return minimax_search_alphabeta_parallel(state, alpha, beta, heuristic_fn,
+                                             depth_limit, maximize, processes,
+                                             sibling_order)
+
+# Uncomment the line below to search "BOARD_UHOH" to depth_limit=6 on every core:
+
+# pretty_print_dfs_type(minimax_search_alphabeta_parallel(state_UHOH, heuristic_fn=heuristic_connectfour, depth_limit=6))
+
+
+@top_level_search
+def minimax_search_alphabeta_inplace(state, alpha=-INF, beta=INF, heuristic_fn=always_zero,
+                                     depth_limit=INF, maximize=True) :
+    """Performs minimax with alpha-beta pruning on a Connect Four state,
+    like minimax_search_alphabeta, but walks the tree on a single copy of the
+    board, with make_move and unmake_move, instead of making a new board and
+    AbstractGameState for every child. States are only made for the best
+    path, at the end. Same return value as minimax_search_alphabeta, for the
+    same is_game_over_fn and endgame_score_fn."""
+    score, moves, num_static_evals = alphabeta_inplace(
+        state.get_snapshot().copy(), alpha, beta, heuristic_fn, depth_limit, maximize,
+        state.is_game_over_fn, state.endgame_score_fn)
+    best_path = [state]
+    for col in moves:
+        best_path.append(best_path[-1].wrap(best_path[-1].get_snapshot().add_piece(col)))
+    return (best_path, score, num_static_evals)
+
+def alphabeta_inplace(board, alpha, beta, heuristic_fn, depth_limit, maximize,
+                      is_game_over_fn, endgame_score_fn) :
+    """Returns (score, list of columns on the best path, evals) for board,
+    leaving board as it was."""
+    columns = [col for col in range(board.num_cols) if not board.is_column_full(col)]
+    if not columns or is_game_over_fn(board):
+        return (endgame_score_fn(board, maximize), [], 1)
+
+    if depth_limit == 0:
+        return (heuristic_fn(board, maximize), [], 1)
+
+    best_score, best_moves = None, None
+    num_static_evals = 0
+    for col in columns:
+        board.make_move(col)
+        score, moves, evals = alphabeta_inplace(board, alpha, beta, heuristic_fn, depth_limit - 1,
+                                                not maximize, is_game_over_fn, endgame_score_fn)
+        board.unmake_move()
+        num_static_evals += evals
+        if best_score is None or (score > best_score if maximize else score < best_score):
+            best_score, best_moves = score, [col] + moves
+        if maximize:
+            alpha = max(alpha, score)
+        else:
+            beta = min(beta, score)
+        if alpha >= beta:
+            break
+
+    return (best_score, best_moves, num_static_evals)
+
+# Uncomment the line below to try minimax_search_alphabeta_inplace with
+# "BOARD_UHOH" and depth_limit=4. It should match minimax_search_alphabeta.
+
+# pretty_print_dfs_type(minimax_search_alphabeta_inplace(state_UHOH, heuristic_fn=heuristic_connectfour, depth_limit=4))
+
+
+@top_level_search
+def minimax_search_pvs(state, alpha=-INF, beta=INF, heuristic_fn=always_zero,
+                       depth_limit=INF, maximize=True, move_ordering=None) :
+    """Performs principal variation search (NegaScout). The first child of
+    each node is searched with the full window; every later child is first
+    searched with a null window (alpha, alpha+1), which only tells whether
+    it is better than the best so far, and searched again if it is. Same
+    return type as minimax_search_alphabeta, with the same score; the
+    evaluation count includes the re-searches. Scores must be integers."""
+    # negamax: scores are from the point of view of the player to move
+    sign = 1 if maximize else -1
+    path, score, num_static_evals = negamax_pvs(state, alpha if maximize else -beta,
+                                                beta if maximize else -alpha,
+                                                heuristic_fn, depth_limit, maximize, move_ordering, 0)
+    return (path, sign * score, num_static_evals)
+
+def negamax_pvs(state, alpha, beta, heuristic_fn, depth_limit, maximize, move_ordering, ply) :
+    """Returns (path, score, evals) for state, ply plies below the root,
+    where score is from the point of view of the player to move (negated
+    for the minimizer)."""
+    sign = 1 if maximize else -1
+    if state.is_game_over():
+        return ([state], sign * state.get_endgame_score(maximize), 1)
+
+    if depth_limit == 0:
+        return ([state], sign * heuristic_fn(state.get_snapshot(), maximize), 1)
+
+    children = state.generate_next_states()
+    if move_ordering is not None:
+        children = move_ordering.order(state, children, depth_limit, ply)
+
+    best_path, best_score = None, None
+    num_static_evals = 0
+    for child in children:
+        if best_score is None:
+            path, score, evals = negamax_pvs(child, -beta, -alpha, heuristic_fn,
+                                             depth_limit - 1, not maximize, move_ordering, ply + 1)
+            score = -score
+        else:
+            # null window: is this child better than alpha?
+            path, score, evals = negamax_pvs(child, -alpha - 1, -alpha, heuristic_fn,
+                                             depth_limit - 1, not maximize, move_ordering, ply + 1)
+            score = -score
+            if alpha < score < beta:
+                # it is, by at least score: find out by how much
+                num_static_evals += evals
+                path, score, evals = negamax_pvs(child, -beta, -score, heuristic_fn,
+                                                 depth_limit - 1, not maximize, move_ordering, ply + 1)
+                score = -score
+        num_static_evals += evals
+        if best_score is None or score > best_score:
+            best_path, best_score = path, score
+        alpha = max(alpha, score)
+        if alpha >= beta:
+            if move_ordering is not None:
+                move_ordering.record_cutoff(child, depth_limit, ply)
+            break
+
+    return ([state] + best_path, best_score, num_static_evals)
+
+# Uncomment the line below to compare the evaluations of minimax_search_pvs
+# with those of minimax_search_alphabeta on "BOARD_UHOH":
+
+# pretty_print_dfs_type(minimax_search_pvs(state_UHOH, heuristic_fn=heuristic_connectfour, depth_limit=4, move_ordering=connectfour_move_ordering()))
+
+
+@top_level_search
 def progressive_deepening(state, heuristic_fn=always_zero, depth_limit=INF,
-                          maximize=True) :
+                          maximize=True, move_ordering=None, aspiration_window=None,
+                          search_fn=minimax_search_alphabeta) :
     """Runs minimax with alpha-beta pruning. At each level, updates anytime_value
-    with the tuple returned from minimax_search_alphabeta. Returns anytime_value."""
+    with the tuple returned from minimax_search_alphabeta. Returns anytime_value.
+    If a MoveOrdering is given, each level first tries the best path found
+    by the level before it. If an aspiration_window is given, each level
+    after the first is searched with the window (previous score -
+    aspiration_window, previous score + aspiration_window), and again with
+    that side of the window opened if the score falls outside it; the
+    evaluations of the failed search are added to the level's count.
+    search_fn may be any search with the same arguments as
+    minimax_search_alphabeta, such as minimax_search_pvs. The levels share
+    the states' cached children, and state's cache is emptied on return
+    (see top_level_search), also for a state the caller has already
+    expanded."""
     anytime_value = AnytimeValue()
     
     for depth in range(1, depth_limit + 1):
-        anytime_value.set_value(minimax_search_alphabeta(
-            state, -INF, INF, heuristic_fn, depth, maximize))
+        if aspiration_window is None or anytime_value.get_value() is None:
+            anytime_value.set_value(search_fn(
+                state, -INF, INF, heuristic_fn, depth, maximize, move_ordering))
+        else:
+            anytime_value.set_value(aspiration_search(
+                state, anytime_value.get_value()[1], aspiration_window, heuristic_fn,
+                depth, maximize, move_ordering, search_fn))
+        if move_ordering is not None:
+            move_ordering.set_principal_variation(anytime_value.get_value()[0])
     
     return anytime_value
 
+def aspiration_search(state, guess, aspiration_window, heuristic_fn, depth_limit,
+                      maximize, move_ordering, search_fn) :
+    """Searches with a window of aspiration_window around guess, widening
+    the side that fails until the score is inside the window. Returns the
+    final search's path and score, and the evaluations of all the searches."""
+    alpha, beta = guess - aspiration_window, guess + aspiration_window
+    num_static_evals = 0
+    while True:
+        path, score, evals = search_fn(state, alpha, beta, heuristic_fn, depth_limit,
+                                       maximize, move_ordering)
+        num_static_evals += evals
+        if score <= alpha and alpha > -INF:
+            alpha = -INF
+        elif score >= beta and beta < INF:
+            beta = INF
+        else:
+            return (path, score, num_static_evals)
+
+@top_level_search
+def progressive_deepening_timed(state, heuristic_fn=always_zero, time_limit_ms=1000,
+                                maximize=True, depth_limit=INF, table=None, book=None) :
+    """Runs progressive deepening until time_limit_ms milliseconds have
+    passed, and returns an AnytimeValue holding every level that finished in
+    time. The deadline is checked as each node is entered, and the level
+    that is running at the deadline is abandoned. Level 1 is not checked and
+    always runs to completion, so that there is always a move to make; with
+    many moves to search at level 1, it can take longer than time_limit_ms.
+
+    Each level runs minimax_search_alphabeta_tt with the same
+    TranspositionTable, so positions already searched deeply enough are not
+    searched again, and the best move found by the level before is tried
+    first. Deepening stops early once a level reaches only game-over
+    positions, since searching deeper cannot change its result. A
+    PositionBook, if given, is used as in minimax_search_alphabeta; then
+    deepening does not stop early, since a level answered by the book also
+    takes no evaluations."""
+    if table is None:
+        table = TranspositionTable()
+    deadline = Deadline(time_limit_ms)
+    anytime_value = AnytimeValue()
+    depth = 1
+    while depth <= depth_limit:
+        evaluations = deadline.evaluations
+        counted_heuristic_fn = deadline.wrap(heuristic_fn, check = False)
+        try:
+            result = minimax_search_alphabeta_tt(state, -INF, INF, counted_heuristic_fn,
+                                                 depth, maximize, table, book,
+                                                 deadline if depth > 1 else None)
+        except SearchTimeout:
+            break
+        anytime_value.set_value(result)
+        if deadline.evaluations == evaluations and book is None:
+            break
+        if deadline.expired():
+            break
+        depth += 1
+
+    return anytime_value
+
 
 # Uncomment the line below to try progressive_deepening with "BOARD_UHOH" and
 # depth_limit=4. Compare the total number of evaluations with the number of
@@ -291,6 +679,18 @@ def progressive_deepening(state, heuristic_fn=always_zero, depth_limit=INF,
 # progressive_deepening(state_UHOH, heuristic_fn=heuristic_connectfour, depth_limit=4).pretty_print()
 
 
+def run_tournament(agents, num_games=10, opening_moves=2, processes=None, seed=0) :
+    """Plays Connect Four games between every pair of agents, and returns a
+    dict mapping each agent's name to its AgentStats. See tournament.py."""
+    from tournament import run_tournament
+    return run_tournament(agents, num_games, opening_moves, processes, seed)
+
+# Uncomment the lines below to play alpha-beta at depth 2 against depth 4:
+
+# from tournament import Agent, print_results
+# print_results(run_tournament([Agent('alphabeta-2', depth_limit=2), Agent('alphabeta-4', depth_limit=4)], 4))
+
+
 # Progressive deepening is NOT optional. However, you may find that 
 #  the tests for progressive deepening take a long time. If you would
 #  like to temporarily bypass them, set this variable False. You will,
@@ -0,0 +1,118 @@
+# MIT 6.034 Lab 2: Games
+
+# Alpha-beta search split across processes at the root, in the style of
+# Young Brothers Wait: the first child of the root is searched on its own, to
+# get a good bound, and then its siblings are searched in parallel, sharing
+# the best bound found so far. For example:
+#     from parallel_search import minimax_search_alphabeta_parallel
+#     pretty_print_dfs_type(minimax_search_alphabeta_parallel(
+#         state_UHOH, heuristic_fn=heuristic_connectfour, depth_limit=6))
+#
+# The state and heuristic_fn are sent to the worker processes, so they must be
+# picklable: the functions in an AbstractGameState and heuristic_fn must be
+# defined at the top level of a module (as they are in lab2.py).
+
+import os
+from multiprocessing import Pool, Value
+
+from game_api import *
+from lab2 import INF, always_zero, minimax_search_alphabeta
+
+# The best score the root has been promised so far: alpha if the root is a
+# maximizer, beta if it is a minimizer. Every worker reads it when it starts
+# searching a child, and tightens it when it finishes one.
+shared_bound = None
+
+def init_worker(bound):
+    global shared_bound
+    shared_bound = bound
+
+def search_sibling(task):
+    """Searches one child of the root with the tightest window known so far.
+    Returns (index of the child, (alpha, beta) it was searched with,
+    (path, score, evals))."""
+    index, child, alpha, beta, heuristic_fn, depth_limit, maximize = task
+    with shared_bound.get_lock():
+        bound = shared_bound.value
+    if maximize:
+        alpha = max(alpha, bound)
+    else:
+        beta = min(beta, bound)
+    # the child is searched by the other player
+    tup = minimax_search_alphabeta(child, alpha, beta, heuristic_fn, depth_limit, not maximize)
+    with shared_bound.get_lock():
+        if maximize:
+            shared_bound.value = max(shared_bound.value, tup[1])
+        else:
+            shared_bound.value = min(shared_bound.value, tup[1])
+    return (index, (alpha, beta), tup)
+
+def is_exact(score, window):
+    """Returns True if a score found with the window (alpha, beta) is the
+    child's true minimax value, rather than only a bound on it."""
+    return window[0] < score < window[1]
+
+def minimax_search_alphabeta_parallel(state, alpha=-INF, beta=INF, heuristic_fn=always_zero,
+                                      depth_limit=INF, maximize=True, processes=None,
+                                      sibling_order=None):
+    """Performs minimax with alpha-beta pruning, searching the children of
+    state in parallel on a pool of processes (by default, one per core).
+    Same return type as minimax_search_alphabeta, with the same score. The
+    evaluation count is the total over all processes; it is usually higher
+    than minimax_search_alphabeta's, since siblings searched at the same time
+    cannot use each other's bounds. Of several children with the best score,
+    the one that finished first may be chosen, so the path may differ from
+    minimax_search_alphabeta's when there is a tie. With processes=1, the
+    siblings are searched one after another in this process, in
+    sibling_order (a list of child indices other than 0) if it is given, to
+    reproduce an order in which the pool might finish them."""
+    if state.is_game_over() or depth_limit == 0:
+        return minimax_search_alphabeta(state, alpha, beta, heuristic_fn, depth_limit, maximize)
+
+    children = state.generate_next_states()
+    first_tup = minimax_search_alphabeta(children[0], alpha, beta, heuristic_fn,
+                                         depth_limit - 1, not maximize)
+    results = {0: first_tup}
+    windows = {0: (alpha, beta)}
+    num_static_evals = first_tup[2]
+
+    cutoff = first_tup[1] >= beta if maximize else first_tup[1] <= alpha
+    if not cutoff and len(children) > 1:
+        bound = Value('d', max(alpha, first_tup[1]) if maximize else min(beta, first_tup[1]))
+        tasks = [(index, children[index], alpha, beta, heuristic_fn, depth_limit - 1, maximize)
+                 for index in range(1, len(children))]
+        processes = processes or os.cpu_count() or 1
+        if processes == 1:
+            init_worker(bound)
+            if sibling_order is not None:
+                tasks = [tasks[index - 1] for index in sibling_order]
+            sibling_results = map(search_sibling, tasks)
+        else:
+            with Pool(min(processes, len(tasks)), initializer=init_worker,
+                      initargs=(bound,)) as pool:
+                sibling_results = list(pool.imap_unordered(search_sibling, tasks))
+        for index, window, tup in sibling_results:
+            results[index] = tup
+            windows[index] = window
+
+    # take the first child (in generate_next_states() order) with the best
+    # score, as minimax_search_alphabeta does. A sibling searched after a
+    # later sibling tightened the bound may fail low with exactly that bound,
+    # which is only a bound on its value, so of two children with the same
+    # score, the one whose score is exact is taken.
+    best_index = None
+    for index in sorted(results):
+        tup = results[index]
+        if index != 0:
+            num_static_evals += tup[2]
+        if best_index is None:
+            best_index = index
+            continue
+        best_score = results[best_index][1]
+        if (tup[1] > best_score if maximize else tup[1] < best_score):
+            best_index = index
+        elif (tup[1] == best_score and is_exact(tup[1], windows[index])
+              and not is_exact(best_score, windows[best_index])):
+            best_index = index
+    best_tup = results[best_index]
+    return ([state] + best_tup[0], best_tup[1], num_static_evals)
@@ -6,6 +6,8 @@
 # from your lab2 directory.
 # Wrapper written by Hunter Gatewood.
 
+import os
+
 from game_api import *
 from boards import *
 from lab2 import *
@@ -14,6 +16,12 @@ TESTING = False
 QUIT = ['q', 'Q', 'quit', 'Quit', 'QUIT']
 YES = ['y', 'yes', 'Y', 'Yes', 'YES']
 NO = ['n', 'no', 'N', 'No', 'NO']
+# The AI stops searching deeper after this many milliseconds (None to always
+# search to the full depth limit).
+AI_TIME_LIMIT_MS = 1000
+# The opening book and endgame table made by running build_book.py. If the
+# file is missing, the AI always searches.
+BOOK_FILE = 'connectfour_book.dat'
 
 
 def new_state(snap=None):
@@ -21,7 +29,7 @@ def new_state(snap=None):
     state_starting_connectfour = AbstractGameState(
         snapshot=board,
         is_game_over_fn=is_game_over_connectfour,
-        generate_next_states_fn=next_boards_connectfour,
+        generate_next_states_fn=next_boards_connectfour_lazy,
         endgame_score_fn=endgame_score_connectfour_faster)
     return state_starting_connectfour
 
@@ -36,6 +44,7 @@ def start_game():
     else:
         player_name, player_goes_first, depth_limit = say_hi()
     players_move = player_goes_first
+    book = load_book()
     cont = True
     while cont:
         # Print the board state, then have someone take a turn
@@ -43,7 +52,7 @@ def start_game():
             print_board_state(state)
             state, cont = player_turn(state)
         else:
-            state = ai_turn(state, depth_limit)
+            state = ai_turn(state, depth_limit, book=book)
 
         # If the player wants to exit
         if cont is False:
@@ -95,9 +104,28 @@ def print_ai_move(state):
     print('\nAI move:', description)
 
 
-def ai_turn(state, depth_limit):
-    alphabeta_ret = minimax_search_alphabeta(
-        state, -INF, INF, heuristic_connectfour, depth_limit)
+def load_book():
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), BOOK_FILE)
+    return PositionBook(path) if os.path.exists(path) else None
+
+
+def ai_turn(state, depth_limit, time_limit_ms=AI_TIME_LIMIT_MS, book=None):
+    if book is None:
+        book = load_book()
+    entry = None
+    if book is not None:
+        entry = book.lookup(state.get_snapshot(), True, heuristic_connectfour, state.endgame_score_fn)
+    if entry is not None and entry.best_move is not None:
+        alphabeta_ret = (book_path(state, entry.best_move), entry.score, 0)
+    elif time_limit_ms is None:
+        alphabeta_ret = minimax_search_alphabeta(
+            state, -INF, INF, heuristic_connectfour, depth_limit, book=book)
+    else:
+        alphabeta_ret = progressive_deepening_timed(
+            state, heuristic_connectfour, time_limit_ms,
+            depth_limit=depth_limit, book=book).get_value()
+    # the searches free the tree they search, but book_path expands state too
+    state.forget_next_states()
     new_state = alphabeta_ret[0][1]
     print_ai_move(new_state)
     return new_state
@@ -159,8 +187,9 @@ def say_hi():
         if first is None:
             print("Oops, please type either 'yes' or 'no'.")
     print("\nAnd, finally, choose the depth limit for the bot's search")
-    print("(Picking values larger than 4 or 5 could result in long wait times,")
-    print(" while picking 1 would make for a mostly trivial game)")
+    print("(The bot stops searching deeper after %s ms, so larger values only"
+          % AI_TIME_LIMIT_MS)
+    print(" help if it has time; picking 1 would make for a mostly trivial game)")
     depth_limit = None
     while depth_limit is None:
         inp = input(">>> ")
@@ -5,7 +5,7 @@ from game_api import *
 from boards import *
 from lab2 import (next_boards_connectfour, is_game_over_connectfour,
                   endgame_score_connectfour, endgame_score_connectfour_faster,
-                  minimax_search)
+                  minimax_search, minimax_search_alphabeta)
 INF = float('inf')
 lab_number = 2
 
@@ -767,3 +767,618 @@ make_test(type = 'VALUE',
           testanswer = ANSWER_4_testanswer,
           expected_val = "correct value of ANSWER_4 ('1', '2', '3', '4', or '5')",
           name = ANSWER_4_getargs)
+
+
+#### Transposition table #######################################################
+
+from lab2 import heuristic_connectfour, heuristic_connectfour_windows
+
+# With a new table, no position in a ToyTree is reached twice, so the results
+# are the same as minimax_search_alphabeta's.
+def alphabeta_tt_0_getargs() :  #TEST 45
+    return [GAME1, -INF, INF, lambda x,y:0, INF, True, TranspositionTable()]
+
+def alphabeta_tt_0_testanswer(val, original_val = None) :
+    return (is_dfs_return_type(val) and move_sequence(GAME1, [1,0]) == val[0]
+            and (val[1],val[2]) == (4,13))
+
+make_test(type = 'FUNCTION_ENCODED_ARGS',
+          getargs = alphabeta_tt_0_getargs,
+          testanswer = alphabeta_tt_0_testanswer,
+          expected_val = "List of (best_path, leaf_score, evaluation_count) corresponding to minimax+alphabeta when the maximizer moves first.",
+          name = 'minimax_search_alphabeta_tt')
+
+
+def alphabeta_tt_1_getargs() :  #TEST 46
+    return [GAME_EQUALITY_PRUNING, -INF, INF, lambda x,y:0, INF, False, TranspositionTable()]
+
+def alphabeta_tt_1_testanswer(val, original_val = None) :
+    return (is_dfs_return_type(val)
+            and move_sequence(GAME_EQUALITY_PRUNING, [1,1,0,1]) == val[0]
+            and (val[1],val[2]) == (14,11))
+
+make_test(type = 'FUNCTION_ENCODED_ARGS',
+          getargs = alphabeta_tt_1_getargs,
+          testanswer = alphabeta_tt_1_testanswer,
+          expected_val = "List of (best_path, leaf_score, evaluation_count) corresponding to minimax+alphabeta when the minimizer moves first.",
+          name = 'minimax_search_alphabeta_tt')
+
+
+# In Connect Four, the table finds the same score as minimax_search_alphabeta
+# (-40 with 1094 evaluations), with fewer evaluations.
+UHOH_TABLE = TranspositionTable(replacement='lru')
+
+def alphabeta_tt_2_getargs() :  #TEST 47
+    GAME = AbstractGameState(BOARD_UHOH, is_game_over_connectfour, next_boards_connectfour, endgame_score_connectfour_faster)
+    return [GAME, -INF, INF, heuristic_connectfour, 4, True, UHOH_TABLE]
+
+def alphabeta_tt_2_testanswer(val, original_val = None) :
+    GAME = AbstractGameState(BOARD_UHOH, is_game_over_connectfour, next_boards_connectfour, endgame_score_connectfour_faster)
+    return (is_dfs_return_type(val) and move_sequence(GAME, [4,5,5,6]) == val[0]
+            and (val[1],val[2]) == (-40,656) and UHOH_TABLE.evaluations_saved == 404)
+
+make_test(type = 'FUNCTION_ENCODED_ARGS',
+          getargs = alphabeta_tt_2_getargs,
+          testanswer = alphabeta_tt_2_testanswer,
+          expected_val = ("((list of five AbstractGameState instances), -40, 656), "
+                          +"with 404 evaluations saved by the table"),
+          name = 'minimax_search_alphabeta_tt')
+
+
+#### Bitboard ConnectFourBoard ##################################################
+
+# A BitboardConnectFourBoard must behave exactly like the ConnectFourBoard it
+# was made from.
+def next_boards_bitboard_0_getargs() :  #TEST 48
+    return [BitboardConnectFourBoard.from_board(BOARD_PARTIAL)]
+def next_boards_bitboard_0_testanswer(val, original_val = None) :
+    return (compare_list_of_boards_by_array(val, next_boards_BOARD_PARTIAL)
+            and all(is_class_instance(board, 'BitboardConnectFourBoard') for board in val))
+make_test(type = 'FUNCTION_ENCODED_ARGS',
+          getargs = next_boards_bitboard_0_getargs,
+          testanswer = next_boards_bitboard_0_testanswer,
+          expected_val = ("(list of 7 BitboardConnectFourBoard objects resulting from "
+                          +"adding a piece to boards.BOARD_PARTIAL)"),
+          name = 'next_boards_connectfour')
+
+def next_boards_bitboard_1_getargs() :  #TEST 49
+    return [BitboardConnectFourBoard.from_board(BOARD_FULL_TIED_minus3)]
+def next_boards_bitboard_1_testanswer(val, original_val = None) :
+    return val == [BOARD_FULL_TIED_minus3.add_piece(3)]
+make_test(type = 'FUNCTION_ENCODED_ARGS',
+          getargs = next_boards_bitboard_1_getargs,
+          testanswer = next_boards_bitboard_1_testanswer,
+          expected_val = "(list containing 1 full ConnectFourBoard with correct attributes)",
+          name = 'next_boards_connectfour')
+
+def is_game_over_bitboard_0_getargs() :  #TEST 50
+    return [BitboardConnectFourBoard.from_board(BOARD_FIVE_IN_A_ROW)]
+def is_game_over_bitboard_0_testanswer(val, original_val = None) :
+    return val == True
+make_test(type = 'FUNCTION_ENCODED_ARGS',
+          getargs = is_game_over_bitboard_0_getargs,
+          testanswer = is_game_over_bitboard_0_testanswer,
+          expected_val = True,
+          name = 'is_game_over_connectfour')
+
+def heuristic_bitboard_0_getargs() :  #TEST 51
+    return [BitboardConnectFourBoard.from_board(BOARD_UHOH), True]
+def heuristic_bitboard_0_testanswer(val, original_val = None) :
+    return val == heuristic_connectfour(BOARD_UHOH, True)
+make_test(type = 'FUNCTION_ENCODED_ARGS',
+          getargs = heuristic_bitboard_0_getargs,
+          testanswer = heuristic_bitboard_0_testanswer,
+          expected_val = "the same heuristic value as for BOARD_UHOH",
+          name = 'heuristic_connectfour')
+
+def alphabeta_bitboard_0_getargs() :  #TEST 52
+    GAME = AbstractGameState(BitboardConnectFourBoard.from_board(BOARD_UHOH), is_game_over_connectfour, next_boards_connectfour, endgame_score_connectfour_faster)
+    return [GAME, -INF, INF, heuristic_connectfour, 3, True]
+def alphabeta_bitboard_0_testanswer(val, original_val = None) :
+    GAME = AbstractGameState(BOARD_UHOH, is_game_over_connectfour, next_boards_connectfour, endgame_score_connectfour_faster)
+    expected = minimax_search_alphabeta(GAME, -INF, INF, heuristic_connectfour, 3, True)
+    return is_dfs_return_type(val) and val[0] == expected[0] and val[1:] == expected[1:]
+make_test(type = 'FUNCTION_ENCODED_ARGS',
+          getargs = alphabeta_bitboard_0_getargs,
+          testanswer = alphabeta_bitboard_0_testanswer,
+          expected_val = "the same result as for BOARD_UHOH, with depth_limit=3",
+          name = 'minimax_search_alphabeta')
+
+
+#### Incremental window evaluation ##############################################
+
+# heuristic_connectfour_windows scores the 69 four-cell windows; a
+# BitboardConnectFourBoard keeps the scores up to date as pieces are added,
+# and must agree with a ConnectFourBoard, which counts them from scratch.
+def heuristic_windows_0_getargs() :  #TEST 53
+    return [BOARD_UHOH, True]
+def heuristic_windows_0_testanswer(val, original_val = None) :
+    return val == 19 - 106
+make_test(type = 'FUNCTION_ENCODED_ARGS',
+          getargs = heuristic_windows_0_getargs,
+          testanswer = heuristic_windows_0_testanswer,
+          expected_val = -87,
+          name = 'heuristic_connectfour_windows')
+
+def heuristic_windows_1_getargs() :  #TEST 54
+    return [BitboardConnectFourBoard.from_board(BOARD_UHOH).add_piece(4).add_piece(5), False]
+def heuristic_windows_1_testanswer(val, original_val = None) :
+    return val == heuristic_connectfour_windows(BOARD_UHOH.add_piece(4).add_piece(5), False)
+make_test(type = 'FUNCTION_ENCODED_ARGS',
+          getargs = heuristic_windows_1_getargs,
+          testanswer = heuristic_windows_1_testanswer,
+          expected_val = "the same heuristic value as for the equivalent ConnectFourBoard",
+          name = 'heuristic_connectfour_windows')
+
+def alphabeta_windows_0_getargs() :  #TEST 55
+    GAME = AbstractGameState(BitboardConnectFourBoard.from_board(BOARD_UHOH), is_game_over_connectfour, next_boards_connectfour, endgame_score_connectfour_faster)
+    return [GAME, -INF, INF, heuristic_connectfour_windows, 4, True]
+def alphabeta_windows_0_testanswer(val, original_val = None) :
+    return is_dfs_return_type(val) and (val[1],val[2]) == (-9,857)
+make_test(type = 'FUNCTION_ENCODED_ARGS',
+          getargs = alphabeta_windows_0_getargs,
+          testanswer = alphabeta_windows_0_testanswer,
+          expected_val = "((list of five AbstractGameState instances), -9, 857)",
+          name = 'minimax_search_alphabeta')
+
+
+#### Move ordering ##############################################################
+
+# With a MoveOrdering, alpha-beta finds the same score with fewer evaluations.
+from lab2 import connectfour_move_ordering
+
+def alphabeta_ordering_0_getargs() :  #TEST 56
+    GAME = AbstractGameState(BOARD_UHOH, is_game_over_connectfour, next_boards_connectfour, endgame_score_connectfour)
+    return [GAME, -INF, INF, heuristic_connectfour, 4, True, connectfour_move_ordering()]
+def alphabeta_ordering_0_testanswer(val, original_val = None) :
+    return is_dfs_return_type(val) and (val[1],val[2]) == (-40,184)
+make_test(type = 'FUNCTION_ENCODED_ARGS',
+          getargs = alphabeta_ordering_0_getargs,
+          testanswer = alphabeta_ordering_0_testanswer,
+          expected_val = "((list of five AbstractGameState instances), -40, 184)",
+          name = 'minimax_search_alphabeta')
+
+# From the empty board, at depth 5: 1595 evaluations without ordering. (At
+# depths 4 and 6 ordering does not pay for itself here: 104 -> 106, 788 -> 1016.)
+def alphabeta_ordering_1_getargs() :  #TEST 57
+    GAME = AbstractGameState(ConnectFourBoard(), is_game_over_connectfour, next_boards_connectfour, endgame_score_connectfour)
+    return [GAME, -INF, INF, heuristic_connectfour, 5, True, connectfour_move_ordering()]
+def alphabeta_ordering_1_testanswer(val, original_val = None) :
+    return is_dfs_return_type(val) and (val[1],val[2]) == (28,826)
+make_test(type = 'FUNCTION_ENCODED_ARGS',
+          getargs = alphabeta_ordering_1_getargs,
+          testanswer = alphabeta_ordering_1_testanswer,
+          expected_val = "((list of six AbstractGameState instances), 28, 826)",
+          name = 'minimax_search_alphabeta')
+
+def progressive_ordering_0_getargs() :  #TEST 58
+    GAME = AbstractGameState(BOARD_UHOH, is_game_over_connectfour, next_boards_connectfour, endgame_score_connectfour)
+    return [GAME, heuristic_connectfour, 5, True, connectfour_move_ordering()]
+def progressive_ordering_0_testanswer(val, original_val = None) :
+    return (isinstance(val, AnytimeValue)
+            and [result[1] for result in val.history] == [19, -11, 9, -40, 99]
+            and val.total_evaluations == 361)
+make_test(type = 'FUNCTION_ENCODED_ARGS',
+          getargs = progressive_ordering_0_getargs,
+          testanswer = progressive_ordering_0_testanswer,
+          expected_val = "AnytimeValue with scores [19, -11, 9, -40, 99] and 361 total evaluations",
+          name = 'progressive_deepening')
+
+# Killer moves are kept by ply: a cutoff 2 plies below the root, with 3
+# plies left, puts its move first at ply 2 whatever the depth left, and
+# not at another ply with 3 plies left.
+def move_ordering_killers_0_testanswer(val, original_val = None) :
+    state = AbstractGameState(ConnectFourBoard(), is_game_over_connectfour, next_boards_connectfour, endgame_score_connectfour)
+    children = state.generate_next_states()
+    val.use_history = False
+    val.record_cutoff(children[0], 3, 2)
+    return (val.order(state, children, 5, 2)[0] is children[0]
+            and val.order(state, children, 3, 1)[0] is children[3])
+make_test(type = 'FUNCTION',  #TEST 59
+          getargs = [],
+          testanswer = move_ordering_killers_0_testanswer,
+          expected_val = "a MoveOrdering that keeps killer moves by ply",
+          name = 'connectfour_move_ordering')
+
+
+#### Time-budgeted progressive deepening ########################################
+
+from lab2 import progressive_deepening_timed
+
+def progressive_timed_0_getargs() :  #TEST 60
+    GAME = AbstractGameState(BOARD_UHOH, is_game_over_connectfour, next_boards_connectfour, endgame_score_connectfour)
+    return [GAME, heuristic_connectfour, 10**6, True, 5]
+def progressive_timed_0_testanswer(val, original_val = None) :
+    return (isinstance(val, AnytimeValue)
+            and [result[1] for result in val.history] == [19, -11, 9, -40, 99])
+make_test(type = 'FUNCTION_ENCODED_ARGS',
+          getargs = progressive_timed_0_getargs,
+          testanswer = progressive_timed_0_testanswer,
+          expected_val = "AnytimeValue with the same scores as progressive_deepening to depth 5",
+          name = 'progressive_deepening_timed')
+
+# With no time at all, only level 1 is searched.
+def progressive_timed_1_getargs() :  #TEST 61
+    GAME = AbstractGameState(BOARD_UHOH, is_game_over_connectfour, next_boards_connectfour, endgame_score_connectfour)
+    return [GAME, heuristic_connectfour, 0, True, 5]
+def progressive_timed_1_testanswer(val, original_val = None) :
+    return (isinstance(val, AnytimeValue) and len(val.history) == 1
+            and val.get_value()[1] == 19 and len(val.get_value()[0]) == 2)
+make_test(type = 'FUNCTION_ENCODED_ARGS',
+          getargs = progressive_timed_1_getargs,
+          testanswer = progressive_timed_1_testanswer,
+          expected_val = "AnytimeValue holding only the depth-1 search, with score 19",
+          name = 'progressive_deepening_timed')
+
+# The deadline is also checked as each node is entered, so a level whose
+# leaves are all game-over states (no heuristic calls) is still abandoned:
+# here level 2 would take 200 ms, but stops at the second child, after 100 ms.
+import time
+
+SLOW_ENDGAME_TREE = ToyTree('R')
+SLOW_ENDGAME_TREE.sub('A', 1).sub('B', 2)
+SLOW_ENDGAME_TREE.down().sub('C', 3).sub('D', 4)
+SLOW_ENDGAME_TREE.down().right().sub('E', 5).sub('F', 6)
+
+def slow_endgame_is_game_over(tree) :
+    if toytree_is_game_over(tree) :
+        time.sleep(0.05)
+        return True
+    return False
+
+def progressive_timed_2_getargs() :  #TEST 62
+    GAME = AbstractGameState(SLOW_ENDGAME_TREE, slow_endgame_is_game_over,
+                             toytree_generate_next_states, toytree_endgame_score_fn)
+    return [GAME, toytree_heuristic_fn, 60, True, 2]
+def progressive_timed_2_testanswer(val, original_val = None) :
+    return isinstance(val, AnytimeValue) and len(val.history) == 1 and val.get_value()[1] == 2
+make_test(type = 'FUNCTION_ENCODED_ARGS',
+          getargs = progressive_timed_2_getargs,
+          testanswer = progressive_timed_2_testanswer,
+          expected_val = "AnytimeValue holding only the depth-1 search, with score 2",
+          name = 'progressive_deepening_timed')
+
+
+#### Parallel alpha-beta ########################################################
+
+from lab2 import minimax_search_alphabeta_parallel
+
+# Searched in this process, the siblings get the same bounds as in
+# minimax_search_alphabeta, so the result is exactly the same.
+def alphabeta_parallel_0_getargs() :  #TEST 63
+    GAME = AbstractGameState(BOARD_UHOH, is_game_over_connectfour, next_boards_connectfour, endgame_score_connectfour_faster)
+    return [GAME, -INF, INF, heuristic_connectfour, 4, True, 1]
+def alphabeta_parallel_0_testanswer(val, original_val = None) :
+    return is_dfs_return_type(val) and (val[1],val[2]) == (-40,1094)
+make_test(type = 'FUNCTION_ENCODED_ARGS',
+          getargs = alphabeta_parallel_0_getargs,
+          testanswer = alphabeta_parallel_0_testanswer,
+          expected_val = "((list of five AbstractGameState instances), -40, 1094)",
+          name = 'minimax_search_alphabeta_parallel')
+
+def alphabeta_parallel_1_getargs() :  #TEST 64
+    GAME = AbstractGameState(BOARD_UHOH, is_game_over_connectfour, next_boards_connectfour, endgame_score_connectfour_faster)
+    return [GAME, -INF, INF, heuristic_connectfour, 4, True, 2]
+def alphabeta_parallel_1_testanswer(val, original_val = None) :
+    return is_dfs_return_type(val) and len(val[0]) == 5 and val[1] == -40
+make_test(type = 'FUNCTION_ENCODED_ARGS',
+          getargs = alphabeta_parallel_1_getargs,
+          testanswer = alphabeta_parallel_1_testanswer,
+          expected_val = "((list of five AbstractGameState instances), -40, (any number of evaluations))",
+          name = 'minimax_search_alphabeta_parallel')
+
+# If C finishes before B starts, B is searched with alpha = 10 and fails low
+# with exactly 10, though its true value is 5: C must still be chosen.
+PARALLEL_TREE = ToyTree()
+PARALLEL_TREE.sub('A',0).sub('B').sub('C',10)
+PARALLEL_TREE.down().right().sub('D',10).sub('E',5)
+
+PARALLEL_GAME = AbstractGameState(PARALLEL_TREE,
+                          toytree_is_game_over,
+                          toytree_generate_next_states,
+                          toytree_endgame_score_fn)
+
+def alphabeta_parallel_2_getargs() :  #TEST 65
+    return [PARALLEL_GAME, -INF, INF, toytree_heuristic_fn, INF, True, 1, [2, 1]]
+def alphabeta_parallel_2_testanswer(val, original_val = None) :
+    return (is_dfs_return_type(val)
+            and move_sequence(PARALLEL_GAME, [2]) == val[0]
+            and (val[1],val[2]) == (10,3))
+make_test(type = 'FUNCTION_ENCODED_ARGS',
+          getargs = alphabeta_parallel_2_getargs,
+          testanswer = alphabeta_parallel_2_testanswer,
+          expected_val = "((list of two AbstractGameState instances, ending with C), 10, 3)",
+          name = 'minimax_search_alphabeta_parallel')
+
+
+#### Opening book and endgame table #############################################
+
+import os, tempfile
+
+# A book with one position, searched to depth 4 with heuristic_connectfour:
+# it stands in for a search to depth 4 with the same heuristic, and the book
+# move is the whole path.
+def make_test_book() :
+    path = os.path.join(tempfile.mkdtemp(), 'test_book.dat')
+    PositionBook.write(path, {BOARD_UHOH.position_key(): (123, -123, 2, 3, 4)},
+                       'heuristic_connectfour', 'endgame_score_connectfour_faster')
+    return PositionBook(path)
+
+def alphabeta_book_0_getargs() :  #TEST 66
+    GAME = AbstractGameState(BOARD_UHOH, is_game_over_connectfour, next_boards_connectfour, endgame_score_connectfour_faster)
+    return [GAME, -INF, INF, heuristic_connectfour, 4, False, None, make_test_book()]
+def alphabeta_book_0_testanswer(val, original_val = None) :
+    return (is_dfs_return_type(val) and (val[1],val[2]) == (-123,0) and len(val[0]) == 2
+            and val[0][1].get_snapshot().get_column_height(3) == BOARD_UHOH.get_column_height(3) + 1)
+make_test(type = 'FUNCTION_ENCODED_ARGS',
+          getargs = alphabeta_book_0_getargs,
+          testanswer = alphabeta_book_0_testanswer,
+          expected_val = "((list of two AbstractGameState instances, playing in column 3), -123, 0)",
+          name = 'minimax_search_alphabeta')
+
+# With a different heuristic, or a different depth, the book is not used.
+def alphabeta_book_1_getargs() :  #TEST 67
+    GAME = AbstractGameState(BOARD_UHOH, is_game_over_connectfour, next_boards_connectfour, endgame_score_connectfour_faster)
+    return [GAME, -INF, INF, heuristic_connectfour_windows, 4, False, None, make_test_book()]
+def alphabeta_book_1_testanswer(val, original_val = None) :
+    return is_dfs_return_type(val) and len(val[0]) == 5 and val[2] > 0
+make_test(type = 'FUNCTION_ENCODED_ARGS',
+          getargs = alphabeta_book_1_getargs,
+          testanswer = alphabeta_book_1_testanswer,
+          expected_val = "((list of five AbstractGameState instances), (a searched score), (more than 0 evaluations))",
+          name = 'minimax_search_alphabeta')
+
+def alphabeta_book_2_getargs() :  #TEST 68
+    GAME = AbstractGameState(BOARD_UHOH, is_game_over_connectfour, next_boards_connectfour, endgame_score_connectfour_faster)
+    return [GAME, -INF, INF, heuristic_connectfour, 3, False, None, make_test_book()]
+def alphabeta_book_2_testanswer(val, original_val = None) :
+    return is_dfs_return_type(val) and len(val[0]) == 4 and val[2] > 0
+make_test(type = 'FUNCTION_ENCODED_ARGS',
+          getargs = alphabeta_book_2_getargs,
+          testanswer = alphabeta_book_2_testanswer,
+          expected_val = "((list of four AbstractGameState instances), (a searched score), (more than 0 evaluations))",
+          name = 'minimax_search_alphabeta')
+
+# An opening book searched to depth 3 gives a depth 3 search from the empty
+# board the same score and first move as searching without the book, without
+# evaluating anything.
+def make_opening_test_book() :
+    from build_book import build_opening_book
+    path = os.path.join(tempfile.mkdtemp(), 'test_book.dat')
+    PositionBook.write(path, build_opening_book(max_moves=1, depth_limit=3),
+                       'heuristic_connectfour', 'endgame_score_connectfour_faster')
+    return PositionBook(path)
+def alphabeta_book_3_getargs() :  #TEST 69
+    GAME = AbstractGameState(ConnectFourBoard(), is_game_over_connectfour, next_boards_connectfour, endgame_score_connectfour_faster)
+    return [GAME, -INF, INF, heuristic_connectfour, 3, True, None, make_opening_test_book()]
+def alphabeta_book_3_testanswer(val, original_val = None) :
+    GAME = AbstractGameState(ConnectFourBoard(), is_game_over_connectfour, next_boards_connectfour, endgame_score_connectfour_faster)
+    expected = minimax_search_alphabeta(GAME, -INF, INF, heuristic_connectfour, 3, True)
+    return (is_dfs_return_type(val) and (val[1],val[2]) == (expected[1],0) and len(val[0]) == 2
+            and val[0][1].get_snapshot() == expected[0][1].get_snapshot())
+make_test(type = 'FUNCTION_ENCODED_ARGS',
+          getargs = alphabeta_book_3_getargs,
+          testanswer = alphabeta_book_3_testanswer,
+          expected_val = "((list of two AbstractGameState instances, with the move minimax_search_alphabeta makes), (its score), 0)",
+          name = 'minimax_search_alphabeta')
+
+# The book is only looked up for the searched state: a depth 4 search from
+# the empty board does not use the depth 3 entries for the positions below it.
+def alphabeta_book_4_getargs() :  #TEST 70
+    GAME = AbstractGameState(ConnectFourBoard(), is_game_over_connectfour, next_boards_connectfour, endgame_score_connectfour_faster)
+    return [GAME, -INF, INF, heuristic_connectfour, 4, True, None, make_opening_test_book()]
+def alphabeta_book_4_testanswer(val, original_val = None) :
+    GAME = AbstractGameState(ConnectFourBoard(), is_game_over_connectfour, next_boards_connectfour, endgame_score_connectfour_faster)
+    expected = minimax_search_alphabeta(GAME, -INF, INF, heuristic_connectfour, 4, True)
+    return (is_dfs_return_type(val) and val[1:] == expected[1:]
+            and [state.get_snapshot() for state in val[0]] == [state.get_snapshot() for state in expected[0]])
+make_test(type = 'FUNCTION_ENCODED_ARGS',
+          getargs = alphabeta_book_4_getargs,
+          testanswer = alphabeta_book_4_testanswer,
+          expected_val = "the same result as minimax_search_alphabeta without the book",
+          name = 'minimax_search_alphabeta')
+
+# progressive_deepening_timed uses the book too: level 4 is the book's.
+def progressive_timed_book_0_getargs() :  #TEST 71
+    GAME = AbstractGameState(BOARD_UHOH, is_game_over_connectfour, next_boards_connectfour, endgame_score_connectfour_faster)
+    return [GAME, heuristic_connectfour, 10**6, False, 4, None, make_test_book()]
+def progressive_timed_book_0_testanswer(val, original_val = None) :
+    return (isinstance(val, AnytimeValue) and len(val.history) == 4
+            and val.get_value()[1:] == (-123, 0))
+make_test(type = 'FUNCTION_ENCODED_ARGS',
+          getargs = progressive_timed_book_0_getargs,
+          testanswer = progressive_timed_book_0_testanswer,
+          expected_val = "AnytimeValue whose level 4 result has the book's score, -123, and 0 evaluations",
+          name = 'progressive_deepening_timed')
+
+
+#### In-place alpha-beta search #################################################
+
+from lab2 import minimax_search_alphabeta_inplace
+
+def alphabeta_inplace_0_getargs() :  #TEST 72
+    GAME = AbstractGameState(BOARD_UHOH, is_game_over_connectfour, next_boards_connectfour, endgame_score_connectfour_faster)
+    return [GAME, -INF, INF, heuristic_connectfour, 4, True]
+def alphabeta_inplace_0_testanswer(val, original_val = None) :
+    GAME = AbstractGameState(BOARD_UHOH, is_game_over_connectfour, next_boards_connectfour, endgame_score_connectfour_faster)
+    expected = minimax_search_alphabeta(GAME, -INF, INF, heuristic_connectfour, 4, True)
+    return (is_dfs_return_type(val) and (val[1],val[2]) == (-40,1094)
+            and [state.get_snapshot() for state in val[0]] == [state.get_snapshot() for state in expected[0]])
+make_test(type = 'FUNCTION_ENCODED_ARGS',
+          getargs = alphabeta_inplace_0_getargs,
+          testanswer = alphabeta_inplace_0_testanswer,
+          expected_val = "the same result as minimax_search_alphabeta: ((list of five AbstractGameState instances), -40, 1094)",
+          name = 'minimax_search_alphabeta_inplace')
+
+# The search must leave the board it was given as it was.
+INPLACE_BOARD = BitboardConnectFourBoard.from_board(BOARD_UHOH)
+def alphabeta_inplace_1_getargs() :  #TEST 73
+    GAME = AbstractGameState(INPLACE_BOARD, is_game_over_connectfour, next_boards_connectfour, endgame_score_connectfour_faster)
+    return [GAME, -INF, INF, heuristic_connectfour_windows, 4, True]
+def alphabeta_inplace_1_testanswer(val, original_val = None) :
+    return (is_dfs_return_type(val) and (val[1],val[2]) == (-9,857)
+            and INPLACE_BOARD == BitboardConnectFourBoard.from_board(BOARD_UHOH))
+make_test(type = 'FUNCTION_ENCODED_ARGS',
+          getargs = alphabeta_inplace_1_getargs,
+          testanswer = alphabeta_inplace_1_testanswer,
+          expected_val = "((list of five AbstractGameState instances), -9, 857)",
+          name = 'minimax_search_alphabeta_inplace')
+
+
+#### Lazy child generation ######################################################
+
+from lab2 import next_boards_connectfour_lazy
+
+# Each state is expanded at most once, and only if the game is not over there.
+EXPANSIONS = []
+def next_boards_connectfour_counted(board) :
+    EXPANSIONS.append(board)
+    return next_boards_connectfour_lazy(board)
+
+def alphabeta_lazy_0_getargs() :  #TEST 74
+    del EXPANSIONS[:]
+    GAME = AbstractGameState(BOARD_UHOH, is_game_over_connectfour, next_boards_connectfour_counted, endgame_score_connectfour_faster)
+    return [GAME, -INF, INF, heuristic_connectfour, 4, True]
+def alphabeta_lazy_0_testanswer(val, original_val = None) :
+    return is_dfs_return_type(val) and (val[1],val[2]) == (-40,1094) and len(EXPANSIONS) == 1196
+make_test(type = 'FUNCTION_ENCODED_ARGS',
+          getargs = alphabeta_lazy_0_getargs,
+          testanswer = alphabeta_lazy_0_testanswer,
+          expected_val = "((list of five AbstractGameState instances), -40, 1094), with one expansion per state visited",
+          name = 'minimax_search_alphabeta')
+
+# progressive_deepening expands each state once over all its levels (230
+# expansions with a new state per level), and empties the cache on return.
+def progressive_lazy_0_getargs() :  #TEST 75
+    del EXPANSIONS[:]
+    GAME = AbstractGameState(BOARD_UHOH, is_game_over_connectfour, next_boards_connectfour_counted, endgame_score_connectfour_faster)
+    return [GAME, heuristic_connectfour, 3, True]
+def progressive_lazy_0_testanswer(val, original_val = None) :
+    # the path starts at the searched state
+    return (isinstance(val, AnytimeValue) and len(EXPANSIONS) == 182
+            and all(state.next_states is None for state in val.get_value()[0]))
+make_test(type = 'FUNCTION_ENCODED_ARGS',
+          getargs = progressive_lazy_0_getargs,
+          testanswer = progressive_lazy_0_testanswer,
+          expected_val = "AnytimeValue found with 182 expansions, leaving no cached children",
+          name = 'progressive_deepening')
+
+# Every search called directly also empties the cache of the state it
+# searched, and of the states on the path it returns.
+SEARCHED_STATES = []
+def searched_state_getargs(*args) :
+    def getargs() :
+        SEARCHED_STATES.append(AbstractGameState(BOARD_UHOH, is_game_over_connectfour, next_boards_connectfour, endgame_score_connectfour_faster))
+        return [SEARCHED_STATES[-1]] + list(args)
+    return getargs
+def no_cached_children_testanswer(val, original_val = None) :
+    return (is_dfs_return_type(val) and val[0][0] is SEARCHED_STATES[-1]
+            and all(state.next_states is None and state.game_over is None for state in val[0]))
+
+make_test(type = 'FUNCTION_ENCODED_ARGS',  #TEST 76
+          getargs = searched_state_getargs(heuristic_connectfour, 2, True),
+          testanswer = no_cached_children_testanswer,
+          expected_val = "(path, score, evaluations), leaving no cached children",
+          name = 'minimax_search')
+
+make_test(type = 'FUNCTION_ENCODED_ARGS',  #TEST 77
+          getargs = searched_state_getargs(-INF, INF, heuristic_connectfour, 3, True),
+          testanswer = no_cached_children_testanswer,
+          expected_val = "(path, score, evaluations), leaving no cached children",
+          name = 'minimax_search_alphabeta')
+
+make_test(type = 'FUNCTION_ENCODED_ARGS',  #TEST 78
+          getargs = searched_state_getargs(-INF, INF, heuristic_connectfour, 3, True),
+          testanswer = no_cached_children_testanswer,
+          expected_val = "(path, score, evaluations), leaving no cached children",
+          name = 'minimax_search_alphabeta_tt')
+
+make_test(type = 'FUNCTION_ENCODED_ARGS',  #TEST 79
+          getargs = searched_state_getargs(-INF, INF, heuristic_connectfour, 3, True),
+          testanswer = no_cached_children_testanswer,
+          expected_val = "(path, score, evaluations), leaving no cached children",
+          name = 'minimax_search_pvs')
+
+
+#### Synthetic ToyTrees #########################################################
+
+from toytree import make_random_toy_tree, toytree_game
+
+# With the best move first at every node, alpha-beta evaluates only
+# 3**2 + 3**2 - 1 = 17 of the 81 leaves; with the worst move first, nearly all.
+def alphabeta_toytree_0_getargs() :  #TEST 80
+    tree = make_random_toy_tree(branching=3, depth=4, seed=1, ordering='best_first')
+    return [toytree_game(tree), -INF, INF, toytree_heuristic_fn, INF, True]
+def alphabeta_toytree_0_testanswer(val, original_val = None) :
+    return is_dfs_return_type(val) and (val[1],val[2]) == (0,17)
+make_test(type = 'FUNCTION_ENCODED_ARGS',
+          getargs = alphabeta_toytree_0_getargs,
+          testanswer = alphabeta_toytree_0_testanswer,
+          expected_val = "((list of five AbstractGameState instances), 0, 17)",
+          name = 'minimax_search_alphabeta')
+
+def alphabeta_toytree_1_getargs() :  #TEST 81
+    tree = make_random_toy_tree(branching=3, depth=4, seed=1, ordering='worst_first', maximize=False)
+    return [toytree_game(tree), -INF, INF, toytree_heuristic_fn, INF, False]
+def alphabeta_toytree_1_testanswer(val, original_val = None) :
+    return is_dfs_return_type(val) and (val[1],val[2]) == (75,80)
+make_test(type = 'FUNCTION_ENCODED_ARGS',
+          getargs = alphabeta_toytree_1_getargs,
+          testanswer = alphabeta_toytree_1_testanswer,
+          expected_val = "((list of five AbstractGameState instances), 75, 80)",
+          name = 'minimax_search_alphabeta')
+
+
+#### Principal variation search #################################################
+
+from lab2 import minimax_search_pvs
+
+# PVS finds alpha-beta's score, (-40, 1094) here, with fewer evaluations.
+def pvs_0_getargs() :  #TEST 82
+    GAME = AbstractGameState(BOARD_UHOH, is_game_over_connectfour, next_boards_connectfour, endgame_score_connectfour_faster)
+    return [GAME, -INF, INF, heuristic_connectfour, 4, True]
+def pvs_0_testanswer(val, original_val = None) :
+    return is_dfs_return_type(val) and (val[1],val[2]) == (-40,910)
+make_test(type = 'FUNCTION_ENCODED_ARGS',
+          getargs = pvs_0_getargs,
+          testanswer = pvs_0_testanswer,
+          expected_val = "((list of five AbstractGameState instances), -40, 910)",
+          name = 'minimax_search_pvs')
+
+# Aspiration windows do not change the scores found at each level.
+def progressive_aspiration_0_getargs() :  #TEST 83
+    GAME = AbstractGameState(BOARD_UHOH, is_game_over_connectfour, next_boards_connectfour, endgame_score_connectfour)
+    return [GAME, heuristic_connectfour, 5, True, None, 50, minimax_search_pvs]
+def progressive_aspiration_0_testanswer(val, original_val = None) :
+    return (isinstance(val, AnytimeValue)
+            and [result[1] for result in val.history] == [19, -11, 9, -40, 99]
+            and val.total_evaluations == 3823)
+make_test(type = 'FUNCTION_ENCODED_ARGS',
+          getargs = progressive_aspiration_0_getargs,
+          testanswer = progressive_aspiration_0_testanswer,
+          expected_val = "AnytimeValue with scores [19, -11, 9, -40, 99] and 3823 total evaluations",
+          name = 'progressive_deepening')
+
+
+#### Self-play tournaments ######################################################
+
+from tournament import Agent
+
+# Two games, one with each agent moving first: every game is a win, draw or
+# loss for both agents, and each of their moves is timed and counted.
+def tournament_0_getargs() :  #TEST 84
+    return [[Agent('alphabeta-1', 'alphabeta', depth_limit=1),
+             Agent('alphabeta-2', 'alphabeta', depth_limit=2)], 2, 2, 1]
+def tournament_0_testanswer(val, original_val = None) :
+    if not (isinstance(val, dict) and sorted(val) == ['alphabeta-1', 'alphabeta-2']):
+        return False
+    first, second = val['alphabeta-1'], val['alphabeta-2']
+    return (first.games() == second.games() == 2
+            and (first.wins, first.draws, first.losses) == (second.losses, second.draws, second.wins)
+            and all(stats.moves > 0 and stats.seconds > 0 and stats.evaluations > 0
+                    and stats.nodes >= stats.evaluations for stats in [first, second]))
+make_test(type = 'FUNCTION_ENCODED_ARGS',
+          getargs = tournament_0_getargs,
+          testanswer = tournament_0_testanswer,
+          expected_val = "dict mapping both agents' names to AgentStats for 2 games each, with matching results and per-move stats",
+          name = 'run_tournament')
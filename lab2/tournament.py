@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+
+# MIT 6.034 Lab 2: Games
+
+# Headless Connect Four self-play, to compare search configurations by speed
+# and strength without playing them yourself. For example, to play plain
+# minimax against alpha-beta at depth 3:
+#     from tournament import Agent, run_tournament, print_results
+#     agents = [Agent('minimax-3', 'minimax', depth_limit=3),
+#               Agent('alphabeta-3', 'alphabeta', depth_limit=3)]
+#     print_results(run_tournament(agents, num_games=10))
+# Run this file from your lab2 directory for a standard set of comparisons:
+#     python3 tournament.py
+#
+# Games are played in parallel on a pool of processes, so agents must be
+# picklable: their heuristic functions must be defined at the top level of a
+# module (as they are in lab2.py).
+
+import os
+import random
+import time
+from multiprocessing import Pool
+
+from game_api import *
+from lab2 import *
+
+
+# The number of nodes searched, counted by counting_is_game_over: every
+# search function calls state.is_game_over() once for each node it visits.
+nodes_searched = 0
+
+def counting_is_game_over(board):
+    global nodes_searched
+    nodes_searched += 1
+    return is_game_over_connectfour(board)
+
+def make_state(board):
+    return AbstractGameState(board, counting_is_game_over, next_boards_connectfour_lazy,
+                             endgame_score_connectfour_faster)
+
+
+class Agent:
+    """A search configuration that plays Connect Four. search is one of:
+        'minimax':     minimax_search to depth_limit
+        'alphabeta':   minimax_search_alphabeta to depth_limit
+        'timed':       progressive_deepening_timed, for time_limit_ms
+                       milliseconds per move (and at most depth_limit)
+    The agent always searches as the maximizer, so heuristic_fn scores the
+    board for the player to move."""
+    searches = ['minimax', 'alphabeta', 'timed']
+
+    def __init__(self, name, search='alphabeta', heuristic_fn=heuristic_connectfour,
+                 depth_limit=4, time_limit_ms=None):
+        if search not in self.searches:
+            raise ValueError("Expected search in " + str(self.searches) + ", got " + str(search))
+        if search == 'timed' and time_limit_ms is None:
+            raise ValueError("A 'timed' agent needs a time_limit_ms")
+        self.name = name
+        self.search = search
+        self.heuristic_fn = heuristic_fn
+        self.depth_limit = depth_limit
+        self.time_limit_ms = time_limit_ms
+
+    def choose_move(self, state):
+        """Searches state and returns (path, score, evals), as
+        minimax_search_alphabeta does."""
+        if self.search == 'minimax':
+            return minimax_search(state, self.heuristic_fn, self.depth_limit)
+        if self.search == 'alphabeta':
+            return minimax_search_alphabeta(state, -INF, INF, self.heuristic_fn, self.depth_limit)
+        return progressive_deepening_timed(state, self.heuristic_fn, self.time_limit_ms,
+                                           True, self.depth_limit).get_value()
+
+    def __str__(self):
+        return "<Agent %s>" % self.name
+    __repr__ = __str__
+
+
+class AgentStats:
+    "Totals over the games and moves played by one agent."
+
+    def __init__(self, name):
+        self.name = name
+        self.wins = 0
+        self.losses = 0
+        self.draws = 0
+        self.moves = 0
+        self.seconds = 0.0
+        self.evaluations = 0
+        self.nodes = 0
+
+    def add_game(self, result, moves):
+        """Adds a game with result 'win', 'loss' or 'draw', and moves a list
+        of (seconds, evals, nodes), one per move the agent made."""
+        if result == 'win':
+            self.wins += 1
+        elif result == 'loss':
+            self.losses += 1
+        else:
+            self.draws += 1
+        for seconds, evaluations, nodes in moves:
+            self.moves += 1
+            self.seconds += seconds
+            self.evaluations += evaluations
+            self.nodes += nodes
+
+    def games(self):
+        return self.wins + self.losses + self.draws
+
+    def win_rate(self):
+        "Returns the fraction of games won, counting a draw as half a win."
+        return (self.wins + 0.5 * self.draws) / max(1, self.games())
+
+    def nodes_per_second(self):
+        return self.nodes / self.seconds if self.seconds else 0.0
+
+    def average_latency_ms(self):
+        return 1000.0 * self.seconds / max(1, self.moves)
+
+    def evaluations_per_move(self):
+        return self.evaluations / max(1, self.moves)
+
+
+#### Playing games #############################################################
+
+def play_game(agents, opening_moves=0, seed=0, board_class=BitboardConnectFourBoard):
+    """Plays one game between two agents; agents[0] moves first, after
+    opening_moves random moves (chosen with seed, so that games between the
+    same agents differ). Returns (index of the winner, or None for a draw,
+    and for each agent a list of (seconds, evals, nodes) for its moves)."""
+    global nodes_searched
+    rng = random.Random(seed)
+    board = board_class()
+    for move in range(opening_moves):
+        board = board.add_piece(rng.choice([col for col in range(board.num_cols)
+                                            if not board.is_column_full(col)]))
+    # after an odd number of random moves, the second agent is to move
+    turn = opening_moves % 2
+    moves = [[], []]
+    state = make_state(board)
+    while not state.is_game_over():
+        nodes_searched = 0
+        start_time = time.perf_counter()
+        path, score, evaluations = agents[turn].choose_move(state)
+        moves[turn].append((time.perf_counter() - start_time, evaluations, nodes_searched))
+        state = make_state(path[1].get_snapshot())
+        turn = 1 - turn
+    # the player who made the last move won, unless the board is full
+    winner = (1 - turn) if state.get_snapshot().has_winning_chain() else None
+    return (winner, moves)
+
+def play_game_task(task):
+    agents, opening_moves, seed = task
+    return play_game(agents, opening_moves, seed)
+
+def run_tournament(agents, num_games=10, opening_moves=2, processes=None, seed=0):
+    """Plays num_games games between every pair of agents, each agent moving
+    first in half of them, and returns a dict mapping each agent's name to
+    its AgentStats. The games are played on a pool of processes (by default,
+    one per core); with processes=1, they are played in this process."""
+    tasks = []
+    for i in range(len(agents)):
+        for j in range(i + 1, len(agents)):
+            for game in range(num_games):
+                pair = [agents[i], agents[j]] if game % 2 == 0 else [agents[j], agents[i]]
+                # both colors play the same openings
+                tasks.append((pair, opening_moves, seed + game // 2))
+
+    processes = processes or os.cpu_count() or 1
+    if processes == 1:
+        games = list(map(play_game_task, tasks))
+    else:
+        with Pool(processes) as pool:
+            games = pool.map(play_game_task, tasks)
+
+    results = dict((agent.name, AgentStats(agent.name)) for agent in agents)
+    for (pair, opening_moves, game_seed), (winner, moves) in zip(tasks, games):
+        for index in [0, 1]:
+            result = 'draw' if winner is None else ('win' if winner == index else 'loss')
+            results[pair[index].name].add_game(result, moves[index])
+    return results
+
+def print_results(results):
+    print("%-24s %6s %5s %5s %5s %9s %12s %12s %12s"
+          % ("agent", "games", "wins", "draws", "losses", "win rate",
+             "latency ms", "evals/move", "nodes/sec"))
+    for stats in results.values():
+        print("%-24s %6d %5d %5d %5d %9.2f %12.1f %12.1f %12.0f"
+              % (stats.name, stats.games(), stats.wins, stats.draws, stats.losses,
+                 stats.win_rate(), stats.average_latency_ms(),
+                 stats.evaluations_per_move(), stats.nodes_per_second()))
+    print()
+
+
+#### Standard comparisons ######################################################
+
+def compare_searches(num_games=4, depth_limit=3, processes=None):
+    print("minimax vs. alpha-beta, depth %d:" % depth_limit)
+    print_results(run_tournament([Agent('minimax-%d' % depth_limit, 'minimax', depth_limit=depth_limit),
+                                  Agent('alphabeta-%d' % depth_limit, 'alphabeta', depth_limit=depth_limit)],
+                                 num_games, processes=processes))
+
+def compare_depths(num_games=4, depth_limits=[2, 4], processes=None):
+    print("alpha-beta at depths %s:" % depth_limits)
+    print_results(run_tournament([Agent('alphabeta-%d' % depth, 'alphabeta', depth_limit=depth)
+                                  for depth in depth_limits], num_games, processes=processes))
+
+def compare_heuristics(num_games=4, depth_limit=4, processes=None):
+    print("heuristics, alpha-beta depth %d:" % depth_limit)
+    print_results(run_tournament([Agent('chains-%d' % depth_limit, 'alphabeta', heuristic_connectfour, depth_limit),
+                                  Agent('windows-%d' % depth_limit, 'alphabeta', heuristic_connectfour_windows, depth_limit)],
+                                 num_games, processes=processes))
+
+def compare_time_limits(num_games=4, time_limits_ms=[50, 500], processes=None):
+    print("time budgets %s ms:" % time_limits_ms)
+    print_results(run_tournament([Agent('timed-%dms' % time_limit_ms, 'timed', depth_limit=INF,
+                                        time_limit_ms=time_limit_ms)
+                                  for time_limit_ms in time_limits_ms], num_games, processes=processes))
+
+
+if __name__ == '__main__':
+    compare_searches()
+    compare_depths()
+    compare_heuristics()
+    compare_time_limits()
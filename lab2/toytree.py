@@ -2,6 +2,7 @@
 
 from game_api import *
 from copy import deepcopy
+import random
 
 class ToyTree :
     def __init__(self, label=None, score=None) :
@@ -179,3 +180,72 @@ GAME_EQUALITY_PRUNING = AbstractGameState(tree6,
                          toytree_generate_next_states,
                          toytree_endgame_score_fn)
 
+
+
+# LARGE SYNTHETIC TREES, for benchmarks
+
+def make_random_toy_tree(branching=3, depth=4, seed=0, score_range=(-100, 100),
+                         distribution='uniform', ordering='random', heuristic_noise=None,
+                         maximize=True) :
+    """Creates a random ToyTree for benchmarking game searches:
+    branching:     the number of children of each inner node, or a pair
+                   (low, high) to choose it at random in that range
+    depth:         the depth of every leaf
+    score_range:   (low, high) range of the leaf scores
+    distribution:  how leaf scores are drawn: 'uniform' (integers spread
+                   evenly over score_range), 'gaussian' (clustered around the
+                   middle, many ties) or 'extremes' (mostly near low or high)
+    ordering:      the order of each node's children: 'random' (as drawn),
+                   'best_first' (the best move for the player to move comes
+                   first, so alpha-beta prunes as much as it can) or
+                   'worst_first' (adversarial: the worst move first, so
+                   alpha-beta prunes nothing)
+    heuristic_noise: if not None, every inner node also gets a score: its
+                   minimax value plus Gaussian noise with this standard
+                   deviation, for use with toytree_heuristic_fn
+    maximize:      whether the player to move at the root is the maximizer,
+                   which decides what 'best' means for each ordering
+    Leaf scores are from the maximizer's point of view, as for every
+    ToyTree."""
+    rng = random.Random(seed)
+    low, high = score_range
+
+    def leaf_score() :
+        if distribution == 'uniform' :
+            return rng.randint(low, high)
+        if distribution == 'gaussian' :
+            middle, spread = (low + high) / 2.0, (high - low) / 6.0
+            return int(round(min(high, max(low, rng.gauss(middle, spread)))))
+        if distribution == 'extremes' :
+            spread = (high - low) // 10
+            return rng.randint(low, low + spread) if rng.random() < 0.5 else rng.randint(high - spread, high)
+        raise ValueError("Unknown distribution " + str(distribution))
+
+    def make_subtree(level, maximize) :
+        """Returns (subtree, its minimax value)."""
+        if level == depth :
+            score = leaf_score()
+            return (ToyTree(None, score), score)
+        num_children = rng.randint(*branching) if isinstance(branching, (tuple, list)) else branching
+        children = [make_subtree(level + 1, not maximize) for i in range(num_children)]
+        if ordering == 'best_first' :
+            children.sort(key = lambda child : child[1], reverse = maximize)
+        elif ordering == 'worst_first' :
+            children.sort(key = lambda child : child[1], reverse = not maximize)
+        elif ordering != 'random' :
+            raise ValueError("Unknown ordering " + str(ordering))
+        value = (max if maximize else min)(child[1] for child in children)
+        tree = ToyTree(None, None if heuristic_noise is None
+                       else int(round(value + rng.gauss(0, heuristic_noise))))
+        for child, child_value in children :
+            tree.append(child)
+        return (tree, value)
+
+    return make_subtree(0, maximize)[0]
+
+def toytree_game(tree) :
+    "Wraps a ToyTree in an AbstractGameState."
+    return AbstractGameState(tree,
+                             toytree_is_game_over,
+                             toytree_generate_next_states,
+                             toytree_endgame_score_fn)